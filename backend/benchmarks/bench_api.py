@@ -0,0 +1,264 @@
+"""
+Benchmark tải cho API: chạy app trong cùng process qua ASGI transport (không cần uvicorn)
+
+Kịch bản (chạy lần lượt, mỗi kịch bản có nhiều request đồng thời):
+    register_storm  - nhiều user đăng ký cùng lúc (bcrypt trên password pool)
+    login_burst     - toàn bộ user đăng nhập cùng lúc
+    token_refresh   - mỗi user đổi refresh token lấy cặp token mới (không bcrypt)
+    login_stuffing  - đăng nhập sai mật khẩu dồn dập vào một nhóm email (401 rồi 429 khi vượt giới hạn)
+    profile_fanout  - mỗi user đọc profile nhiều lần (JWT + cache profile)
+    catalog_scroll  - nhiều client cuộn hết danh mục sản phẩm bằng cursor
+
+Database:
+    --db mongomock  dữ liệu trong bộ nhớ (mặc định)
+    --db mongodb    MongoDB thật theo MONGODB_URL, dùng database tạm <DATABASE_NAME>_bench và xóa sau khi chạy
+
+Chạy (cần pip install -r requirements-dev.txt):
+    cd backend
+    python -m benchmarks.bench_api --users 200 --concurrency 50 --save benchmarks/baselines/local.json
+    python -m benchmarks.bench_api --users 200 --concurrency 50 --compare benchmarks/baselines/local.json
+
+Khi có --compare, lệnh thoát với mã 1 nếu throughput giảm hoặc p95/p99 tăng quá --tolerance so với baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from benchmarks.common import run_concurrent, summarize, print_summary, save_baseline, compare_to_baseline
+
+PASSWORD = "bench-password"
+CATEGORIES = ["running", "football", "gym", "tennis", "swimming"]
+
+
+def _configure_env(args: argparse.Namespace):
+    """Đặt biến môi trường trước khi import app (Settings đọc env khi import config)"""
+    if args.db == "mongomock":
+        os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+        os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+        # mongomock không hỗ trợ change stream
+        os.environ["SEARCH_USE_CHANGE_STREAM"] = "false"
+    os.environ["DATABASE_NAME"] = os.environ.get("DATABASE_NAME", "smart_sport_db") + "_bench"
+    os.environ["IMAGE_INDEX_DIR"] = tempfile.mkdtemp(prefix="bench_image_index_")
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    # Mọi request qua ASGI transport có cùng IP client: bỏ giới hạn theo IP, giữ giới hạn theo email
+    os.environ["LOGIN_RATE_LIMIT_PER_IP"] = str(10 ** 9)
+
+
+def _seed_products(count: int) -> List[Dict[str, Any]]:
+    """Tạo dữ liệu sản phẩm giả lập"""
+    now = datetime.utcnow()
+    return [
+        {
+            "name": f"Sản phẩm benchmark {i}",
+            "price": float(100_000 + (i * 7919) % 2_000_000),
+            "image": "",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "rating": round((i * 31) % 50 / 10, 1),
+            "sold": (i * 131) % 5000,
+            "description": "Dữ liệu benchmark",
+            "created_at": now,
+            "updated_at": now
+        }
+        for i in range(count)
+    ]
+
+
+async def _scenarios(client, args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    """Chạy các kịch bản và trả về {tên kịch bản: stats}"""
+    results: Dict[str, Dict[str, float]] = {}
+    emails = [f"bench{i}@example.com" for i in range(args.users)]
+    tokens: List[str] = []
+    refresh_tokens: List[str] = []
+
+    def record(name: str, latencies: List[float], errors: int, elapsed: float):
+        stats = summarize(latencies, elapsed)
+        stats["errors"] = errors
+        results[name] = stats
+        print_summary(f"{name} ({errors} lỗi)", stats)
+
+    # Đăng ký đồng thời
+    def register(email: str):
+        async def task() -> bool:
+            response = await client.post("/api/auth/register", json={
+                "full_name": "Benchmark User",
+                "email": email,
+                "password": PASSWORD
+            })
+            return response.status_code == 201
+        return task
+
+    record("register_storm", *await run_concurrent([register(email) for email in emails], args.concurrency))
+
+    # Đăng nhập đồng thời, giữ lại token cho kịch bản sau
+    def login(email: str):
+        async def task() -> bool:
+            response = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+            if response.status_code != 200:
+                return False
+            body = response.json()
+            tokens.append(body["access_token"])
+            refresh_tokens.append(body["refresh_token"])
+            return True
+        return task
+
+    record("login_burst", *await run_concurrent([login(email) for email in emails], args.concurrency))
+
+    # Refresh: chỉ một lệnh find_one_and_update theo _id và một lần HMAC
+    def refresh(refresh_token: str):
+        async def task() -> bool:
+            response = await client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+            return response.status_code == 200
+        return task
+
+    record("token_refresh", *await run_concurrent([refresh(token) for token in refresh_tokens], args.concurrency))
+
+    # Dò mật khẩu: mỗi email bị thử sai gấp đôi giới hạn, các lần vượt giới hạn bị từ chối trước bcrypt
+    from config import settings
+
+    def stuff(email: str):
+        async def task() -> bool:
+            response = await client.post("/api/auth/login", json={"email": email, "password": "wrong-password"})
+            return response.status_code in (401, 429)
+        return task
+
+    targets = emails[:20] * (2 * settings.LOGIN_RATE_LIMIT_PER_EMAIL)
+    record("login_stuffing", *await run_concurrent([stuff(email) for email in targets], args.concurrency))
+
+    # Đọc profile: mỗi token đọc nhiều lần
+    def read_profile(token: str):
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def task() -> bool:
+            response = await client.get("/api/auth/me", headers=headers)
+            return response.status_code == 200
+        return task
+
+    record("profile_fanout", *await run_concurrent(
+        [read_profile(token) for token in tokens for _ in range(args.profile_reads)],
+        args.concurrency
+    ))
+
+    # Cuộn danh mục: mỗi request là một trang, các client cuộn song song
+    page_latencies: List[float] = []
+    page_errors = 0
+
+    def scroll(index: int):
+        sort = ["newest", "price_asc", "best_selling", "rating"][index % 4]
+
+        async def task() -> bool:
+            nonlocal page_errors
+            cursor = None
+            while True:
+                params = {"sort": sort, "limit": args.page_size}
+                if cursor:
+                    params["cursor"] = cursor
+                start = time.perf_counter()
+                response = await client.get("/api/products", params=params)
+                page_latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    page_errors += 1
+                    return False
+                body = response.json()
+                if not body["has_more"]:
+                    return True
+                cursor = body["next_cursor"]
+        return task
+
+    _, _, elapsed = await run_concurrent([scroll(i) for i in range(args.scrollers)], args.concurrency)
+    record("catalog_scroll", page_latencies, page_errors, elapsed)
+
+    return results
+
+
+async def main(args: argparse.Namespace) -> int:
+    _configure_env(args)
+
+    import httpx
+    from config import settings
+    from database import db
+    from main import app
+    from services import ProductService
+
+    mock_client = None
+    if args.db == "mongomock":
+        from benchmarks.mongomock_async import AsyncMockClient
+        mock_client = AsyncMockClient()
+        # Đặt sẵn client để lifespan không tạo AsyncMongoClient thật
+        db.client = mock_client
+        db.database = mock_client[settings.DATABASE_NAME]
+
+    database = db.get_database()
+    await database[ProductService.collection_name].insert_many(_seed_products(args.products))
+
+    print(
+        f"DB: {args.db} ({settings.DATABASE_NAME}) | users={args.users} concurrency={args.concurrency} "
+        f"products={args.products} bcrypt_rounds={settings.BCRYPT_ROUNDS}"
+    )
+
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                scenarios = await _scenarios(client, args)
+    finally:
+        if mock_client is None:
+            # Lifespan đã đóng client, mở lại để xóa database tạm
+            await db.connect()
+            await db.client.drop_database(settings.DATABASE_NAME)
+        await db.close()
+        shutil.rmtree(settings.IMAGE_INDEX_DIR, ignore_errors=True)
+
+    results = {
+        "meta": {
+            "db": args.db,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "products": args.products,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "python": platform.python_version(),
+            "created_at": datetime.utcnow().isoformat()
+        },
+        "scenarios": scenarios
+    }
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        save_baseline(args.save, results)
+        print(f"\n💾 Đã lưu baseline: {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(baseline["scenarios"], scenarios, args.tolerance)
+        if regressions:
+            print(f"\n❌ Regression so với {args.compare} (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print(f"\n✅ Không có regression so với {args.compare} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", choices=["mongomock", "mongodb"], default="mongomock")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--profile-reads", type=int, default=10, help="Số lần đọc profile của mỗi user")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--scrollers", type=int, default=20, help="Số client cuộn danh mục song song")
+    parser.add_argument("--page-size", type=int, default=24)
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="Ghi đè BCRYPT_ROUNDS (mặc định theo cấu hình)")
+    parser.add_argument("--save", help="Lưu kết quả thành file JSON baseline")
+    parser.add_argument("--compare", help="So sánh với file JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Mức chênh lệch cho phép (0.2 = 20%%)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
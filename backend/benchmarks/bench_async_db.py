@@ -0,0 +1,71 @@
+"""
+Benchmark: so sánh latency khi handler async gọi pymongo đồng bộ (trước)
+và AsyncMongoClient (sau) dưới tải đồng thời.
+
+Chạy (cần MONGODB_URL trong .env):
+    cd backend
+    python -m benchmarks.bench_async_db --concurrency 200 --rounds 5
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, List
+
+from bson import ObjectId
+
+from benchmarks.common import summarize, print_summary
+from config import settings
+from database import db
+
+COLLECTION = "bench_async_db"
+
+
+async def _run_concurrent(handler: Callable[[], Awaitable[None]], concurrency: int, rounds: int) -> List[float]:
+    """Chạy `concurrency` handler đồng thời trong `rounds` vòng, trả về latency từng request (ms)"""
+    latencies: List[float] = []
+
+    async def timed():
+        start = time.perf_counter()
+        await handler()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    for _ in range(rounds):
+        await asyncio.gather(*(timed() for _ in range(concurrency)))
+    return latencies
+
+
+async def main(concurrency: int, rounds: int):
+    sync_collection = db.get_sync_database()[COLLECTION]
+    await db.connect()
+    async_collection = db.get_database()[COLLECTION]
+
+    doc_id = ObjectId()
+    sync_collection.insert_one({"_id": doc_id, "email": "bench@example.com"})
+
+    async def blocking_handler():
+        # Trước: pymongo đồng bộ chặn event loop trong suốt round trip
+        sync_collection.find_one({"_id": doc_id})
+
+    async def async_handler():
+        # Sau: I/O được await, event loop phục vụ request khác trong lúc chờ
+        await async_collection.find_one({"_id": doc_id})
+
+    try:
+        print(f"MongoDB: {settings.DATABASE_NAME} | concurrency={concurrency} rounds={rounds}\n")
+        for title, handler in (("before (sync pymongo)", blocking_handler), ("after (AsyncMongoClient)", async_handler)):
+            # Warm-up để pool kết nối sẵn sàng
+            await _run_concurrent(handler, concurrency, 1)
+            start = time.perf_counter()
+            latencies = await _run_concurrent(handler, concurrency, rounds)
+            print_summary(title, summarize(latencies, time.perf_counter() - start))
+    finally:
+        sync_collection.delete_one({"_id": doc_id})
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.rounds))
@@ -0,0 +1,183 @@
+"""
+Benchmark checkout dưới tải: nhiều người mua cùng lúc một sản phẩm tồn kho giới hạn
+
+Mỗi người mua có giỏ gồm sản phẩm "hot" (tồn kho ít hơn tổng nhu cầu) và một sản
+phẩm còn nhiều hàng; mỗi người gửi checkout hai lần đồng thời với cùng
+Idempotency-Key (mô phỏng client gửi lại sau timeout). Sau khi chạy, benchmark
+kiểm tra các bất biến và thoát với mã 1 nếu có vi phạm:
+    - tồn kho không âm, tồn kho đã trừ == `sold` == tổng số lượng trong các đơn
+    - mỗi người mua có tối đa một đơn (Idempotency-Key không tạo đơn trùng)
+    - người mua thành công có giỏ rỗng, người mua thất bại giữ nguyên giỏ
+
+Database:
+    --db mongomock  dữ liệu trong bộ nhớ (mặc định), checkout không dùng transaction. Các lệnh
+                    mongomock chạy tuần tự trên event loop nên các checkout không thực sự xen
+                    nhau: chỉ kiểm tra logic, không phát hiện được race (bán quá tồn kho)
+    --db replset    replica set một node chạy tạm (benchmarks/mongod_replset.py, cần `mongod`
+                    trong PATH hoặc MONGOD_BIN), checkout bắt buộc dùng transaction
+    --db mongodb    MongoDB thật theo MONGODB_URL (replica set để dùng transaction), dùng
+                    database tạm <DATABASE_NAME>_bench và xóa sau khi chạy
+
+Chạy:
+    cd backend
+    python -m benchmarks.bench_checkout --buyers 500 --stock 100 --concurrency 100
+    python -m benchmarks.bench_checkout --db replset --buyers 500 --stock 100 --concurrency 100
+    python -m benchmarks.bench_checkout --db mongodb --buyers 500 --stock 100 --concurrency 100
+
+`--db replset` là kiểm tra chạy được trong CI (có MongoDB Server): thoát với mã khác 0
+nếu bán quá tồn kho, có đơn trùng, hoặc checkout không chạy trong transaction.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+from bson import ObjectId
+
+from benchmarks.common import run_concurrent, summarize, print_summary
+
+
+def _configure_env(args: argparse.Namespace):
+    """Đặt biến môi trường trước khi import app (Settings đọc env khi import config)"""
+    if args.db in ("mongomock", "replset"):
+        os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+        os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+    if args.db == "mongomock":
+        # mongomock không hỗ trợ transaction
+        os.environ["ORDER_USE_TRANSACTIONS"] = "false"
+    elif args.db == "replset":
+        os.environ["ORDER_USE_TRANSACTIONS"] = "true"
+    os.environ["DATABASE_NAME"] = os.environ.get("DATABASE_NAME", "smart_sport_db") + "_bench"
+
+
+async def main(args: argparse.Namespace) -> int:
+    _configure_env(args)
+
+    from config import settings
+    from database import db
+    from services import CartService, OrderService, OutOfStockError, ProductService
+
+    mock_client = None
+    if args.db == "mongomock":
+        from benchmarks.mongomock_async import AsyncMockClient
+        mock_client = AsyncMockClient()
+        db.client = mock_client
+        db.database = mock_client[settings.DATABASE_NAME]
+    else:
+        await db.connect()
+
+    database = db.get_database()
+    await db.ensure_indexes()
+    products = database[ProductService.collection_name]
+    carts = database[CartService.collection_name]
+    orders = database[OrderService.collection_name]
+    order_service = OrderService(orders, products, carts)
+
+    hot_id, spare_id = ObjectId(), ObjectId()
+    await products.insert_many([
+        {"_id": hot_id, "name": "Hot item", "category": "running", "price": 100.0, "stock": args.stock, "sold": 0},
+        {"_id": spare_id, "name": "Spare item", "category": "running", "price": 10.0, "stock": args.buyers * 10, "sold": 0}
+    ])
+    now = datetime.utcnow()
+    buyers = [f"buyer-{i}" for i in range(args.buyers)]
+    quantities = {user_id: 1 + i % args.max_quantity for i, user_id in enumerate(buyers)}
+    await carts.insert_many([
+        {
+            "user_id": user_id,
+            "items": [
+                {"product_id": hot_id, "quantity": quantities[user_id], "added_at": now},
+                {"product_id": spare_id, "quantity": 1, "added_at": now}
+            ],
+            "version": 1,
+            "updated_at": now
+        }
+        for user_id in buyers
+    ])
+
+    print(
+        f"DB: {args.db} ({settings.DATABASE_NAME}) | buyers={args.buyers} stock={args.stock} "
+        f"demand={sum(quantities.values())} concurrency={args.concurrency} "
+        f"transactions={order_service.use_transactions}"
+    )
+
+    outcomes = {"placed": 0, "replayed": 0, "out_of_stock": 0, "failed": 0}
+
+    def checkout(user_id: str):
+        async def task() -> bool:
+            try:
+                _, created = await order_service.checkout(user_id, idempotency_key=f"key-{user_id}")
+                outcomes["placed" if created else "replayed"] += 1
+            except OutOfStockError:
+                outcomes["out_of_stock"] += 1
+            except Exception as e:
+                outcomes["failed"] += 1
+                print(f"❌ {user_id}: {type(e).__name__}: {e}")
+                return False
+            return True
+        return task
+
+    violations: List[str] = []
+    try:
+        tasks = [checkout(user_id) for user_id in buyers for _ in range(2)]
+        start = time.perf_counter()
+        latencies, errors, _ = await run_concurrent(tasks, args.concurrency)
+        print_summary("checkout", summarize(latencies, time.perf_counter() - start))
+        print(f"   kết quả: {outcomes}")
+
+        hot = await products.find_one({"_id": hot_id})
+        ordered_quantity = 0
+        orders_per_buyer = {}
+        async for order in orders.find({"user_id": {"$in": buyers}}):
+            orders_per_buyer[order["user_id"]] = orders_per_buyer.get(order["user_id"], 0) + 1
+            ordered_quantity += sum(line["quantity"] for line in order["items"] if line["product_id"] == hot_id)
+
+        if hot["stock"] < 0:
+            violations.append(f"Tồn kho âm: {hot['stock']}")
+        if args.stock - hot["stock"] != hot["sold"] or hot["sold"] != ordered_quantity:
+            violations.append(
+                f"Lệch tồn kho: đã trừ {args.stock - hot['stock']}, sold {hot['sold']}, trong đơn {ordered_quantity}"
+            )
+        duplicated = [user_id for user_id, count in orders_per_buyer.items() if count > 1]
+        if duplicated:
+            violations.append(f"{len(duplicated)} người mua có nhiều hơn một đơn")
+        async for cart in carts.find({"user_id": {"$in": buyers}}):
+            if bool(cart["items"]) == (cart["user_id"] in orders_per_buyer):
+                violations.append(f"Giỏ hàng của {cart['user_id']} không khớp với kết quả checkout")
+                break
+        if errors:
+            violations.append(f"{errors} checkout lỗi ngoài dự kiến")
+        if args.db == "replset" and not order_service.use_transactions:
+            violations.append("Checkout không dùng transaction trên replica set")
+
+        print(f"   tồn kho còn lại: {hot['stock']} | đã bán: {hot['sold']} | người mua có đơn: {len(orders_per_buyer)}")
+    finally:
+        if mock_client is None:
+            await db.client.drop_database(settings.DATABASE_NAME)
+        await db.close()
+
+    for violation in violations:
+        print(f"❌ {violation}")
+    if not violations:
+        print("\n✅ Không bán quá tồn kho, không có đơn trùng")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", choices=["mongomock", "replset", "mongodb"], default="mongomock")
+    parser.add_argument("--buyers", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=100, help="Tồn kho ban đầu của sản phẩm hot")
+    parser.add_argument("--max-quantity", type=int, default=3, help="Số lượng sản phẩm hot tối đa trong mỗi giỏ")
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+    if args.db == "replset":
+        from benchmarks.mongod_replset import replica_set
+        with replica_set() as url:
+            os.environ["MONGODB_URL"] = url
+            code = asyncio.run(main(args))
+    else:
+        code = asyncio.run(main(args))
+    sys.exit(code)
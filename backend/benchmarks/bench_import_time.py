@@ -0,0 +1,138 @@
+"""
+Benchmark thời gian khởi động: chi phí `import main` đo bằng `python -X importtime`
+
+Mỗi lần đo chạy một interpreter mới (cache import của process hiện tại không ảnh
+hưởng), lấy tổng thời gian import của `main` và các module tốn thời gian nhất.
+Đồng thời kiểm tra các module nặng chỉ được import khi dùng lần đầu (numpy/Pillow
+cho tìm kiếm theo ảnh, python-jose cho JWT) không bị nạp sẵn lúc khởi động.
+
+Chạy (không cần MongoDB):
+    cd backend
+    python -m benchmarks.bench_import_time --runs 5 --save benchmarks/baselines/import_time.json
+    python -m benchmarks.bench_import_time --runs 5 --compare benchmarks/baselines/import_time.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from .common import percentile, save_baseline
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module chỉ được nạp khi tính năng tương ứng được dùng lần đầu
+LAZY_MODULES = ("numpy", "PIL", "jose")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+    env.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def measure_once() -> Tuple[float, List[Tuple[str, float, float]], List[str]]:
+    """
+    Import main trong một interpreter mới
+
+    Returns:
+        (tổng thời gian import main (ms), [(module, self ms, cumulative ms)], module nặng đã bị nạp)
+    """
+    check = f"import sys, main; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=BACKEND_DIR,
+        env=_environment(),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import main thất bại:\n{result.stderr[-2000:]}")
+
+    modules = []
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+        if name == "main" and len(indent) == 1:
+            total_ms = int(cumulative_us) / 1000
+
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total_ms, modules, loaded
+
+
+def _top_packages(modules: List[Tuple[str, float, float]], limit: int) -> List[Tuple[str, float]]:
+    """Cộng self time theo package gốc (fastapi, pydantic, pymongo...)"""
+    totals: Dict[str, float] = {}
+    for name, self_ms, _ in modules:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + self_ms
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main(args: argparse.Namespace) -> int:
+    totals = []
+    modules: List[Tuple[str, float, float]] = []
+    loaded: List[str] = []
+    for _ in range(args.runs):
+        total_ms, modules, loaded = measure_once()
+        totals.append(total_ms)
+
+    results = {
+        "import_main": {
+            "runs": args.runs,
+            "min_ms": min(totals),
+            "p50_ms": percentile(totals, 50),
+            "max_ms": max(totals),
+        }
+    }
+    stats = results["import_main"]
+    print(f"import main: min={stats['min_ms']:.1f}ms  p50={stats['p50_ms']:.1f}ms  max={stats['max_ms']:.1f}ms")
+
+    print(f"\nTop {args.top} package (self time, lần chạy cuối):")
+    for package, self_ms in _top_packages(modules, args.top):
+        print(f"  {package:<28} {self_ms:>8.1f}ms")
+
+    failures = []
+    if loaded:
+        failures.append(f"Module nặng bị import lúc khởi động: {', '.join(loaded)}")
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"\n💾 Đã lưu baseline: {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["import_main"]
+        # So sánh p50: min dễ bị ảnh hưởng bởi page cache, max bởi nhiễu của máy
+        limit = baseline["p50_ms"] * (1 + args.tolerance)
+        if stats["p50_ms"] > limit:
+            failures.append(
+                f"import main: p50 {stats['p50_ms']:.1f}ms > baseline {baseline['p50_ms']:.1f}ms "
+                f"(+{args.tolerance:.0%})"
+            )
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("\n✅ Không có regression thời gian khởi động")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Số lần đo (mỗi lần một interpreter mới)")
+    parser.add_argument("--top", type=int, default=10, help="Số package tốn thời gian nhất cần in")
+    parser.add_argument("--save", help="Lưu kết quả làm baseline (JSON)")
+    parser.add_argument("--compare", help="So sánh với baseline (JSON), exit 1 nếu có regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Mức tăng cho phép so với baseline")
+    sys.exit(main(parser.parse_args()))
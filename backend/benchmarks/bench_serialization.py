@@ -0,0 +1,129 @@
+"""
+Microbenchmark: chi phí serialize một response (µs/response) cho UserResponse,
+TokenResponse (đăng nhập) và một trang danh sách sản phẩm
+
+So sánh:
+    validate + jsonable_encoder + json   - đường mặc định của FastAPI với JSONResponse
+    validate + jsonable_encoder + orjson - chỉ đổi response class sang ORJSONResponse
+    model_response                       - model đã dựng sẵn, serialize một lần bằng pydantic
+    orjson (BSON document)               - encode document MongoDB thô (ObjectId/datetime) bằng ORJSONResponse
+
+Chạy (không cần MongoDB):
+    cd backend
+    python -m benchmarks.bench_serialization --number 20000
+"""
+import argparse
+import os
+import timeit
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from bson import ObjectId
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from models import UserResponse, UserInDB, TokenResponse, ProductCard, ProductListResponse  # noqa: E402
+from utils import ORJSONResponse, model_response  # noqa: E402
+
+PAGE_SIZE = 24
+
+
+def _user_document() -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "full_name": "Nguyễn Văn A",
+        "email": "nguyenvana@example.com",
+        "date_of_birth": datetime(2000, 1, 1),
+        "gender": "male",
+        "is_admin": False,
+        "created_at": datetime(2024, 1, 1, 8, 30)
+    }
+
+
+def _product_documents() -> list:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Giày chạy bộ {i}",
+            "price": 1_290_000.0 + i,
+            "image": f"/images/products/{i}.jpg",
+            "category": "running",
+            "rating": 4.5,
+            "sold": 1000 + i
+        }
+        for i in range(PAGE_SIZE)
+    ]
+
+
+def _cases() -> Dict[str, Dict[str, Callable[[], bytes]]]:
+    user_doc = _user_document()
+    user = UserResponse(**{**user_doc, "_id": str(user_doc["_id"])})
+    user_in_db = UserInDB(**{**user_doc, "_id": str(user_doc["_id"]), "hashed_password": "$2b$12$" + "x" * 53})
+
+    product_docs = _product_documents()
+    page = ProductListResponse(
+        items=[ProductCard(**{**doc, "_id": str(doc["_id"])}) for doc in product_docs],
+        next_cursor="eyJzIjoibmV3ZXN0In0",
+        has_more=True
+    )
+    raw_page = {"items": product_docs, "next_cursor": "eyJzIjoibmV3ZXN0In0", "has_more": True}
+
+    def classic(model_cls, value, response_cls):
+        # FastAPI validate lại giá trị trả về theo response_model rồi jsonable_encoder
+        return lambda: response_cls(jsonable_encoder(model_cls.model_validate(value))).body
+
+    def login_before():
+        # Trước: model_dump rồi dựng lại TokenResponse (validate lại user) rồi FastAPI validate thêm lần nữa
+        token = TokenResponse(
+            access_token="token", token_type="bearer",
+            user=user_in_db.model_dump(exclude={"hashed_password"})
+        )
+        return JSONResponse(jsonable_encoder(TokenResponse.model_validate(token))).body
+
+    def login_after():
+        public_user = UserResponse.model_construct(
+            **{field: getattr(user_in_db, field) for field in UserResponse.model_fields}
+        )
+        return model_response(
+            TokenResponse.model_construct(access_token="token", token_type="bearer", user=public_user)
+        ).body
+
+    return {
+        "UserResponse": {
+            "validate + jsonable_encoder + json": classic(UserResponse, user, JSONResponse),
+            "validate + jsonable_encoder + orjson": classic(UserResponse, user, ORJSONResponse),
+            "model_response": lambda: model_response(user).body,
+            "orjson (BSON document)": lambda: ORJSONResponse(user_doc).body,
+        },
+        "TokenResponse (login)": {
+            "model_dump + re-validate + json": login_before,
+            "model_construct + model_response": login_after,
+        },
+        f"ProductListResponse ({PAGE_SIZE} items)": {
+            "validate + jsonable_encoder + json": classic(ProductListResponse, page, JSONResponse),
+            "validate + jsonable_encoder + orjson": classic(ProductListResponse, page, ORJSONResponse),
+            "model_response": lambda: model_response(page).body,
+            "orjson (BSON documents)": lambda: ORJSONResponse(raw_page).body,
+        },
+    }
+
+
+def main(number: int):
+    for title, cases in _cases().items():
+        print(f"\n{title}")
+        baseline = None
+        for name, fn in cases.items():
+            fn()  # warm-up
+            seconds = min(timeit.repeat(fn, number=number, repeat=3))
+            per_call = seconds / number * 1_000_000
+            baseline = baseline or per_call
+            print(f"  {name:<40} {per_call:>8.2f} µs/response  ({baseline / per_call:>4.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="Số lần serialize mỗi trường hợp")
+    main(parser.parse_args().number)
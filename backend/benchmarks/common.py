@@ -0,0 +1,131 @@
+"""
+Các hàm tiện ích dùng chung cho benchmark
+"""
+import asyncio
+import json
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Tính percentile theo phương pháp nearest-rank
+
+    Args:
+        samples: Danh sách giá trị đo (không cần sắp xếp)
+        pct: Percentile cần tính (0-100)
+
+    Returns:
+        Giá trị tại percentile, 0.0 nếu không có mẫu
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_ms: List[float], elapsed_s: float) -> Dict[str, float]:
+    """
+    Tổng hợp latency (ms) và throughput của một kịch bản
+
+    Args:
+        latencies_ms: Latency của từng request (ms)
+        elapsed_s: Tổng thời gian chạy kịch bản (giây)
+
+    Returns:
+        Dict chứa count, throughput (req/s), p50, p95, p99, max
+    """
+    return {
+        "count": len(latencies_ms),
+        "throughput": len(latencies_ms) / elapsed_s if elapsed_s > 0 else 0.0,
+        "p50": percentile(latencies_ms, 50),
+        "p95": percentile(latencies_ms, 95),
+        "p99": percentile(latencies_ms, 99),
+        "max": max(latencies_ms) if latencies_ms else 0.0,
+    }
+
+
+def print_summary(title: str, stats: Dict[str, float]):
+    """In kết quả một kịch bản theo định dạng bảng"""
+    print(
+        f"{title:<32} n={stats['count']:<6} "
+        f"{stats['throughput']:>9.1f} req/s  "
+        f"p50={stats['p50']:>8.2f}ms  p95={stats['p95']:>8.2f}ms  "
+        f"p99={stats['p99']:>8.2f}ms  max={stats['max']:>8.2f}ms"
+    )
+
+
+async def run_concurrent(
+    tasks: List[Callable[[], Awaitable[bool]]],
+    concurrency: int
+) -> Tuple[List[float], int, float]:
+    """
+    Chạy danh sách tác vụ với tối đa `concurrency` tác vụ đồng thời
+
+    Args:
+        tasks: Các hàm tạo coroutine, coroutine trả về True nếu request thành công
+        concurrency: Số tác vụ chạy đồng thời tối đa
+
+    Returns:
+        (latency từng tác vụ (ms), số tác vụ lỗi, tổng thời gian (giây))
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def timed(task: Callable[[], Awaitable[bool]]):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            ok = await task()
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(task) for task in tasks))
+    return latencies, errors, time.perf_counter() - start
+
+
+def save_baseline(path: str, results: Dict[str, Any]):
+    """Lưu kết quả benchmark thành file JSON baseline"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def compare_to_baseline(
+    baseline: Dict[str, Dict[str, float]],
+    current: Dict[str, Dict[str, float]],
+    tolerance: float
+) -> List[str]:
+    """
+    So sánh kết quả hiện tại với baseline
+
+    Một kịch bản bị coi là regression nếu throughput giảm, hoặc p95/p99 tăng
+    quá `tolerance` (tỷ lệ, ví dụ 0.2 = 20%), hoặc có thêm request lỗi.
+
+    Args:
+        baseline: {tên kịch bản: stats} từ file baseline
+        current: {tên kịch bản: stats} của lần chạy hiện tại
+        tolerance: Mức chênh lệch cho phép
+
+    Returns:
+        Danh sách mô tả các regression (rỗng nếu không có)
+    """
+    regressions = []
+    for name, base in baseline.items():
+        stats = current.get(name)
+        if stats is None:
+            continue
+        if stats["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {stats['throughput']:.1f} < baseline {base['throughput']:.1f} req/s"
+            )
+        for key in ("p95", "p99"):
+            if stats[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {stats[key]:.2f}ms > baseline {base[key]:.2f}ms")
+        if stats.get("errors", 0) > base.get("errors", 0):
+            regressions.append(f"{name}: {stats['errors']} lỗi (baseline {base.get('errors', 0)})")
+    return regressions
@@ -0,0 +1,76 @@
+"""
+Replica set MongoDB một node chạy tạm cho benchmark (cần binary `mongod`)
+
+Transaction chỉ có trên replica set, còn mongomock chạy tuần tự trên event loop nên
+không có request nào xen vào giữa các bước checkout. Benchmark cần kiểm tra đường
+transaction dưới tải thật dùng fixture này: mongod được chạy với dbpath tạm trên một
+cổng trống, initiate thành replica set `rs0` và bị dừng (xóa dữ liệu) khi xong.
+
+Binary lấy từ biến môi trường MONGOD_BIN, nếu không có thì tìm trong PATH.
+"""
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from pymongo import MongoClient
+
+_REPLICA_SET_NAME = "rs0"
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def replica_set(timeout: float = 30.0) -> Iterator[str]:
+    """
+    Chạy mongod --replSet, initiate và chờ node trở thành primary
+
+    Args:
+        timeout: Số giây tối đa chờ mongod khởi động và bầu primary
+
+    Yields:
+        Connection string tới replica set
+
+    Raises:
+        RuntimeError: Nếu không tìm thấy mongod hoặc replica set không sẵn sàng trong timeout
+    """
+    binary = os.environ.get("MONGOD_BIN") or shutil.which("mongod")
+    if not binary:
+        raise RuntimeError("Không tìm thấy mongod: cài MongoDB Server hoặc đặt MONGOD_BIN")
+
+    port = _free_port()
+    host = f"127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory(prefix="bench-replset-") as dbpath:
+        process = subprocess.Popen(
+            [binary, "--replSet", _REPLICA_SET_NAME, "--bind_ip", "127.0.0.1", "--port", str(port), "--dbpath", dbpath],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.STDOUT
+        )
+        try:
+            client = MongoClient(f"mongodb://{host}/?directConnection=true", serverSelectionTimeoutMS=int(timeout * 1000))
+            try:
+                client.admin.command("replSetInitiate", {"_id": _REPLICA_SET_NAME, "members": [{"_id": 0, "host": host}]})
+                deadline = time.monotonic() + timeout
+                while not client.admin.command("hello").get("isWritablePrimary"):
+                    if process.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError(f"Replica set không có primary sau {timeout}s")
+                    time.sleep(0.2)
+            finally:
+                client.close()
+            print(f"✅ Replica set {_REPLICA_SET_NAME} sẵn sàng tại {host} (pid {process.pid})")
+            yield f"mongodb://{host}/?replicaSet={_REPLICA_SET_NAME}"
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
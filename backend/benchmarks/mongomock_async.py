@@ -0,0 +1,138 @@
+"""
+Adapter async tối thiểu trên mongomock để benchmark chạy không cần mongod
+
+Chỉ bọc những gì service trong dự án dùng tới: method của collection trở thành
+coroutine, `find()` trả cursor hỗ trợ `async for` và `to_list()`. Mọi lệnh chạy
+đồng bộ trên event loop (mongomock không có I/O), nên kết quả đo phản ánh chi phí
+của tầng ứng dụng (routing, validate, bcrypt, JWT, cache) chứ không phải MongoDB.
+
+Yêu cầu: pip install -r requirements-dev.txt
+"""
+from typing import Any, List, Optional
+
+import mongomock
+import mongomock.collection
+from pymongo.errors import OperationFailure
+
+
+def _patch_bulk_sort_kwarg():
+    """pymongo >= 4.11 truyền thêm `sort` cho UpdateOne/ReplaceOne khi bulk_write, mongomock chưa nhận tham số này"""
+    builder = mongomock.collection.BulkOperationBuilder
+    for name in ("add_update", "add_replace"):
+        original = getattr(builder, name)
+        if getattr(original, "_accepts_sort", False):
+            continue
+
+        def patched(self, *args, sort=None, _original=original, **kwargs):
+            return _original(self, *args, **kwargs)
+
+        patched._accepts_sort = True
+        setattr(builder, name, patched)
+
+
+_patch_bulk_sort_kwarg()
+
+
+class AsyncMockCursor:
+    """Cursor async bọc mongomock Cursor (sort/limit/skip trả về chính cursor này)"""
+
+    def __init__(self, cursor: mongomock.collection.Cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def chain(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._cursor else result
+        return chain
+
+    def __aiter__(self):
+        self._iter = iter(self._cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length: Optional[int] = None) -> List[Any]:
+        if length is None:
+            return list(self._cursor)
+        return [doc for _, doc in zip(range(length), self._cursor)]
+
+    async def close(self):
+        self._cursor.close()
+
+
+class AsyncMockCollection:
+    """Collection async bọc mongomock Collection"""
+
+    def __init__(self, collection: mongomock.Collection):
+        self._collection = collection
+
+    @property
+    def name(self) -> str:
+        return self._collection.name
+
+    def find(self, *args, **kwargs) -> AsyncMockCursor:
+        return AsyncMockCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, *args, **kwargs) -> AsyncMockCursor:
+        return AsyncMockCursor(self._collection.aggregate(*args, **kwargs))
+
+    def with_options(self, *args, **kwargs) -> "AsyncMockCollection":
+        # mongomock chỉ có một "server", read preference không có tác dụng
+        return self
+
+    async def watch(self, *args, **kwargs):
+        # Cùng lỗi MongoDB standalone trả về, để service đi đúng nhánh chuyển sang polling
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            return attr(*args, **kwargs)
+        return method
+
+
+class AsyncMockDatabase:
+    """Database async bọc mongomock Database"""
+
+    def __init__(self, database: mongomock.Database):
+        self._database = database
+
+    @property
+    def name(self) -> str:
+        return self._database.name
+
+    def __getitem__(self, name: str) -> AsyncMockCollection:
+        return AsyncMockCollection(self._database[name])
+
+    async def command(self, command, *args, **kwargs):
+        if command == "ping":
+            return {"ok": 1.0}
+        return self._database.command(command, *args, **kwargs)
+
+
+class AsyncMockClient:
+    """Thay thế AsyncMongoClient trong benchmark (dữ liệu nằm trong bộ nhớ của process)"""
+
+    def __init__(self):
+        self._client = mongomock.MongoClient()
+        self.admin = AsyncMockDatabase(self._client["admin"])
+
+    def __getitem__(self, name: str) -> AsyncMockDatabase:
+        return AsyncMockDatabase(self._client[name])
+
+    async def drop_database(self, name: str):
+        self._client.drop_database(name)
+
+    async def close(self):
+        self._client.close()
@@ -0,0 +1,42 @@
+"""
+Job build gợi ý sản phẩm: tính lại ma trận affinity và ghi top-N cho từng user/segment
+
+Chạy định kỳ ngoài process API (ví dụ cron mỗi giờ); API /api/recommendations chỉ
+đọc kết quả đã tính sẵn. Có thể chạy ngay từ API admin POST /api/admin/recommendations/rebuild.
+
+Chạy:
+    cd backend
+    python build_recommendations.py
+"""
+import asyncio
+import sys
+
+from database import db
+from services import (
+    CartService, EventPipeline, OrderService, ProductService, RecommendationBuilder, RecommendationService, UserService
+)
+
+
+async def main() -> int:
+    await db.connect()
+    try:
+        database = db.get_database()
+        builder = RecommendationBuilder(
+            database[RecommendationService.collection_name],
+            database[ProductService.collection_name],
+            database[OrderService.collection_name],
+            database[CartService.collection_name],
+            database[UserService.collection_name],
+            database[EventPipeline.collection_name]
+        )
+        await builder.build()
+    except Exception as e:
+        print(f"❌ Lỗi build gợi ý: {e}")
+        return 1
+    finally:
+        await db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
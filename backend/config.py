@@ -1,16 +1,118 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Literal, Optional
 
 
 class Settings(BaseSettings):
+    # Server Configuration (serve.py)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WORKERS: int = 1
+    GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    # Bearer token bắt buộc khi gọi /metrics (bỏ trống: không yêu cầu, nên chặn /metrics ở proxy)
+    METRICS_TOKEN: Optional[str] = None
+    
     # MongoDB Configuration
     MONGODB_URL: str
     DATABASE_NAME: str = "smart_sport_db"
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 10
+    MONGODB_MAX_IDLE_TIME_MS: int = 300000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 2000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 5000
+    MONGODB_WRITE_CONCERN: str = "majority"
+    MONGODB_SECONDARY_READS: bool = False
+    MONGODB_MAX_STALENESS_SECONDS: Optional[int] = None
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2
+    HEALTH_MAX_STALENESS_SECONDS: float = 15
     
     # JWT Configuration
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    SESSION_MAX_DAYS: int = 30
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    REVOKED_TOKENS_MAX_SIZE: int = 100000
+    
+    # Password Hashing Configuration
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_POOL_KIND: Literal["thread", "process"] = "thread"
+    PASSWORD_POOL_WORKERS: int = 4
+    PASSWORD_POOL_MAX_QUEUE: int = 64
+    PASSWORD_POOL_RETRY_AFTER: int = 1
+    
+    # Login Rate Limiting (cửa sổ trượt theo IP và theo email)
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 300
+    LOGIN_RATE_LIMIT_PER_IP: int = 50
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 10
+    
+    # User Import/Export (admin)
+    USER_IMPORT_CHUNK_SIZE: int = 500
+    USER_IMPORT_HASH_CONCURRENCY: int = 2
+    USER_IMPORT_MAX_ERRORS: int = 1000
+    USER_EXPORT_BATCH_SIZE: int = 1000
+    
+    # Cache Configuration
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: Optional[str] = None
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    
+    # Image Search Configuration
+    PRODUCT_IMAGE_ROOT: str = "../frontend/public"
+    IMAGE_INDEX_DIR: str = "data/image_index"
+    IMAGE_UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024
+    IMAGE_POOL_WORKERS: int = 2
+    IMAGE_POOL_MAX_QUEUE: int = 16
+    
+    # Thumbnail Configuration (ảnh sản phẩm thu nhỏ, cache trên đĩa theo hash nội dung ảnh gốc)
+    THUMBNAIL_CACHE_DIR: str = "data/thumbnails"
+    THUMBNAIL_WIDTHS: List[int] = [160, 320, 640, 960]
+    THUMBNAIL_QUALITY: int = 80
+    THUMBNAIL_POOL_KIND: Literal["thread", "process"] = "process"
+    THUMBNAIL_POOL_WORKERS: int = 2
+    THUMBNAIL_POOL_MAX_QUEUE: int = 32
+    THUMBNAIL_MAX_AGE_SECONDS: int = 7 * 24 * 3600
+    
+    # Product Search Configuration
+    SEARCH_USE_CHANGE_STREAM: bool = True
+    SEARCH_POLL_INTERVAL_SECONDS: float = 30
+    SEARCH_POLL_LAG_SECONDS: float = 5
+    SEARCH_RECONCILE_INTERVAL_SECONDS: float = 300
+    SEARCH_POPULARITY_BOOST: float = 0.1
+    
+    # HTTP Caching (Cache-Control của danh mục, cache response trang danh mục cho khách chưa đăng nhập)
+    CATALOG_MAX_AGE_SECONDS: int = 30
+    CATALOG_CACHE_MAX_SIZE: int = 500
+    CATALOG_CACHE_TTL_SECONDS: int = 60
+    
+    # Cart Configuration
+    CART_MAX_ITEMS: int = 500
+    
+    # Order Configuration (transaction cần replica set, tắt khi chạy MongoDB standalone)
+    ORDER_USE_TRANSACTIONS: bool = True
+    
+    # Recommendation Configuration
+    RECOMMENDATION_TOP_N: int = 20
+    RECOMMENDATION_CACHE_MAX_SIZE: int = 10000
+    RECOMMENDATION_CACHE_TTL_SECONDS: int = 300
+    
+    # Event Ingestion Configuration
+    EVENTS_MAX_QUEUE: int = 10000
+    EVENTS_BATCH_SIZE: int = 500
+    EVENTS_FLUSH_INTERVAL_SECONDS: float = 2.0
+    EVENTS_FOLD_INTERVAL_SECONDS: float = 30.0
+    EVENTS_SAMPLE_THRESHOLD: float = 0.8
+    EVENTS_SAMPLE_RATE: float = 0.1
+    EVENTS_RETENTION_DAYS: int = 90
     
     class Config:
         env_file = ".env"
@@ -22,4 +124,19 @@ def get_settings():
     return Settings()
 
 
-settings = get_settings()
+class _LazySettings:
+    """
+    Proxy tới Settings, chỉ đọc .env và validate ở lần truy cập thuộc tính đầu tiên
+
+    Import `config` (và các module chỉ cần kiểu/hằng số) không phụ thuộc biến môi
+    trường; thiếu biến bắt buộc sẽ báo lỗi tại nơi settings được dùng lần đầu.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+    def __repr__(self) -> str:
+        return repr(get_settings())
+
+
+settings = _LazySettings()
@@ -1,51 +1,295 @@
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
-from typing import Optional
+import asyncio
+import os
+import time
+from datetime import datetime
+from pymongo import AsyncMongoClient, MongoClient, IndexModel
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.database import Database as SyncDatabase
+from pymongo.errors import ConnectionFailure, PyMongoError
+from pymongo.read_preferences import SecondaryPreferred
+from typing import Optional, Dict, Any, List, Callable, Union
 from config import settings
+from utils.metrics import mongo_command_listener
+from utils.lazy import LazyObject
+
+
+# Index do các service khai báo: {tên collection: [hàm trả về danh sách IndexModel, ...]}
+_index_registry: Dict[str, List[Callable[[], List[IndexModel]]]] = {}
+
+
+def register_indexes(collection_name: str, indexes: Union[List[IndexModel], Callable[[], List[IndexModel]]]):
+    """
+    Khai báo index cho một collection, được tạo khi ứng dụng khởi động
+    
+    Args:
+        collection_name: Tên collection
+        indexes: Danh sách IndexModel cần tạo, hoặc hàm trả về danh sách (gọi khi tạo index,
+            dùng khi index phụ thuộc settings để import module không đọc .env)
+    """
+    _index_registry.setdefault(collection_name, []).append(indexes if callable(indexes) else lambda: indexes)
+
+
+def _registered_indexes() -> Dict[str, List[IndexModel]]:
+    """Toàn bộ index đã khai báo theo collection"""
+    return {
+        collection_name: [index for factory in factories for index in factory()]
+        for collection_name, factories in _index_registry.items()
+    }
+
+
+def _client_options() -> Dict[str, Any]:
+    """Các tham số kết nối dùng chung cho client async và sync"""
+    write_concern = settings.MONGODB_WRITE_CONCERN
+    return {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGODB_SOCKET_TIMEOUT_MS,
+        "retryWrites": True,
+        "w": int(write_concern) if write_concern.isdigit() else write_concern,
+        # Ghi nhận số lượng/latency lệnh theo collection, xuất ở /metrics
+        "event_listeners": [mongo_command_listener]
+    }
+
+
+def secondary_preferred(collection: AsyncCollection) -> AsyncCollection:
+    """
+    Collection đọc từ secondary nếu có (fallback về primary), dùng cho các truy vấn
+    chấp nhận dữ liệu trễ vài trăm ms như danh mục sản phẩm hay profile đã cache
+    
+    Chỉ có hiệu lực khi MONGODB_SECONDARY_READS=true; ghi và các lần đọc cần
+    thấy ngay dữ liệu vừa ghi (đăng nhập, giỏ hàng) vẫn dùng primary.
+    
+    Args:
+        collection: Collection gốc
+        
+    Returns:
+        Collection với read preference secondaryPreferred (hoặc chính collection gốc)
+    """
+    if not settings.MONGODB_SECONDARY_READS:
+        return collection
+    return collection.with_options(
+        read_preference=SecondaryPreferred(max_staleness=settings.MONGODB_MAX_STALENESS_SECONDS or -1)
+    )
 
 
 class Database:
-    client: Optional[MongoClient] = None
-    database = None
+    client: Optional[AsyncMongoClient] = None
+    database: Optional[AsyncDatabase] = None
+    sync_client: Optional[MongoClient] = None
+    sync_database: Optional[SyncDatabase] = None
 
-    def connect(self):
-        """Kết nối tới MongoDB với timeout"""
+    def _create_client(self):
+        """Tạo AsyncMongoClient (chưa thực hiện I/O, kết nối được mở khi cần)"""
+        self.client = AsyncMongoClient(settings.MONGODB_URL, **_client_options())
+        self.database = self.client[settings.DATABASE_NAME]
+
+    async def connect(self):
+        """Kết nối tới MongoDB (async) với timeout"""
         if self.client is None:
             try:
-                self.client = MongoClient(
-                    settings.MONGODB_URL,
-                    serverSelectionTimeoutMS=5000,
-                    connectTimeoutMS=5000,
-                    socketTimeoutMS=5000,
-                    retryWrites=True,
-                    w='majority'
-                )
+                self._create_client()
                 # Test kết nối
-                self.client.admin.command('ping')
-                self.database = self.client[settings.DATABASE_NAME]
+                await self.client.admin.command('ping')
                 print(f"✅ Đã kết nối tới MongoDB: {settings.DATABASE_NAME}")
             except ConnectionFailure as e:
                 print(f"❌ Lỗi kết nối MongoDB: {e}")
+                await self.close()
                 raise
 
-    def close(self):
+    async def prewarm(self, connections: int):
+        """
+        Mở sẵn kết nối trong pool trước khi nhận request (tránh request đầu tiên phải chờ handshake/TLS)
+        
+        Các lệnh ping chạy đồng thời nên mỗi lệnh giữ một kết nối riêng.
+        
+        Args:
+            connections: Số kết nối cần mở
+        """
+        if connections <= 0:
+            return
+        try:
+            await asyncio.gather(*(self.client.admin.command('ping') for _ in range(connections)))
+            print(f"✅ Đã mở sẵn {connections} kết nối MongoDB")
+        except PyMongoError as e:
+            print(f"❌ Lỗi mở sẵn kết nối MongoDB: {e}")
+
+    async def ensure_indexes(self):
+        """Tạo các index đã được khai báo qua register_indexes (idempotent)"""
+        database = self.get_database()
+        for collection_name, indexes in _registered_indexes().items():
+            try:
+                names = await database[collection_name].create_indexes(indexes)
+                print(f"✅ Index cho '{collection_name}': {', '.join(names)}")
+            except PyMongoError as e:
+                # Không chặn khởi động (ví dụ dữ liệu cũ vi phạm unique), nhưng cần xử lý thủ công
+                print(f"❌ Lỗi tạo index cho '{collection_name}': {e}")
+
+    async def close(self):
         """Đóng kết nối MongoDB"""
         if self.client:
-            self.client.close()
+            await self.client.close()
             self.client = None
+            self.database = None
             print("Đã đóng kết nối MongoDB")
+        self.close_sync()
 
-    def get_database(self):
-        """Lấy database instance"""
+    def get_database(self) -> AsyncDatabase:
+        """Lấy database instance (async)"""
         if self.database is None:
-            self.connect()
+            self._create_client()
         return self.database
 
+    # ----- Sync fallback cho script / tác vụ offline -----
+
+    def connect_sync(self):
+        """Kết nối tới MongoDB bằng client đồng bộ (dùng cho script, không dùng trong request handler)"""
+        if self.sync_client is None:
+            try:
+                self.sync_client = MongoClient(settings.MONGODB_URL, **_client_options())
+                # Test kết nối
+                self.sync_client.admin.command('ping')
+                self.sync_database = self.sync_client[settings.DATABASE_NAME]
+                print(f"✅ Đã kết nối tới MongoDB (sync): {settings.DATABASE_NAME}")
+            except ConnectionFailure as e:
+                print(f"❌ Lỗi kết nối MongoDB (sync): {e}")
+                self.close_sync()
+                raise
+
+    def ensure_indexes_sync(self):
+        """Tạo các index đã khai báo bằng client đồng bộ (dùng cho script)"""
+        database = self.get_sync_database()
+        for collection_name, indexes in _registered_indexes().items():
+            database[collection_name].create_indexes(indexes)
+
+    def close_sync(self):
+        """Đóng client đồng bộ"""
+        if self.sync_client:
+            self.sync_client.close()
+            self.sync_client = None
+            self.sync_database = None
+
+    def _reset_after_fork(self):
+        """
+        Bỏ client kế thừa từ process cha sau khi fork (pymongo client không fork-safe)
+        
+        Không gọi close(): socket vẫn thuộc về process cha. Worker tạo client mới khi connect.
+        """
+        self.client = None
+        self.database = None
+        self.sync_client = None
+        self.sync_database = None
+
+    def get_sync_database(self) -> SyncDatabase:
+        """Lấy database instance đồng bộ"""
+        if self.sync_database is None:
+            self.connect_sync()
+        return self.sync_database
+
+
+class DatabaseHealthMonitor:
+    """
+    Kiểm tra kết nối MongoDB định kỳ trong background và giữ kết quả gần nhất
+
+    Health probe chỉ đọc kết quả đã cache (không tự gọi database), nên một đợt
+    probe dồn dập không tạo thêm tải cho MongoDB. Kết quả quá cũ (task kiểm tra
+    bị treo) cũng bị coi là chưa sẵn sàng.
+    """
+
+    def __init__(self, database: Database, interval: float, timeout: float, max_staleness: float):
+        self.database = database
+        self.interval = interval
+        self.timeout = timeout
+        self.max_staleness = max_staleness
+        self._task: Optional[asyncio.Task] = None
+        self._ok = False
+        self._latency_ms: Optional[float] = None
+        self._error: Optional[str] = "Chưa kiểm tra kết nối"
+        self._checked_at: Optional[datetime] = None
+        self._checked_monotonic: Optional[float] = None
+
+    async def check(self):
+        """Ping MongoDB một lần và cập nhật kết quả"""
+        start = time.perf_counter()
+        try:
+            if self.database.client is None:
+                raise ConnectionFailure("Chưa kết nối tới MongoDB")
+            await asyncio.wait_for(self.database.client.admin.command('ping'), timeout=self.timeout)
+            ok, error = True, None
+        except asyncio.TimeoutError:
+            ok, error = False, f"Ping quá {self.timeout}s"
+        except Exception as e:
+            ok, error = False, str(e)
+
+        if ok != self._ok:
+            print("✅ MongoDB sẵn sàng" if ok else f"❌ MongoDB không phản hồi: {error}")
+        self._ok = ok
+        self._error = error
+        self._latency_ms = round((time.perf_counter() - start) * 1000, 2) if ok else None
+        self._checked_at = datetime.utcnow()
+        self._checked_monotonic = time.monotonic()
+
+    async def start(self):
+        """Kiểm tra ngay một lần rồi chạy vòng kiểm tra định kỳ"""
+        await self.check()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Dừng vòng kiểm tra"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    @property
+    def ready(self) -> bool:
+        """True nếu lần ping gần nhất thành công và chưa quá cũ"""
+        return (
+            self._ok
+            and self._checked_monotonic is not None
+            and time.monotonic() - self._checked_monotonic <= self.max_staleness
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """Kết quả kiểm tra gần nhất (không truy vấn database)"""
+        return {
+            "ready": self.ready,
+            "latency_ms": self._latency_ms,
+            "checked_at": self._checked_at.isoformat() if self._checked_at else None,
+            "error": self._error if not self._ok else (None if self.ready else "Kết quả kiểm tra đã quá cũ")
+        }
+
 
 # Singleton instance
 db = Database()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=db._reset_after_fork)
+db_health = LazyObject(lambda: DatabaseHealthMonitor(
+    db,
+    interval=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+    timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+    max_staleness=settings.HEALTH_MAX_STALENESS_SECONDS
+))
 
 
-def get_db():
-    """Dependency để lấy database trong FastAPI"""
+def get_db() -> AsyncDatabase:
+    """Dependency để lấy database (async) trong FastAPI"""
     return db.get_database()
+
+
+def get_sync_db() -> SyncDatabase:
+    """Lấy database đồng bộ cho script chạy ngoài event loop"""
+    return db.get_sync_database()
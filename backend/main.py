@@ -1,9 +1,57 @@
-import os
-from fastapi import FastAPI
+import asyncio
+import hmac
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from database import db
-from routes import auth_router
+from typing import Dict
+from config import settings
+from database import db, db_health
+from routes import (
+    auth_router,
+    admin_router,
+    products_router,
+    image_search_router,
+    search_router,
+    cart_router,
+    orders_router,
+    recommendations_router,
+    events_router,
+    images_router
+)
+from utils import (
+    password_pool,
+    token_cache,
+    revoked_tokens,
+    metrics_registry,
+    register_cache_metrics,
+    MetricsMiddleware,
+    CacheControlMiddleware,
+    BodySizeLimitMiddleware,
+    CallbackMetric,
+    CONTENT_TYPE_LATEST,
+    ORJSONResponse
+)
+from services import (
+    ProductService,
+    EventPipeline,
+    image_search_index,
+    search_indexer,
+    event_pipeline,
+    catalog_cache
+)
+from services.user_service import user_cache, login_ip_limiter, login_email_limiter
+from services.image_search_service import image_pool
+from services.recommendation_service import recommendation_cache, recommendation_pool
+from services.thumbnail_service import thumbnail_pool
+
+
+async def _build_image_index():
+    """Load hoặc build image search index (chạy nền khi khởi động)"""
+    try:
+        await image_search_index.load_or_build(db.get_database()[ProductService.collection_name])
+    except Exception as e:
+        # Không chặn khởi động, tìm kiếm theo ảnh sẽ trả kết quả rỗng cho tới khi reindex
+        print(f"❌ Lỗi build image search index: {e}")
 
 
 @asynccontextmanager
@@ -11,13 +59,46 @@ async def lifespan(app: FastAPI):
     """Lifecycle management cho FastAPI app"""
     # Startup
     print("🚀 Đang khởi động Smart Sport Store API...")
-    db.connect()
+    await db.connect()
+    await db.prewarm(settings.MONGODB_MIN_POOL_SIZE)
+    await db.ensure_indexes()
+    await db_health.start()
+    # Build image index ở nền: numpy/Pillow và việc tính embedding không làm chậm lúc sẵn sàng nhận
+    # request, tìm kiếm theo ảnh trả kết quả rỗng cho tới khi build xong. Bỏ qua nếu serve.py
+    # đã build sẵn ở process cha (chỉ process cha ghi file .npy)
+    image_index_task = None
+    if not image_search_index.loaded:
+        image_index_task = asyncio.create_task(_build_image_index())
+    try:
+        await search_indexer.start(db.get_database()[ProductService.collection_name])
+    except Exception as e:
+        print(f"❌ Lỗi build search index: {e}")
+    await event_pipeline.start(
+        db.get_database()[EventPipeline.collection_name],
+        db.get_database()[ProductService.collection_name]
+    )
     
     yield
     
     # Shutdown
     print("👋 Đang tắt Smart Sport Store API...")
-    db.close()
+    # Ghi nốt sự kiện còn trong hàng đợi trước khi đóng MongoDB
+    await event_pipeline.stop()
+    await db_health.stop()
+    if image_index_task is not None:
+        image_index_task.cancel()
+        await asyncio.gather(image_index_task, return_exceptions=True)
+    await search_indexer.stop()
+    password_pool.shutdown()
+    image_pool.shutdown()
+    recommendation_pool.shutdown()
+    thumbnail_pool.shutdown()
+    await user_cache.close()
+    await revoked_tokens.close()
+    await recommendation_cache.close()
+    await login_ip_limiter.close()
+    await login_email_limiter.close()
+    await db.close()
 
 
 # Tạo FastAPI app
@@ -27,7 +108,18 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Endpoint trả về dict/document được encode bằng orjson; endpoint trả về model
+    # dùng model_response (serialize một lần bằng pydantic, không validate lại)
+    default_response_class=ORJSONResponse
+)
+
+# Giới hạn body upload ảnh (cộng phần header/boundary của multipart): từ chối 413 trước
+# khi nhận hết body thay vì sau khi Starlette đã ghi cả file ra đĩa.
+# Thêm trước CORSMiddleware để CORS bọc bên ngoài: response 413 vẫn có header CORS
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits=lambda: {image_search_router.prefix: settings.IMAGE_UPLOAD_MAX_BYTES + 64 * 1024}
 )
 
 # Cấu hình CORS
@@ -39,8 +131,72 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cache-Control cho response GET theo router: danh mục dùng chung (public), dữ liệu
+# của user phải kiểm tra lại bằng ETag mỗi lần (private, no-cache), admin không cache
+def _cache_policies() -> Dict[str, str]:
+    catalog_policy = f"public, max-age={settings.CATALOG_MAX_AGE_SECONDS}"
+    return {
+        products_router.prefix: catalog_policy,
+        search_router.prefix: catalog_policy,
+        auth_router.prefix: "private, no-cache",
+        cart_router.prefix: "private, no-cache",
+        orders_router.prefix: "private, no-cache",
+        recommendations_router.prefix: "private, no-cache",
+        admin_router.prefix: "no-store",
+        # URL thumbnail không đổi khi ảnh gốc đổi, nên chỉ cache có hạn (ETag theo hash nội dung)
+        images_router.prefix: f"public, max-age={settings.THUMBNAIL_MAX_AGE_SECONDS}"
+    }
+
+
+app.add_middleware(CacheControlMiddleware, policies=_cache_policies)
+
+# Đo thời gian xử lý request theo route template (xuất ở /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Sản phẩm thay đổi (kể cả từ worker khác, qua change stream/polling của search index)
+# thì xóa cache trang danh mục; thay đổi chỉ về tồn kho/số đã bán (mỗi đơn hàng) chỉ xóa
+# các trang sort=best_selling
+# (lambda: các singleton chỉ được tạo, và đọc settings, khi dùng lần đầu)
+search_indexer.on_change(lambda product_id, fields: catalog_cache.on_product_change(product_id, fields))
+
+# Số liệu cache và worker pool, đọc tại thời điểm scrape
+register_cache_metrics("token", lambda: token_cache.stats())
+register_cache_metrics("user", lambda: user_cache.stats())
+register_cache_metrics("recommendation", lambda: recommendation_cache.stats())
+register_cache_metrics("catalog", lambda: catalog_cache.stats())
+metrics_registry.register(CallbackMetric(
+    "worker_pool_pending",
+    "Số tác vụ đang chạy hoặc đang chờ trên worker pool",
+    lambda: {
+        ("password",): password_pool.pending,
+        ("image",): image_pool.pending,
+        ("recommendation",): recommendation_pool.pending,
+        ("thumbnail",): thumbnail_pool.pending
+    },
+    labelnames=("pool",)
+))
+metrics_registry.register(CallbackMetric(
+    "mongodb_up",
+    "1 nếu lần ping MongoDB gần nhất thành công",
+    lambda: {(): 1 if db_health.ready else 0}
+))
+metrics_registry.register(CallbackMetric(
+    "event_queue_size",
+    "Số sự kiện hành vi đang chờ ghi",
+    lambda: {(): event_pipeline.size}
+))
+
 # Đăng ký routers
 app.include_router(auth_router)
+app.include_router(admin_router)
+app.include_router(products_router)
+app.include_router(image_search_router)
+app.include_router(search_router)
+app.include_router(cart_router)
+app.include_router(orders_router)
+app.include_router(recommendations_router)
+app.include_router(events_router)
+app.include_router(images_router)
 
 
 @app.get("/")
@@ -56,19 +212,53 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "database": "connected"
-    }
+    """Health check endpoint (theo kết quả ping MongoDB gần nhất, giống /health/ready)"""
+    ready = db_health.ready
+    return ORJSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "healthy" if ready else "unhealthy",
+            "database": "connected" if ready else "disconnected"
+        }
+    )
 
 
-if __name__ == "__main__":
-    import uvicorn
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=False
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe - process còn phục vụ request (không kiểm tra database)"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe - MongoDB phản hồi trong lần ping gần nhất
+    
+    Chỉ đọc kết quả do background task cập nhật mỗi HEALTH_CHECK_INTERVAL_SECONDS,
+    không tự gọi database. Trả 503 khi ping lỗi hoặc kết quả đã quá cũ.
+    """
+    database = db_health.status()
+    return ORJSONResponse(
+        status_code=status.HTTP_200_OK if database["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if database["ready"] else "not_ready", "database": database}
     )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Metrics của process theo Prometheus text format (latency request, lệnh MongoDB, bcrypt, JWT, cache)
+    
+    Khi cấu hình METRICS_TOKEN, request phải gửi header Authorization: Bearer <METRICS_TOKEN>.
+    """
+    if settings.METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+    ):
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"})
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+if __name__ == "__main__":
+    # HOST/PORT/WORKERS lấy từ Settings (Render đặt sẵn biến PORT)
+    from serve import run
+    run(app)
@@ -5,7 +5,54 @@ from .user import (
     UserResponse,
     UserInDB,
     TokenResponse,
-    UserUpdate
+    RefreshTokenRequest,
+    RefreshTokenResponse,
+    CurrentUser,
+    UserUpdate,
+    UserBulkUpdateItem,
+    UserBulkUpdate,
+    BulkUpdateResponse,
+    UserImportError,
+    UserImportResponse
+)
+from .product import (
+    ProductSort,
+    ProductBase,
+    ProductCreate,
+    ProductResponse,
+    ProductCard,
+    ProductQuery,
+    ProductListResponse,
+    ImageSearchResult,
+    ImageSearchResponse,
+    SearchResponse,
+    AutocompleteSuggestion,
+    AutocompleteResponse
+)
+from .cart import (
+    MAX_LINE_QUANTITY,
+    CartItemAdd,
+    CartItemUpdate,
+    CartLine,
+    CartResponse
+)
+from .order import (
+    OrderStatus,
+    CheckoutRequest,
+    OrderLine,
+    OrderResponse,
+    OrderListResponse
+)
+from .recommendation import (
+    RecommendationSource,
+    RecommendationResponse,
+    RecommendationBuildResponse
+)
+from .event import (
+    EventType,
+    ProductEvent,
+    EventBatch,
+    EventIngestResponse
 )
 
 __all__ = [
@@ -15,5 +62,42 @@ __all__ = [
     UserResponse,
     UserInDB,
     TokenResponse,
-    UserUpdate
+    RefreshTokenRequest,
+    RefreshTokenResponse,
+    CurrentUser,
+    UserUpdate,
+    UserBulkUpdateItem,
+    UserBulkUpdate,
+    BulkUpdateResponse,
+    UserImportError,
+    UserImportResponse,
+    ProductSort,
+    ProductBase,
+    ProductCreate,
+    ProductResponse,
+    ProductCard,
+    ProductQuery,
+    ProductListResponse,
+    ImageSearchResult,
+    ImageSearchResponse,
+    SearchResponse,
+    AutocompleteSuggestion,
+    AutocompleteResponse,
+    MAX_LINE_QUANTITY,
+    CartItemAdd,
+    CartItemUpdate,
+    CartLine,
+    CartResponse,
+    OrderStatus,
+    CheckoutRequest,
+    OrderLine,
+    OrderResponse,
+    OrderListResponse,
+    RecommendationSource,
+    RecommendationResponse,
+    RecommendationBuildResponse,
+    EventType,
+    ProductEvent,
+    EventBatch,
+    EventIngestResponse
 ]
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, List
+
+
+# Số lượng tối đa của một sản phẩm trong giỏ (cả khi cộng dồn nhiều lần thêm)
+MAX_LINE_QUANTITY = 99
+
+
+class CartItemAdd(BaseModel):
+    """Model để thêm sản phẩm vào giỏ hàng"""
+    product_id: str = Field(..., description="ID sản phẩm")
+    quantity: int = Field(default=1, ge=1, le=MAX_LINE_QUANTITY, description="Số lượng thêm vào")
+    version: Optional[int] = Field(None, ge=0, description="Version giỏ hàng client đang thấy (bỏ trống để không kiểm tra)")
+
+
+class CartItemUpdate(BaseModel):
+    """Model để đặt lại số lượng một sản phẩm trong giỏ (0 để xóa)"""
+    quantity: int = Field(..., ge=0, le=MAX_LINE_QUANTITY, description="Số lượng mới")
+    version: Optional[int] = Field(None, ge=0, description="Version giỏ hàng client đang thấy (bỏ trống để không kiểm tra)")
+
+
+class CartLine(BaseModel):
+    """Model cho một dòng trong giỏ hàng (đã tính giá theo giá hiện tại)"""
+    product_id: str = Field(..., description="ID sản phẩm")
+    name: Optional[str] = Field(None, description="Tên sản phẩm")
+    image: Optional[str] = Field(None, description="Ảnh sản phẩm")
+    price: float = Field(..., description="Đơn giá hiện tại")
+    quantity: int = Field(..., description="Số lượng")
+    line_total: float = Field(..., description="Thành tiền")
+    available: bool = Field(..., description="Sản phẩm còn được bán hay không")
+
+
+class CartResponse(BaseModel):
+    """Model để trả về giỏ hàng"""
+    items: List[CartLine] = Field(default_factory=list, description="Các dòng trong giỏ")
+    total_quantity: int = Field(default=0, description="Tổng số lượng sản phẩm")
+    subtotal: float = Field(default=0, description="Tạm tính (chỉ gồm sản phẩm còn bán)")
+    version: int = Field(default=0, description="Version giỏ hàng, tăng sau mỗi thay đổi")
+    updated_at: Optional[datetime] = Field(None, description="Lần cập nhật cuối")
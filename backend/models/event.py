@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Literal
+from bson import ObjectId
+
+
+EventType = Literal['view', 'click']
+
+
+class ProductEvent(BaseModel):
+    """Model cho một sự kiện hành vi trên sản phẩm"""
+    type: EventType = Field(..., description="Loại sự kiện (view: xem chi tiết, click: bấm vào sản phẩm trong danh sách)")
+    product_id: str = Field(..., description="ID sản phẩm")
+    source: Optional[str] = Field(None, max_length=50, description="Nơi phát sinh sự kiện (home, search, recommendation...)")
+    
+    @field_validator('product_id')
+    @classmethod
+    def validate_product_id(cls, v: str) -> str:
+        if not ObjectId.is_valid(v):
+            raise ValueError('product_id không hợp lệ')
+        return v
+
+
+class EventBatch(BaseModel):
+    """Model để gửi nhiều sự kiện trong một request"""
+    events: List[ProductEvent] = Field(..., min_length=1, max_length=100, description="Danh sách sự kiện (tối đa 100)")
+
+
+class EventIngestResponse(BaseModel):
+    """Model để trả về kết quả nhận sự kiện"""
+    accepted: int = Field(..., description="Số sự kiện được nhận")
+    dropped: int = Field(..., description="Số sự kiện bị bỏ do hàng đợi đầy (hoặc không được chọn khi lấy mẫu)")
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, List, Literal
+
+
+OrderStatus = Literal['placed', 'cancelled']
+
+
+class CheckoutRequest(BaseModel):
+    """Model để đặt hàng từ giỏ hàng hiện tại"""
+    cart_version: Optional[int] = Field(None, ge=0, description="Version giỏ hàng client đang thấy (bỏ trống để không kiểm tra)")
+
+
+class OrderLine(BaseModel):
+    """Model cho một dòng trong đơn hàng (giá chốt tại thời điểm đặt)"""
+    product_id: str = Field(..., description="ID sản phẩm")
+    name: str = Field(..., description="Tên sản phẩm")
+    image: Optional[str] = Field(None, description="Ảnh sản phẩm")
+    price: float = Field(..., description="Đơn giá")
+    quantity: int = Field(..., description="Số lượng")
+    line_total: float = Field(..., description="Thành tiền")
+
+
+class OrderResponse(BaseModel):
+    """Model để trả về đơn hàng"""
+    id: str = Field(..., alias="_id", description="ID đơn hàng")
+    user_id: str = Field(..., description="ID người đặt")
+    items: List[OrderLine] = Field(..., description="Các dòng trong đơn")
+    total_quantity: int = Field(..., description="Tổng số lượng sản phẩm")
+    total: float = Field(..., description="Tổng tiền")
+    status: OrderStatus = Field(default='placed', description="Trạng thái đơn hàng")
+    created_at: datetime = Field(..., description="Thời điểm đặt hàng")
+    
+    class Config:
+        populate_by_name = True
+
+
+class OrderListResponse(BaseModel):
+    """Model để trả về danh sách đơn hàng của user"""
+    items: List[OrderResponse] = Field(..., description="Đơn hàng, mới nhất trước")
@@ -0,0 +1,97 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, List, Literal
+
+
+ProductSort = Literal['newest', 'price_asc', 'price_desc', 'rating', 'best_selling']
+
+
+class ProductBase(BaseModel):
+    """Base model cho Product"""
+    name: str = Field(..., min_length=1, max_length=200, description="Tên sản phẩm")
+    price: float = Field(..., ge=0, description="Giá bán (VND)")
+    image: str = Field(..., description="Đường dẫn ảnh sản phẩm")
+    category: str = Field(..., min_length=1, max_length=100, description="Danh mục")
+    rating: float = Field(default=0, ge=0, le=5, description="Điểm đánh giá (0-5)")
+    sold: int = Field(default=0, ge=0, description="Số lượng đã bán")
+    stock: int = Field(default=0, ge=0, description="Số lượng tồn kho")
+    description: Optional[str] = Field(None, max_length=5000, description="Mô tả sản phẩm")
+
+
+class ProductCreate(ProductBase):
+    """Model để tạo sản phẩm mới"""
+    pass
+
+
+class ProductResponse(ProductBase):
+    """Model để trả về chi tiết sản phẩm"""
+    id: str = Field(..., alias="_id", description="ID sản phẩm")
+    created_at: datetime = Field(default_factory=datetime.now, description="Ngày tạo sản phẩm")
+    views: int = Field(default=0, description="Số lượt xem (cập nhật định kỳ, có thể trễ vài chục giây)")
+    clicks: int = Field(default=0, description="Số lượt bấm vào sản phẩm")
+    version: int = Field(default=0, description="Version sản phẩm, tăng sau mỗi thay đổi nội dung, giá, tồn kho (dùng cho ETag)")
+    
+    class Config:
+        populate_by_name = True
+
+
+class ProductCard(BaseModel):
+    """Model rút gọn cho danh sách sản phẩm (chỉ các field ProductCard hiển thị)"""
+    id: str = Field(..., alias="_id", description="ID sản phẩm")
+    name: str = Field(..., description="Tên sản phẩm")
+    price: float = Field(..., description="Giá bán (VND)")
+    image: str = Field(..., description="Đường dẫn ảnh sản phẩm")
+    category: str = Field(..., description="Danh mục")
+    rating: float = Field(default=0, description="Điểm đánh giá (0-5)")
+    sold: int = Field(default=0, description="Số lượng đã bán")
+    
+    class Config:
+        populate_by_name = True
+
+
+class ProductQuery(BaseModel):
+    """Model cho tham số lọc/sắp xếp danh sách sản phẩm"""
+    category: Optional[str] = Field(None, description="Lọc theo danh mục")
+    min_price: Optional[float] = Field(None, ge=0, description="Giá tối thiểu")
+    max_price: Optional[float] = Field(None, ge=0, description="Giá tối đa")
+    min_rating: Optional[float] = Field(None, ge=0, le=5, description="Điểm đánh giá tối thiểu")
+    sort: ProductSort = Field(default='newest', description="Cách sắp xếp")
+    limit: int = Field(default=12, ge=1, le=100, description="Số sản phẩm mỗi trang")
+    cursor: Optional[str] = Field(None, description="Cursor trang tiếp theo (lấy từ next_cursor)")
+
+
+class ProductListResponse(BaseModel):
+    """Model để trả về một trang sản phẩm"""
+    items: List[ProductCard] = Field(..., description="Danh sách sản phẩm")
+    next_cursor: Optional[str] = Field(None, description="Cursor để lấy trang tiếp theo")
+    has_more: bool = Field(..., description="Còn sản phẩm ở trang sau hay không")
+
+
+class ImageSearchResult(ProductCard):
+    """Model cho một kết quả tìm kiếm theo ảnh"""
+    score: float = Field(..., description="Độ tương đồng (cosine, càng lớn càng giống)")
+
+
+class ImageSearchResponse(BaseModel):
+    """Model để trả về kết quả tìm kiếm theo ảnh"""
+    items: List[ImageSearchResult] = Field(..., description="Sản phẩm giống nhất, theo độ tương đồng giảm dần")
+
+
+class SearchResponse(BaseModel):
+    """Model để trả về kết quả tìm kiếm sản phẩm"""
+    items: List[ProductCard] = Field(..., description="Sản phẩm khớp, theo mức độ liên quan giảm dần")
+    total: int = Field(..., description="Tổng số sản phẩm khớp")
+
+
+class AutocompleteSuggestion(BaseModel):
+    """Model cho một gợi ý autocomplete"""
+    id: str = Field(..., alias="_id", description="ID sản phẩm")
+    name: str = Field(..., description="Tên sản phẩm")
+    
+    class Config:
+        populate_by_name = True
+
+
+class AutocompleteResponse(BaseModel):
+    """Model để trả về danh sách gợi ý autocomplete"""
+    suggestions: List[AutocompleteSuggestion] = Field(..., description="Gợi ý theo số lượng bán giảm dần")
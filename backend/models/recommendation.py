@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, List, Literal
+from .product import ProductCard
+
+
+RecommendationSource = Literal['user', 'segment', 'popular']
+
+
+class RecommendationResponse(BaseModel):
+    """Model để trả về sản phẩm gợi ý cho user"""
+    items: List[ProductCard] = Field(..., description="Sản phẩm gợi ý, phù hợp nhất trước")
+    source: RecommendationSource = Field(..., description="Nguồn gợi ý (user: theo lịch sử của user, segment: theo nhóm giới tính/độ tuổi, popular: phổ biến chung)")
+    generated_at: Optional[datetime] = Field(None, description="Thời điểm job gợi ý chạy gần nhất")
+
+
+class RecommendationBuildResponse(BaseModel):
+    """Model để trả về kết quả một lần build gợi ý"""
+    users: int = Field(..., description="Số user có gợi ý riêng")
+    segments: int = Field(..., description="Số nhóm (giới tính, độ tuổi) có gợi ý")
+    categories: int = Field(..., description="Số danh mục trong ma trận affinity")
+    products: int = Field(..., description="Số sản phẩm ứng viên")
+    duration_ms: float = Field(..., description="Thời gian build")
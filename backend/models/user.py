@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from datetime import datetime
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 
 
 class UserBase(BaseModel):
@@ -42,6 +42,7 @@ class UserResponse(UserBase):
     id: str = Field(..., alias="_id", description="ID người dùng")
     is_admin: bool = Field(default=False, description="Là admin hay không")
     created_at: datetime = Field(default_factory=datetime.now, description="Ngày tạo tài khoản")
+    version: int = Field(default=0, description="Version profile, tăng sau mỗi lần cập nhật (dùng cho ETag)")
     
     class Config:
         populate_by_name = True
@@ -50,16 +51,37 @@ class UserResponse(UserBase):
 class TokenResponse(BaseModel):
     """Model để trả về token sau khi đăng nhập"""
     access_token: str = Field(..., description="JWT access token")
+    refresh_token: Optional[str] = Field(None, description="Refresh token để lấy access token mới (dùng một lần)")
     token_type: str = Field(default="bearer", description="Loại token")
     user: UserResponse = Field(..., description="Thông tin user")
 
 
+class RefreshTokenRequest(BaseModel):
+    """Model để gửi refresh token"""
+    refresh_token: str = Field(..., min_length=1, max_length=200, description="Refresh token")
+
+
+class RefreshTokenResponse(BaseModel):
+    """Model để trả về cặp token mới sau khi refresh"""
+    access_token: str = Field(..., description="JWT access token mới")
+    refresh_token: str = Field(..., description="Refresh token mới (token cũ không dùng được nữa)")
+    token_type: str = Field(default="bearer", description="Loại token")
+
+
+class CurrentUser(BaseModel):
+    """Model cho user đang đăng nhập (lấy từ claims của access token, không truy vấn database)"""
+    id: str = Field(..., description="ID người dùng (claim sub)")
+    email: EmailStr = Field(..., description="Email người dùng")
+    token: str = Field(..., description="Access token của request")
+
+
 class UserInDB(UserBase):
     """Model cho user trong database (bao gồm hashed password)"""
     id: str = Field(..., alias="_id")
     hashed_password: str = Field(..., description="Mật khẩu đã được mã hóa")
     is_admin: bool = Field(default=False, description="Là admin hay không")
     created_at: datetime = Field(default_factory=datetime.now, description="Ngày tạo tài khoản")
+    version: int = Field(default=0, description="Version profile")
     
     class Config:
         populate_by_name = True
@@ -68,4 +90,37 @@ class UserInDB(UserBase):
 class UserUpdate(BaseModel):
     """Model để cập nhật thông tin user"""
     date_of_birth: Optional[datetime] = Field(None, description="Ngày sinh")
-    gender: Optional[Literal['male', 'female', 'other']] = Field(None, description="Giới tính (male: nam, female: nữ, other: khác)")
\ No newline at end of file
+    gender: Optional[Literal['male', 'female', 'other']] = Field(None, description="Giới tính (male: nam, female: nữ, other: khác)")
+
+
+class UserBulkUpdateItem(UserUpdate):
+    """Một bản cập nhật trong bulk update (xác định user theo email)"""
+    email: EmailStr = Field(..., description="Email của user cần cập nhật")
+
+
+class UserBulkUpdate(BaseModel):
+    """Model để cập nhật thông tin nhiều user cùng lúc"""
+    items: List[UserBulkUpdateItem] = Field(..., min_length=1, max_length=1000, description="Danh sách bản cập nhật")
+
+
+class BulkUpdateResponse(BaseModel):
+    """Model để trả về kết quả bulk update"""
+    matched_count: int = Field(..., description="Số user tìm thấy")
+    modified_count: int = Field(..., description="Số user đã thay đổi")
+    skipped: List[str] = Field(default_factory=list, description="Email bị bỏ qua do không có thông tin cập nhật")
+
+
+class UserImportError(BaseModel):
+    """Lỗi của một dòng khi import user"""
+    row: int = Field(..., description="Số dòng trong file (CSV tính cả dòng header)")
+    email: Optional[str] = Field(None, description="Email của dòng (nếu đọc được)")
+    error: str = Field(..., description="Mô tả lỗi")
+
+
+class UserImportResponse(BaseModel):
+    """Model để trả về kết quả import user"""
+    inserted: int = Field(..., description="Số user đã tạo")
+    failed: int = Field(..., description="Số dòng lỗi")
+    errors: List[UserImportError] = Field(default_factory=list, description="Lỗi theo dòng")
+    errors_truncated: bool = Field(default=False, description="Danh sách lỗi bị cắt bớt (vượt giới hạn)")
+    aborted: Optional[str] = Field(None, description="Lỗi làm dừng import giữa chừng (các dòng đã đếm trong inserted vẫn được ghi)")
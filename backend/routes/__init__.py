@@ -1,3 +1,12 @@
 from .auth import router as auth_router
+from .admin import router as admin_router
+from .products import router as products_router
+from .image_search import router as image_search_router
+from .search import router as search_router
+from .cart import router as cart_router
+from .orders import router as orders_router
+from .recommendations import router as recommendations_router
+from .events import router as events_router
+from .images import router as images_router
 
-__all__ = [auth_router]
\ No newline at end of file
+__all__ = [auth_router, admin_router, products_router, image_search_router, search_router, cart_router, orders_router, recommendations_router, events_router, images_router]
\ No newline at end of file
@@ -0,0 +1,126 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from models import UserBulkUpdate, BulkUpdateResponse, UserImportResponse, RecommendationBuildResponse
+from services import UserService, UserImportAborted, RecommendationBuilder
+from utils import PoolSaturatedError, model_response, iter_ndjson, iter_csv
+from .dependencies import get_user_service, get_recommendation_builder, get_current_admin
+
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["Admin"],
+    dependencies=[Depends(get_current_admin)]
+)
+
+
+@router.patch("/users/bulk-update", response_model=BulkUpdateResponse)
+async def bulk_update_users(
+    update_data: UserBulkUpdate,
+    user_service: UserService = Depends(get_user_service)
+):
+    """
+    API cập nhật thông tin bổ sung cho nhiều user trong một request (dùng cho backfill dữ liệu)
+    
+    Thông tin cần cung cấp:
+    - items: Danh sách (tối đa 1000) bản cập nhật, mỗi bản gồm email và date_of_birth/gender
+    
+    Trả về:
+    - matched_count: Số user tìm thấy
+    - modified_count: Số user đã thay đổi
+    - skipped: Email bị bỏ qua do không có thông tin cập nhật
+    """
+    try:
+        return model_response(await user_service.bulk_update_user_info(update_data.items))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Lỗi khi cập nhật hàng loạt: {str(e)}"
+        )
+
+
+# Content-Type của file export theo định dạng
+_EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@router.post("/users/import", response_model=UserImportResponse)
+async def import_users(
+    request: Request,
+    user_service: UserService = Depends(get_user_service)
+):
+    """
+    API tạo user hàng loạt từ file NDJSON hoặc CSV (dùng khi chuyển dữ liệu khách hàng)
+    
+    Body là nội dung file, được đọc dạng stream (không cần tải hết file vào bộ nhớ):
+    - Content-Type `application/x-ndjson`: mỗi dòng một JSON object
+    - Content-Type `text/csv`: dòng đầu là header, mỗi dòng một user
+    
+    Mỗi dòng gồm các field của đăng ký: full_name, email, password, date_of_birth, gender.
+    Dòng lỗi (sai định dạng, không hợp lệ, email đã tồn tại) được bỏ qua và báo lại theo số dòng.
+    
+    Trả về:
+    - inserted: Số user đã tạo
+    - failed: Số dòng lỗi
+    - errors: Lỗi theo dòng (tối đa USER_IMPORT_MAX_ERRORS lỗi)
+    
+    Nếu import dừng giữa chừng (ví dụ mất kết nối database), trả về 500 với cùng
+    các field và `aborted` là lỗi gây dừng; các user đã đếm trong inserted vẫn được tạo.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        records = iter_csv(request.stream())
+    elif content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json"):
+        records = iter_ndjson(request.stream())
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Chỉ hỗ trợ Content-Type application/x-ndjson hoặc text/csv"
+        )
+    
+    try:
+        return model_response(await user_service.import_users(records))
+    except UserImportAborted as e:
+        # Các chunk trước đã được ghi: trả lại kết quả tới lúc dừng để biết dòng nào cần import lại
+        return model_response(e.response, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Lỗi khi import user: {str(e)}"
+        )
+
+
+@router.get("/users/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Định dạng file"),
+    user_service: UserService = Depends(get_user_service)
+):
+    """
+    API xuất toàn bộ user (không gồm mật khẩu) dạng NDJSON hoặc CSV
+    
+    Response được stream theo từng batch đọc từ cursor MongoDB, mỗi user có
+    cùng các field với UserResponse.
+    """
+    return StreamingResponse(
+        user_service.export_users(format),
+        media_type=_EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+    )
+
+
+@router.post("/recommendations/rebuild", response_model=RecommendationBuildResponse)
+async def rebuild_recommendations(
+    builder: RecommendationBuilder = Depends(get_recommendation_builder)
+):
+    """
+    API chạy lại job build gợi ý sản phẩm ngay (bình thường chạy định kỳ bằng build_recommendations.py)
+    
+    Trả về 503 nếu process đang chạy một lần build khác.
+    """
+    try:
+        return model_response(await builder.build())
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job gợi ý đang chạy, vui lòng thử lại sau",
+            headers={"Retry-After": str(e.retry_after)}
+        )
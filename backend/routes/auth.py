@@ -1,18 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, Any
-from models import UserCreate, UserLogin, TokenResponse, UserResponse, UserUpdate
-from database import get_db
-from services import UserService
-from pymongo.collection import Collection
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import Dict, Any, Optional
+from models import (
+    UserCreate,
+    UserLogin,
+    TokenResponse,
+    RefreshTokenRequest,
+    RefreshTokenResponse,
+    UserResponse,
+    UserUpdate,
+    CurrentUser
+)
+from services import UserService, SessionService
+from utils import (
+    PoolSaturatedError,
+    RateLimitExceeded,
+    RevocationListFull,
+    revoke_access_token,
+    model_response,
+    weak_etag,
+    conditional_response
+)
+from .dependencies import get_user_service, get_session_service, get_current_user
 
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
+_untrusted_proxy_warned = False
 
-def get_user_service(db = Depends(get_db)) -> UserService:
-    """Dependency để lấy UserService"""
-    user_collection = db["user"]
-    return UserService(user_collection)
+
+def _client_ip(request: Request) -> Optional[str]:
+    """
+    IP client dùng cho giới hạn đăng nhập theo IP
+
+    Request có X-Forwarded-For mà IP kết nối không nằm trong chuỗi forward nghĩa là
+    proxy phía trước chưa được tin cậy (FORWARDED_ALLOW_IPS): mọi request đều mang IP
+    của proxy và giới hạn theo IP thành giới hạn chung cho mọi người dùng. Khi đó bỏ
+    giới hạn theo IP (vẫn giới hạn theo email) và cảnh báo một lần.
+    """
+    global _untrusted_proxy_warned
+    if not request.client:
+        return None
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and request.client.host not in (ip.strip() for ip in forwarded.split(",")):
+        if not _untrusted_proxy_warned:
+            _untrusted_proxy_warned = True
+            print(
+                f"⚠️ Nhận X-Forwarded-For từ proxy chưa được tin cậy ({request.client.host}): "
+                "đặt FORWARDED_ALLOW_IPS, tạm bỏ giới hạn đăng nhập theo IP"
+            )
+        return None
+    return request.client.host
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -32,12 +69,18 @@ async def register(
     """
     try:
         user = await user_service.create_user(user_data)
-        return user
+        return model_response(user, status_code=status.HTTP_201_CREATED)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -48,6 +91,7 @@ async def register(
 @router.post("/login", response_model=TokenResponse)
 async def login(
     user_data: UserLogin,
+    request: Request,
     user_service: UserService = Depends(get_user_service)
 ):
     """
@@ -59,18 +103,34 @@ async def login(
     
     Trả về:
     - access_token: JWT token để xác thực các request sau này
+    - refresh_token: Token dùng một lần để lấy access token mới qua /api/auth/refresh
     - token_type: Loại token (bearer)
     - user: Thông tin user đã đăng nhập
+    
+    Quá nhiều lần đăng nhập từ một IP hoặc cho một email trong
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS trả về 429 kèm header Retry-After.
     """
+    client_ip = _client_ip(request)
     try:
-        result = await user_service.login(user_data.email, user_data.password)
-        return TokenResponse(**result)
+        return model_response(await user_service.login(user_data.email, user_data.password, client_ip))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e),
             headers={"WWW-Authenticate": "Bearer"}
         )
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -78,21 +138,68 @@ async def login(
         )
 
 
+@router.post("/refresh", response_model=RefreshTokenResponse)
+async def refresh(
+    body: RefreshTokenRequest,
+    session_service: SessionService = Depends(get_session_service)
+):
+    """
+    API lấy access token mới bằng refresh token (không cần mật khẩu)
+    
+    Refresh token chỉ dùng được một lần: response trả về refresh token mới thay
+    cho token vừa gửi. Gửi lại một refresh token đã dùng sẽ thu hồi cả phiên
+    đăng nhập (phải đăng nhập lại).
+    """
+    try:
+        return model_response(await session_service.refresh(body.refresh_token))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+@router.get("/me", response_model=UserResponse)
+async def get_profile(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    user_service: UserService = Depends(get_user_service)
+):
+    """
+    API lấy thông tin user đang đăng nhập (đọc qua cache profile)
+    
+    Yêu cầu header: Authorization: Bearer <access_token>
+    
+    ETag theo version profile: If-None-Match khớp thì trả 304 (không serialize).
+    """
+    user = await user_service.get_user_by_id(current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy user"
+        )
+    return conditional_response(request, weak_etag("user", user.id, user.version), lambda: model_response(user))
+
+
 @router.patch("/update-profile", response_model=UserResponse)
 async def update_profile(
     update_data: UserUpdate,
+    current_user: CurrentUser = Depends(get_current_user),
     user_service: UserService = Depends(get_user_service)
 ):
     """
-    API cập nhật thông tin bổ sung (giới tính, ngày sinh)
+    API cập nhật thông tin bổ sung (giới tính, ngày sinh) của user đang đăng nhập
+    
+    Yêu cầu header: Authorization: Bearer <access_token>
     
     Thông tin có thể cập nhật:
     - date_of_birth: Ngày sinh (format: YYYY-MM-DD)
     - gender: Giới tính (1: nam, 0: nữ, 2: khác)
     """
     try:
-        user = await user_service.update_user_info(update_data)
-        return user
+        user = await user_service.update_user_info(update_data, current_user.email)
+        return model_response(user)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -103,3 +210,28 @@ async def update_profile(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Lỗi khi cập nhật thông tin: {str(e)}"
         )
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: Optional[RefreshTokenRequest] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    session_service: SessionService = Depends(get_session_service)
+):
+    """
+    API đăng xuất - thu hồi access token hiện tại
+    
+    Yêu cầu header: Authorization: Bearer <access_token>
+    
+    Gửi kèm body {"refresh_token": "..."} để thu hồi luôn phiên đăng nhập.
+    """
+    try:
+        await revoke_access_token(current_user.token)
+    except RevocationListFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    if body is not None:
+        await session_service.revoke(body.refresh_token, user_id=current_user.id)
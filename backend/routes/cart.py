@@ -0,0 +1,112 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from models import CartItemAdd, CartItemUpdate, CartResponse, CurrentUser
+from services import CartService, CartConflictError
+from utils import ORJSONResponse, model_response
+from .dependencies import get_cart_service, get_current_user
+
+
+router = APIRouter(prefix="/api/cart", tags=["Cart"])
+
+
+def _conflict_response(e: CartConflictError) -> ORJSONResponse:
+    """409 kèm giỏ hàng hiện tại để client cập nhật lại giao diện"""
+    return ORJSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": str(e), "cart": e.cart}
+    )
+
+
+@router.get("", response_model=CartResponse)
+async def get_cart(
+    current_user: CurrentUser = Depends(get_current_user),
+    cart_service: CartService = Depends(get_cart_service)
+):
+    """
+    API lấy giỏ hàng của user đang đăng nhập (giá theo giá sản phẩm hiện tại)
+    
+    Yêu cầu header: Authorization: Bearer <access_token>
+    """
+    return model_response(await cart_service.get_cart(current_user.id))
+
+
+@router.post("/items", response_model=CartResponse)
+async def add_item(
+    item: CartItemAdd,
+    current_user: CurrentUser = Depends(get_current_user),
+    cart_service: CartService = Depends(get_cart_service)
+):
+    """
+    API thêm sản phẩm vào giỏ hàng
+    
+    Thông tin cần cung cấp:
+    - product_id: ID sản phẩm
+    - quantity: Số lượng (mặc định 1)
+    - version: (tùy chọn) version giỏ hàng đang hiển thị, trả 409 nếu giỏ đã bị thay đổi ở nơi khác
+    """
+    try:
+        return model_response(await cart_service.add_item(current_user.id, item.product_id, item.quantity, item.version))
+    except CartConflictError as e:
+        return _conflict_response(e)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.patch("/items/{product_id}", response_model=CartResponse)
+async def update_item(
+    product_id: str,
+    item: CartItemUpdate,
+    current_user: CurrentUser = Depends(get_current_user),
+    cart_service: CartService = Depends(get_cart_service)
+):
+    """
+    API đặt lại số lượng một sản phẩm trong giỏ (quantity = 0 để xóa)
+    """
+    try:
+        return model_response(await cart_service.update_item(current_user.id, product_id, item.quantity, item.version))
+    except CartConflictError as e:
+        return _conflict_response(e)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.delete("/items/{product_id}", response_model=CartResponse)
+async def remove_item(
+    product_id: str,
+    version: Optional[int] = Query(None, ge=0, description="Version giỏ hàng đang hiển thị"),
+    current_user: CurrentUser = Depends(get_current_user),
+    cart_service: CartService = Depends(get_cart_service)
+):
+    """
+    API xóa một sản phẩm khỏi giỏ hàng
+    """
+    try:
+        return model_response(await cart_service.remove_item(current_user.id, product_id, version))
+    except CartConflictError as e:
+        return _conflict_response(e)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.delete("", response_model=CartResponse)
+async def clear_cart(
+    version: Optional[int] = Query(None, ge=0, description="Version giỏ hàng đang hiển thị"),
+    current_user: CurrentUser = Depends(get_current_user),
+    cart_service: CartService = Depends(get_cart_service)
+):
+    """
+    API xóa toàn bộ giỏ hàng
+    """
+    try:
+        return model_response(await cart_service.clear_cart(current_user.id, version))
+    except CartConflictError as e:
+        return _conflict_response(e)
@@ -0,0 +1,116 @@
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from typing import Optional
+from models import UserResponse, CurrentUser
+from database import get_db
+from services import (
+    UserService, ProductService, CartService, OrderService, SessionService,
+    RecommendationService, RecommendationBuilder, EventPipeline
+)
+from utils import verify_access_token
+
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def get_session_service(db = Depends(get_db)) -> SessionService:
+    """Dependency để lấy SessionService"""
+    return SessionService(db[SessionService.collection_name])
+
+
+def get_user_service(
+    db = Depends(get_db),
+    session_service: SessionService = Depends(get_session_service)
+) -> UserService:
+    """Dependency để lấy UserService"""
+    user_collection = db[UserService.collection_name]
+    return UserService(user_collection, session_service=session_service)
+
+
+def get_product_service(db = Depends(get_db)) -> ProductService:
+    """Dependency để lấy ProductService"""
+    product_collection = db[ProductService.collection_name]
+    return ProductService(product_collection)
+
+
+def get_cart_service(db = Depends(get_db)) -> CartService:
+    """Dependency để lấy CartService"""
+    return CartService(db[CartService.collection_name], db[ProductService.collection_name])
+
+
+def get_order_service(db = Depends(get_db)) -> OrderService:
+    """Dependency để lấy OrderService"""
+    return OrderService(
+        db[OrderService.collection_name],
+        db[ProductService.collection_name],
+        db[CartService.collection_name]
+    )
+
+
+def get_recommendation_service(db = Depends(get_db)) -> RecommendationService:
+    """Dependency để lấy RecommendationService"""
+    return RecommendationService(db[RecommendationService.collection_name], db[ProductService.collection_name])
+
+
+def get_recommendation_builder(db = Depends(get_db)) -> RecommendationBuilder:
+    """Dependency để lấy RecommendationBuilder (job build gợi ý)"""
+    return RecommendationBuilder(
+        db[RecommendationService.collection_name],
+        db[ProductService.collection_name],
+        db[OrderService.collection_name],
+        db[CartService.collection_name],
+        db[UserService.collection_name],
+        db[EventPipeline.collection_name]
+    )
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> CurrentUser:
+    """
+    Dependency xác thực bearer token (stateless, không truy vấn database)
+    
+    Raises:
+        HTTPException: 401 nếu token không hợp lệ, hết hạn hoặc đã bị thu hồi
+    """
+    payload = await verify_access_token(credentials.credentials) if credentials else None
+    if not payload or not payload.get("sub") or not payload.get("email"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token không hợp lệ hoặc đã hết hạn",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return CurrentUser(id=payload["sub"], email=payload["email"], token=credentials.credentials)
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> Optional[CurrentUser]:
+    """
+    Dependency lấy user từ bearer token nếu có (endpoint cho cả khách ẩn danh)
+    
+    Token thiếu, không hợp lệ hoặc hết hạn đều được coi là ẩn danh (None).
+    """
+    payload = await verify_access_token(credentials.credentials) if credentials else None
+    if not payload or not payload.get("sub") or not payload.get("email"):
+        return None
+    return CurrentUser(id=payload["sub"], email=payload["email"], token=credentials.credentials)
+
+
+async def get_current_admin(
+    current_user: CurrentUser = Depends(get_current_user),
+    user_service: UserService = Depends(get_user_service)
+) -> UserResponse:
+    """
+    Dependency yêu cầu bearer token của một admin (quyền admin được kiểm tra trong database)
+    
+    Raises:
+        HTTPException: 401 nếu token không hợp lệ, 403 nếu user không phải admin
+    """
+    user = await user_service.get_user_by_id(current_user.id)
+    if not user or not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Chỉ admin mới có quyền thực hiện thao tác này"
+        )
+    return user
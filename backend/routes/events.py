@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, status
+from typing import Optional
+from models import EventBatch, EventIngestResponse, CurrentUser
+from services import event_pipeline
+from utils import model_response
+from .dependencies import get_optional_user
+
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+
+@router.post("", response_model=EventIngestResponse, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_events(
+    batch: EventBatch,
+    current_user: Optional[CurrentUser] = Depends(get_optional_user)
+):
+    """
+    API ghi nhận sự kiện hành vi (xem/bấm sản phẩm) cho thống kê và gợi ý
+    
+    Không cần đăng nhập; nếu gửi kèm Authorization: Bearer <access_token>, sự kiện
+    được gắn với user. Sự kiện được ghi ở nền theo batch nên API trả về ngay (202);
+    khi hệ thống quá tải, một phần sự kiện có thể bị bỏ (`dropped`).
+    
+    Thông tin cần cung cấp:
+    - events: Tối đa 100 sự kiện, mỗi sự kiện gồm type (view, click), product_id và source (tùy chọn)
+    """
+    result = event_pipeline.submit(batch.events, current_user.id if current_user else None)
+    return model_response(result, status_code=status.HTTP_202_ACCEPTED)
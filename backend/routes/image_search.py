@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from models import ImageSearchResult, ImageSearchResponse
+from services import ProductService, image_search_index
+from database import get_db
+from config import settings
+from utils import PoolSaturatedError, UploadTooLargeError, check_upload_size, model_response
+from .dependencies import get_product_service, get_current_admin
+
+
+router = APIRouter(prefix="/api/image-search", tags=["Image Search"])
+
+
+@router.post("", response_model=ImageSearchResponse)
+async def search_by_image(
+    file: UploadFile = File(..., description="Ảnh cần tìm sản phẩm tương tự"),
+    k: int = Query(12, ge=1, le=50, description="Số sản phẩm trả về"),
+    product_service: ProductService = Depends(get_product_service)
+):
+    """
+    API tìm sản phẩm tương tự theo ảnh (multipart/form-data, field `file`)
+    
+    Body vượt IMAGE_UPLOAD_MAX_BYTES bị từ chối (413) trước khi nhận hết (xem
+    BodySizeLimitMiddleware). Worker đọc ảnh thẳng từ file Starlette đã spool khi parse
+    form, không copy thêm lần nữa.
+    
+    Trả về:
+    - items: Sản phẩm giống nhất kèm độ tương đồng `score`
+    """
+    try:
+        check_upload_size(file, settings.IMAGE_UPLOAD_MAX_BYTES)
+        matches = await image_search_index.search(file.file, k)
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    scores = dict(matches)
+    products = await product_service.get_product_cards([product_id for product_id, _ in matches])
+    items = [
+        ImageSearchResult(**product.model_dump(by_alias=True), score=scores[product.id])
+        for product in products
+    ]
+    return model_response(ImageSearchResponse(items=items))
+
+
+@router.post("/reindex", dependencies=[Depends(get_current_admin)])
+async def reindex(db = Depends(get_db)):
+    """
+    API cập nhật image index theo danh sách sản phẩm hiện tại (chỉ admin)
+    
+    Chỉ sản phẩm mới hoặc đổi ảnh mới được tính embedding.
+    """
+    try:
+        await image_search_index.load_or_build(db[ProductService.collection_name])
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return {"indexed": image_search_index.size}
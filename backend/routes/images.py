@@ -0,0 +1,53 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+from services import thumbnail_service
+from services.thumbnail_service import THUMBNAIL_FORMATS
+from utils import PoolSaturatedError, conditional_response
+
+
+router = APIRouter(prefix="/api/images", tags=["Images"])
+
+
+@router.get("/thumbnail", response_class=FileResponse)
+async def get_thumbnail(
+    request: Request,
+    src: str = Query(..., max_length=500, description="Ảnh sản phẩm (field `image`, ví dụ /images/image1.jpg)"),
+    w: int = Query(..., description="Chiều rộng (một trong THUMBNAIL_WIDTHS)"),
+    format: Optional[Literal["webp", "jpeg"]] = Query(None, description="Bỏ trống để chọn theo header Accept")
+):
+    """
+    API lấy thumbnail ảnh sản phẩm
+
+    Thumbnail được tạo một lần trên worker pool rồi cache trên đĩa theo hash nội dung
+    ảnh gốc; response gửi thẳng file từ đĩa (FileResponse) kèm ETag theo hash nội dung,
+    nên If-None-Match khớp thì trả 304.
+    """
+    fmt = format or thumbnail_service.negotiate_format(request.headers.get("accept"))
+    try:
+        thumbnail = await thumbnail_service.get_thumbnail(src, w, fmt)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    if thumbnail is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy ảnh"
+        )
+
+    path, name = thumbnail
+    return conditional_response(
+        request,
+        f'"{name}"',
+        lambda: FileResponse(path, media_type=THUMBNAIL_FORMATS[fmt]),
+        # Cùng URL trả WebP hoặc JPEG tùy header Accept
+        headers={"Vary": "Accept"} if format is None else None
+    )
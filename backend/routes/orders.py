@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, status
+from typing import Optional
+from models import CheckoutRequest, OrderResponse, OrderListResponse, CurrentUser
+from services import OrderService, OutOfStockError, CartConflictError
+from utils import ORJSONResponse, model_response
+from .dependencies import get_order_service, get_current_user
+
+
+router = APIRouter(prefix="/api/orders", tags=["Orders"])
+
+
+@router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def checkout(
+    request: Optional[CheckoutRequest] = Body(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
+    current_user: CurrentUser = Depends(get_current_user),
+    order_service: OrderService = Depends(get_order_service)
+):
+    """
+    API đặt hàng toàn bộ giỏ hàng hiện tại
+
+    Tồn kho được trừ cùng lúc với việc tạo đơn và làm trống giỏ; thiếu hàng ở bất kỳ
+    dòng nào thì không có gì thay đổi (409 kèm danh sách product_ids).
+
+    - Header Idempotency-Key: (nên gửi) khóa duy nhất cho lần đặt hàng. Gửi lại cùng khóa
+      (ví dụ sau timeout) trả về đơn đã tạo với status 200 và header Idempotent-Replayed: true
+    - cart_version: (tùy chọn) version giỏ hàng đang hiển thị, trả 409 nếu giỏ đã bị thay đổi
+    """
+    try:
+        order, created = await order_service.checkout(
+            current_user.id,
+            idempotency_key,
+            request.cart_version if request else None
+        )
+    except OutOfStockError as e:
+        return ORJSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": str(e), "product_ids": e.product_ids}
+        )
+    except CartConflictError as e:
+        return ORJSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": str(e), "cart": e.cart}
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    if created:
+        return model_response(order, status_code=status.HTTP_201_CREATED)
+    return model_response(order, headers={"Idempotent-Replayed": "true"})
+
+
+@router.get("", response_model=OrderListResponse)
+async def list_orders(
+    limit: int = Query(20, ge=1, le=100, description="Số đơn hàng tối đa"),
+    current_user: CurrentUser = Depends(get_current_user),
+    order_service: OrderService = Depends(get_order_service)
+):
+    """
+    API lấy các đơn hàng gần nhất của user đang đăng nhập
+    """
+    return model_response(await order_service.list_orders(current_user.id, limit))
+
+
+@router.get("/{order_id}", response_model=OrderResponse)
+async def get_order(
+    order_id: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    order_service: OrderService = Depends(get_order_service)
+):
+    """
+    API lấy chi tiết một đơn hàng của user đang đăng nhập
+    """
+    order = await order_service.get_order(current_user.id, order_id)
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy đơn hàng"
+        )
+    return model_response(order)
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from models import ProductCreate, ProductResponse, ProductQuery, ProductListResponse
+from services import ProductService, catalog_cache
+from utils import model_response, dump_model, weak_etag, content_etag, conditional_response
+from .dependencies import get_product_service, get_current_admin
+
+
+router = APIRouter(prefix="/api/products", tags=["Products"])
+
+
+@router.get("", response_model=ProductListResponse)
+async def list_products(
+    request: Request,
+    query: ProductQuery = Depends(),
+    product_service: ProductService = Depends(get_product_service)
+):
+    """
+    API lấy danh sách sản phẩm (infinite scroll)
+    
+    Tham số:
+    - category, min_price, max_price, min_rating: Bộ lọc
+    - sort: newest | price_asc | price_desc | rating | best_selling
+    - limit: Số sản phẩm mỗi trang (1-100, mặc định 12)
+    - cursor: Giá trị next_cursor của trang trước (bỏ trống để lấy trang đầu)
+    
+    Response có header ETag; gửi lại trong If-None-Match để nhận 304 nếu trang không đổi.
+    Trang của khách chưa đăng nhập được cache trong bộ nhớ tới khi có sản phẩm thay đổi
+    (đơn hàng mới chỉ xóa các trang sort=best_selling).
+    """
+    # Chỉ cache cho khách: request có token không dùng chung response
+    anonymous = "authorization" not in request.headers
+    key = catalog_cache.key(query)
+    cached = catalog_cache.get(key) if anonymous else None
+    if cached is not None:
+        etag, body = cached
+        return conditional_response(request, etag, lambda: Response(content=body, media_type="application/json"))
+    
+    try:
+        generation = catalog_cache.generation(key)
+        page = await product_service.list_products(query)
+        body = dump_model(page)
+        etag = content_etag(body)
+        if anonymous:
+            catalog_cache.set(key, (etag, body), generation)
+        return conditional_response(request, etag, lambda: Response(content=body, media_type="application/json"))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Lỗi khi lấy danh sách sản phẩm: {str(e)}"
+        )
+
+
+@router.get("/{product_id}", response_model=ProductResponse)
+async def get_product(
+    product_id: str,
+    request: Request,
+    product_service: ProductService = Depends(get_product_service)
+):
+    """
+    API lấy chi tiết sản phẩm
+    
+    ETag theo version sản phẩm: If-None-Match khớp thì trả 304 (không serialize).
+    Lượt xem/bấm không làm đổi version nên có thể cũ hơn trong bản client đã cache.
+    """
+    product = await product_service.get_product_by_id(product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy sản phẩm"
+        )
+    return conditional_response(
+        request,
+        weak_etag("product", product.id, product.version),
+        lambda: model_response(product)
+    )
+
+
+@router.post(
+    "",
+    response_model=ProductResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(get_current_admin)]
+)
+async def create_product(
+    product_data: ProductCreate,
+    product_service: ProductService = Depends(get_product_service)
+):
+    """
+    API tạo sản phẩm mới (chỉ admin)
+    
+    Yêu cầu header: Authorization: Bearer <access_token>
+    """
+    try:
+        product = await product_service.create_product(product_data)
+        return model_response(product, status_code=status.HTTP_201_CREATED)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Lỗi khi tạo sản phẩm: {str(e)}"
+        )
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from models import RecommendationResponse, CurrentUser
+from services import UserService, RecommendationService
+from utils import model_response
+from .dependencies import get_user_service, get_recommendation_service, get_current_user
+
+
+router = APIRouter(prefix="/api/recommendations", tags=["Recommendations"])
+
+
+@router.get("", response_model=RecommendationResponse)
+async def get_recommendations(
+    limit: int = Query(12, ge=1, le=50, description="Số sản phẩm gợi ý"),
+    current_user: CurrentUser = Depends(get_current_user),
+    user_service: UserService = Depends(get_user_service),
+    recommendation_service: RecommendationService = Depends(get_recommendation_service)
+):
+    """
+    API lấy sản phẩm gợi ý cho user đang đăng nhập
+
+    Gợi ý được job build tính sẵn theo lịch sử mua/giỏ hàng của user; user chưa có
+    lịch sử nhận gợi ý theo nhóm giới tính/độ tuổi (thông tin từ /update-profile).
+
+    Trả về:
+    - items: Sản phẩm gợi ý (tối đa RECOMMENDATION_TOP_N)
+    - source: user | segment | popular
+    - generated_at: Thời điểm job chạy gần nhất
+    """
+    user = await user_service.get_user_by_id(current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy user"
+        )
+    return model_response(await recommendation_service.get_recommendations(user, limit))
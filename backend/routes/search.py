@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query
+from models import SearchResponse, AutocompleteSuggestion, AutocompleteResponse
+from services import ProductService, search_indexer
+from services.search_service import SUGGESTION_SIZE
+from utils import model_response
+from .dependencies import get_product_service
+
+
+router = APIRouter(prefix="/api/search", tags=["Search"])
+
+
+@router.get("", response_model=SearchResponse)
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200, description="Từ khóa (có hoặc không dấu)"),
+    limit: int = Query(12, ge=1, le=100, description="Số sản phẩm mỗi trang"),
+    offset: int = Query(0, ge=0, le=1000, description="Bỏ qua bao nhiêu kết quả đầu"),
+    product_service: ProductService = Depends(get_product_service)
+):
+    """
+    API tìm kiếm sản phẩm theo tên, danh mục, mô tả
+    
+    Không phân biệt dấu ("giay" khớp "giày"), xếp hạng theo BM25 kết hợp số lượng đã bán.
+    """
+    matches, total = search_indexer.index.search(q, limit, offset)
+    products = await product_service.get_product_cards([product_id for product_id, _ in matches])
+    return model_response(SearchResponse(items=products, total=total))
+
+
+@router.get("/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100, description="Chuỗi người dùng đang gõ"),
+    limit: int = Query(SUGGESTION_SIZE, ge=1, le=SUGGESTION_SIZE, description="Số gợi ý")
+):
+    """
+    API gợi ý sản phẩm khi gõ (trả lời hoàn toàn từ index trong bộ nhớ, không truy vấn database)
+    """
+    suggestions = [
+        AutocompleteSuggestion(id=product_id, name=name)
+        for product_id, name in search_indexer.index.autocomplete(q, limit)
+    ]
+    return model_response(AutocompleteResponse(suggestions=suggestions))
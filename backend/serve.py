@@ -0,0 +1,189 @@
+"""
+Production launcher: chạy nhiều worker uvicorn dùng chung một socket
+
+Process cha import app và build sẵn search index + image index (chỉ đọc) một lần
+rồi fork WORKERS worker, nên module, schema pydantic, index... đã nạp được chia sẻ
+copy-on-write giữa các worker và chỉ process cha ghi file .npy. Mỗi worker tự tạo
+MongoClient trong lifespan (pymongo client không fork-safe, client kế thừa từ
+process cha bị bỏ đi sau khi fork) rồi theo dõi thay đổi sản phẩm từ mốc lúc build.
+
+Các state phải dùng chung giữa worker (danh sách token bị thu hồi, cache user,
+giới hạn đăng nhập) cần CACHE_BACKEND=redis và RATE_LIMIT_BACKEND=redis; với
+backend memory, WORKERS>1 bị từ chối. Cache danh mục, metrics và hàng đợi sự kiện
+được giữ riêng từng worker (mỗi worker tự invalidate theo change stream, metrics có
+label `worker`, mỗi worker tự ghi sự kiện của mình). SIGTERM/SIGINT được chuyển cho các worker:
+worker ngừng nhận kết nối mới, chờ request đang xử lý (tối đa
+GRACEFUL_SHUTDOWN_SECONDS) rồi mới chạy shutdown của lifespan (đóng MongoDB).
+
+Chạy:
+    cd backend
+    WORKERS=4 python serve.py
+"""
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Dict, Tuple
+
+import uvicorn
+
+from config import settings
+
+# Worker thoát sớm hơn khoảng này sau khi khởi động bị coi là lỗi khởi động, chờ trước khi tạo lại
+_RESPAWN_DELAY_SECONDS = 1.0
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    """Mở socket lắng nghe trong process cha để các worker dùng chung"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(app: Any, sock: socket.socket):
+    """Chạy uvicorn trên socket có sẵn (uvicorn tự xử lý SIGTERM/SIGINT: drain rồi chạy shutdown)"""
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        proxy_headers=True,
+        # IP client (dùng cho rate limit đăng nhập) lấy từ X-Forwarded-For chỉ khi proxy nằm trong danh sách này
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _check_shared_state():
+    """Từ chối chạy nhiều worker khi state cần dùng chung vẫn nằm trong bộ nhớ từng process"""
+    memory = [
+        name for name, backend in (
+            ("CACHE_BACKEND", settings.CACHE_BACKEND),
+            ("RATE_LIMIT_BACKEND", settings.RATE_LIMIT_BACKEND)
+        )
+        if backend == "memory"
+    ]
+    if memory:
+        raise SystemExit(
+            f"❌ WORKERS={settings.WORKERS} cần {', '.join(memory)}=redis: với backend memory, token bị thu hồi, "
+            "cache user và giới hạn đăng nhập chỉ có hiệu lực trong từng worker"
+        )
+
+
+async def _build_shared_indexes():
+    """Build search index và image index trong process cha (trước khi fork) để các worker dùng chung"""
+    from database import db
+    from services import ProductService, image_search_index, search_indexer
+    from services.image_search_service import image_pool
+
+    try:
+        await db.connect()
+        products = db.get_database()[ProductService.collection_name]
+        await search_indexer.build(products)
+        await image_search_index.load_or_build(products)
+    except Exception as e:
+        # Không chặn khởi động: worker tự build phần còn thiếu trong lifespan
+        print(f"❌ Lỗi build index trước khi fork: {e}")
+    finally:
+        image_pool.shutdown()
+        await db.close()
+
+
+def _spawn(app: Any, sock: socket.socket, index: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        # Worker: bỏ signal handler của process cha, uvicorn sẽ cài handler riêng
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        # Mỗi lần scrape /metrics chỉ tới một worker: label `worker` (giữ nguyên khi worker được tạo lại)
+        # để series của các worker không ghi đè lên nhau
+        from utils import set_metrics_labels
+        set_metrics_labels(worker=str(index))
+        code = 0
+        try:
+            _serve(app, sock)
+        except BaseException as e:
+            print(f"❌ Worker {os.getpid()} lỗi: {e}", file=sys.stderr)
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Không chạy atexit/finally của process cha trong worker
+            os._exit(code)
+    return pid
+
+
+def run(app: Any = None):
+    """
+    Chạy server với settings.WORKERS worker (1 worker hoặc không hỗ trợ fork: chạy trong process hiện tại)
+
+    Args:
+        app: ASGI app (mặc định import main.app)
+    """
+    if app is None:
+        from main import app
+
+    sock = _bind_socket(settings.HOST, settings.PORT)
+    workers = max(1, settings.WORKERS)
+    if workers == 1 or not hasattr(os, "fork"):
+        _serve(app, sock)
+        return
+
+    _check_shared_state()
+    asyncio.run(_build_shared_indexes())
+
+    # Đưa các object đã nạp ra khỏi GC, tránh GC ghi vào page dùng chung làm mất copy-on-write
+    gc.freeze()
+
+    # pid -> (thời điểm khởi động, số thứ tự worker)
+    children: Dict[int, Tuple[float, int]] = {}
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    print(f"🚀 Khởi động {workers} worker tại http://{settings.HOST}:{settings.PORT} (pid {os.getpid()})")
+    for index in range(workers):
+        children[_spawn(app, sock, index)] = (time.monotonic(), index)
+    if stopping:
+        # Nhận tín hiệu dừng trong lúc đang fork: gửi lại cho cả các worker vừa tạo
+        handle_stop(signal.SIGTERM, None)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        child = children.pop(pid, None)
+        if child is None or stopping:
+            continue
+        started_at, index = child
+
+        # Worker chết ngoài ý muốn: tạo lại (chờ một chút nếu nó chết ngay khi khởi động)
+        print(f"❌ Worker {pid} đã thoát (status {status}), đang tạo lại...")
+        if time.monotonic() - started_at < _RESPAWN_DELAY_SECONDS:
+            time.sleep(_RESPAWN_DELAY_SECONDS)
+        if not stopping:
+            children[_spawn(app, sock, index)] = (time.monotonic(), index)
+
+    sock.close()
+    print("👋 Đã dừng toàn bộ worker")
+
+
+if __name__ == "__main__":
+    run()
@@ -1,3 +1,35 @@
-from .user_service import UserService
+from .session_service import SessionService, RefreshTokenReuseError
+from .user_service import UserService, UserImportAborted
+from .product_service import ProductService, CatalogCache, catalog_cache
+from .image_search_service import ImageSearchIndex, image_search_index
+from .search_service import SearchIndex, SearchIndexer, search_indexer
+from .cart_service import CartService, CartConflictError
+from .order_service import OrderService, OutOfStockError
+from .recommendation_service import RecommendationService, RecommendationBuilder
+from .event_service import EventPipeline, event_pipeline
+from .thumbnail_service import ThumbnailService, thumbnail_service
 
-__all__ = [UserService]
\ No newline at end of file
+__all__ = [
+    SessionService,
+    RefreshTokenReuseError,
+    UserService,
+    UserImportAborted,
+    ProductService,
+    CatalogCache,
+    catalog_cache,
+    ImageSearchIndex,
+    image_search_index,
+    SearchIndex,
+    SearchIndexer,
+    search_indexer,
+    CartService,
+    CartConflictError,
+    OrderService,
+    OutOfStockError,
+    RecommendationService,
+    RecommendationBuilder,
+    EventPipeline,
+    event_pipeline,
+    ThumbnailService,
+    thumbnail_service
+]
\ No newline at end of file
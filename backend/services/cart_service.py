@@ -0,0 +1,316 @@
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from database import register_indexes
+from models import MAX_LINE_QUANTITY, CartLine, CartResponse
+
+
+# Projection cho việc tính giá các dòng trong giỏ
+PRICING_PROJECTION = {"name": 1, "image": 1, "price": 1}
+
+_MAX_ATTEMPTS = 3
+
+
+class CartConflictError(Exception):
+    """Lỗi khi version giỏ hàng client gửi lên không còn khớp (giỏ đã bị thay đổi ở tab/thiết bị khác)"""
+
+    def __init__(self, cart: CartResponse):
+        super().__init__("Giỏ hàng đã được thay đổi, vui lòng tải lại")
+        self.cart = cart
+
+
+class CartService:
+    """
+    Service xử lý giỏ hàng
+
+    Mỗi user có một document giỏ hàng. Mọi thay đổi là một lệnh update atomic
+    ($inc/$push/$set/$pull) và tăng `version`; client có thể gửi version đang thấy
+    để thay đổi chỉ được áp dụng khi giỏ chưa bị sửa ở nơi khác (optimistic concurrency).
+    """
+
+    collection_name = "carts"
+
+    def __init__(self, cart_collection: AsyncCollection, product_collection: AsyncCollection):
+        self.cart_collection = cart_collection
+        self.product_collection = product_collection
+
+    async def get_cart(self, user_id: str) -> CartResponse:
+        """
+        Lấy giỏ hàng của user, giá được tính theo giá sản phẩm hiện tại
+
+        Đọc giỏ và giá mọi dòng trong một round trip: aggregation tách từng dòng của giỏ
+        ($unwind) rồi $lookup sản phẩm theo `_id` (mỗi dòng dùng index `_id`).
+
+        Args:
+            user_id: ID của user
+
+        Returns:
+            CartResponse: Giỏ hàng (rỗng với version 0 nếu chưa có)
+        """
+        cursor = await self.cart_collection.aggregate(self._pricing_pipeline(user_id))
+        rows = await cursor.to_list()
+        if not rows:
+            return CartResponse()
+
+        # Mỗi dòng kết quả là một dòng của giỏ (giỏ rỗng: một dòng không có `items`)
+        cart = {
+            "version": rows[0].get("version", 0),
+            "updated_at": rows[0].get("updated_at"),
+            "items": [row["items"] for row in rows if "items" in row]
+        }
+        products = {row["items"]["product_id"]: row["product"][0] for row in rows if row.get("product")}
+        return self._cart_response(cart, products)
+
+    async def add_item(
+        self,
+        user_id: str,
+        product_id: str,
+        quantity: int,
+        expected_version: Optional[int] = None
+    ) -> CartResponse:
+        """
+        Thêm sản phẩm vào giỏ (cộng dồn số lượng nếu đã có)
+
+        Args:
+            user_id: ID của user
+            product_id: ID sản phẩm
+            quantity: Số lượng thêm vào
+            expected_version: Version client đang thấy (None để không kiểm tra)
+
+        Returns:
+            CartResponse: Giỏ hàng sau khi thêm
+
+        Raises:
+            ValueError: Nếu sản phẩm không tồn tại, giỏ đã đạt số dòng tối đa hoặc
+                số lượng cộng dồn vượt MAX_LINE_QUANTITY
+            CartConflictError: Nếu version không khớp
+        """
+        if not ObjectId.is_valid(product_id) or not await self.product_collection.find_one(
+            {"_id": ObjectId(product_id)}, projection={"_id": 1}
+        ):
+            raise ValueError("Không tìm thấy sản phẩm")
+
+        product_oid = ObjectId(product_id)
+        base_filter = self._base_filter(user_id, expected_version)
+
+        for _ in range(_MAX_ATTEMPTS):
+            now = datetime.utcnow()
+
+            # Sản phẩm đã có trong giỏ: cộng số lượng tại chỗ nếu tổng không vượt MAX_LINE_QUANTITY
+            cart = await self.cart_collection.find_one_and_update(
+                {
+                    **base_filter,
+                    "items": {"$elemMatch": {"product_id": product_oid, "quantity": {"$lte": MAX_LINE_QUANTITY - quantity}}}
+                },
+                {"$inc": {"items.$.quantity": quantity, "version": 1}, "$set": {"updated_at": now}},
+                return_document=ReturnDocument.AFTER
+            )
+            if cart:
+                return await self._price_cart(cart)
+
+            # Chưa có: thêm dòng mới. Điều kiện $ne chặn 2 tab cùng thêm một sản phẩm thành 2 dòng,
+            # điều kiện $exists giới hạn số dòng. Upsert tạo giỏ nếu chưa có (version 0 -> 1).
+            try:
+                cart = await self.cart_collection.find_one_and_update(
+                    {
+                        **base_filter,
+                        "items.product_id": {"$ne": product_oid},
+                        f"items.{settings.CART_MAX_ITEMS - 1}": {"$exists": False}
+                    },
+                    {
+                        "$push": {"items": {"product_id": product_oid, "quantity": quantity, "added_at": now}},
+                        "$inc": {"version": 1},
+                        "$set": {"updated_at": now}
+                    },
+                    upsert=expected_version in (None, 0),
+                    return_document=ReturnDocument.AFTER
+                )
+                if cart:
+                    return await self._price_cart(cart)
+            except DuplicateKeyError:
+                # Giỏ đã tồn tại nhưng không khớp điều kiện
+                pass
+
+            # Tìm nguyên nhân không khớp
+            current = await self.cart_collection.find_one({"user_id": user_id})
+            if expected_version is not None and (current or {}).get("version", 0) != expected_version:
+                raise CartConflictError(await self._price_cart(current))
+            if current is None:
+                continue
+            line = next((item for item in current.get("items", []) if item["product_id"] == product_oid), None)
+            if line is not None:
+                if line["quantity"] + quantity > MAX_LINE_QUANTITY:
+                    raise ValueError(f"Mỗi sản phẩm tối đa {MAX_LINE_QUANTITY} chiếc trong giỏ hàng")
+                # Tab khác vừa thêm cùng sản phẩm, thử lại nhánh cộng số lượng
+                continue
+            if len(current.get("items", [])) >= settings.CART_MAX_ITEMS:
+                raise ValueError(f"Giỏ hàng tối đa {settings.CART_MAX_ITEMS} sản phẩm")
+
+        raise CartConflictError(await self.get_cart(user_id))
+
+    async def update_item(
+        self,
+        user_id: str,
+        product_id: str,
+        quantity: int,
+        expected_version: Optional[int] = None
+    ) -> CartResponse:
+        """
+        Đặt lại số lượng một sản phẩm trong giỏ (quantity = 0 để xóa)
+
+        Raises:
+            ValueError: Nếu sản phẩm không có trong giỏ
+            CartConflictError: Nếu version không khớp
+        """
+        if quantity == 0:
+            return await self.remove_item(user_id, product_id, expected_version)
+        if not ObjectId.is_valid(product_id):
+            raise ValueError("Sản phẩm không có trong giỏ hàng")
+
+        cart = await self.cart_collection.find_one_and_update(
+            {**self._base_filter(user_id, expected_version), "items.product_id": ObjectId(product_id)},
+            {"$set": {"items.$.quantity": quantity, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if cart:
+            return await self._price_cart(cart)
+        raise await self._no_match_error(user_id, expected_version, "Sản phẩm không có trong giỏ hàng")
+
+    async def remove_item(
+        self,
+        user_id: str,
+        product_id: str,
+        expected_version: Optional[int] = None
+    ) -> CartResponse:
+        """
+        Xóa một sản phẩm khỏi giỏ
+
+        Raises:
+            ValueError: Nếu sản phẩm không có trong giỏ
+            CartConflictError: Nếu version không khớp
+        """
+        if not ObjectId.is_valid(product_id):
+            raise ValueError("Sản phẩm không có trong giỏ hàng")
+
+        product_oid = ObjectId(product_id)
+        cart = await self.cart_collection.find_one_and_update(
+            {**self._base_filter(user_id, expected_version), "items.product_id": product_oid},
+            {"$pull": {"items": {"product_id": product_oid}}, "$set": {"updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if cart:
+            return await self._price_cart(cart)
+        raise await self._no_match_error(user_id, expected_version, "Sản phẩm không có trong giỏ hàng")
+
+    async def clear_cart(self, user_id: str, expected_version: Optional[int] = None) -> CartResponse:
+        """
+        Xóa toàn bộ giỏ hàng
+
+        Raises:
+            CartConflictError: Nếu version không khớp
+        """
+        cart = await self.cart_collection.find_one_and_update(
+            self._base_filter(user_id, expected_version),
+            {"$set": {"items": [], "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if cart:
+            return await self._price_cart(cart)
+        if expected_version in (None, 0):
+            # Chưa có giỏ hàng
+            return CartResponse()
+        raise CartConflictError(await self.get_cart(user_id))
+
+    def _base_filter(self, user_id: str, expected_version: Optional[int]) -> Dict[str, Any]:
+        query: Dict[str, Any] = {"user_id": user_id}
+        if expected_version is not None:
+            query["version"] = expected_version
+        return query
+
+    async def _no_match_error(self, user_id: str, expected_version: Optional[int], message: str) -> Exception:
+        """Phân biệt lỗi version (409) với lỗi dữ liệu (400) khi update không khớp document nào"""
+        if expected_version is not None:
+            cart = await self.get_cart(user_id)
+            if cart.version != expected_version:
+                return CartConflictError(cart)
+        return ValueError(message)
+
+    def _pricing_pipeline(self, user_id: str) -> List[Dict[str, Any]]:
+        """Aggregation đọc giỏ của user kèm field tính giá của sản phẩm trên từng dòng"""
+        return [
+            {"$match": {"user_id": user_id}},
+            {"$limit": 1},
+            {"$unwind": {"path": "$items", "preserveNullAndEmptyArrays": True}},
+            {"$lookup": {
+                "from": self.product_collection.name,
+                "localField": "items.product_id",
+                "foreignField": "_id",
+                "as": "product"
+            }},
+            {"$project": {
+                "version": 1,
+                "updated_at": 1,
+                "items": 1,
+                **{f"product.{field}": 1 for field in PRICING_PROJECTION}
+            }}
+        ]
+
+    async def _price_cart(self, cart: Optional[Dict[str, Any]]) -> CartResponse:
+        """
+        Tính giá giỏ hàng vừa được cập nhật bằng một truy vấn $in duy nhất
+
+        Dùng sau các lệnh find_one_and_update (đã trả về giỏ, không $lookup được trong
+        lệnh update), nên thao tác thay đổi giỏ mất hai round trip; đọc giỏ dùng get_cart.
+        """
+        if not cart:
+            return CartResponse()
+
+        items = cart.get("items", [])
+        products = {}
+        if items:
+            cursor = self.product_collection.find(
+                {"_id": {"$in": [item["product_id"] for item in items]}},
+                projection=PRICING_PROJECTION
+            )
+            products = {product["_id"]: product async for product in cursor}
+        return self._cart_response(cart, products)
+
+    def _cart_response(self, cart: Dict[str, Any], products: Dict[ObjectId, Dict[str, Any]]) -> CartResponse:
+        """Tạo CartResponse từ document giỏ và sản phẩm (theo `_id`) của các dòng"""
+        items = cart.get("items", [])
+        lines = []
+        subtotal = 0.0
+        total_quantity = 0
+        for item in items:
+            product = products.get(item["product_id"])
+            price = product["price"] if product else 0.0
+            line_total = price * item["quantity"]
+            lines.append(CartLine(
+                product_id=str(item["product_id"]),
+                name=product.get("name") if product else None,
+                image=product.get("image") if product else None,
+                price=price,
+                quantity=item["quantity"],
+                line_total=line_total,
+                available=product is not None
+            ))
+            if product:
+                subtotal += line_total
+                total_quantity += item["quantity"]
+
+        return CartResponse(
+            items=lines,
+            total_quantity=total_quantity,
+            subtotal=subtotal,
+            version=cart.get("version", 0),
+            updated_at=cart.get("updated_at")
+        )
+
+
+register_indexes(CartService.collection_name, [
+    IndexModel([("user_id", ASCENDING)], unique=True, name="user_id_unique")
+])
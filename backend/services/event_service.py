@@ -0,0 +1,235 @@
+import asyncio
+import math
+import random
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError, PyMongoError
+from config import settings
+from database import register_indexes
+from models import ProductEvent, EventIngestResponse
+from utils.lazy import LazyObject
+from utils.metrics import product_events
+
+
+# Field bộ đếm trên document sản phẩm theo loại sự kiện
+COUNTER_FIELDS = {"view": "views", "click": "clicks"}
+
+_FOLD_BATCH_SIZE = 1000
+
+
+class EventPipeline:
+    """
+    Ghi sự kiện hành vi (xem, bấm sản phẩm) theo kiểu write-behind
+
+    Request chỉ thêm sự kiện vào hàng đợi trong bộ nhớ (không I/O, không bao giờ
+    chờ). Task nền ghi hàng đợi vào collection `events` bằng insert_many khi đủ
+    `batch_size` sự kiện hoặc sau `flush_interval` giây. Bộ đếm views/clicks của
+    từng sản phẩm được cộng dồn trong bộ nhớ và ghi vào document sản phẩm mỗi
+    `fold_interval` giây bằng một bulk_write (mỗi sản phẩm một lệnh $inc), thay vì
+    một lệnh ghi cho mỗi sự kiện.
+
+    Backpressure: khi hàng đợi đầy quá `sample_threshold`, sự kiện chỉ được nhận
+    với xác suất `sample_rate` và mang trọng số nguyên có kỳ vọng 1/sample_rate
+    (bộ đếm và các thống kê cộng theo `weight` không bị lệch); khi hàng đợi đầy
+    hẳn, sự kiện bị bỏ. Số sản phẩm có bộ đếm chưa ghi cũng bị giới hạn bởi
+    `max_queue`: sự kiện của sản phẩm mới bị bỏ khi đã đạt giới hạn, nên gửi
+    product_id ngẫu nhiên không làm bộ nhớ tăng không giới hạn.
+    Sự kiện chưa kịp ghi sẽ mất nếu process bị kill, chấp nhận được với dữ liệu
+    hành vi. Mỗi worker có hàng đợi riêng.
+    """
+
+    collection_name = "events"
+
+    def __init__(
+        self,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        fold_interval: float,
+        sample_threshold: float,
+        sample_rate: float
+    ):
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"EVENTS_SAMPLE_RATE phải nằm trong (0, 1]: {sample_rate}")
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fold_interval = fold_interval
+        self.sample_threshold = sample_threshold
+        self.sample_rate = sample_rate
+        self._queue: Deque[Dict[str, Any]] = deque()
+        # product_id -> {field bộ đếm: số lần}, chưa ghi vào document sản phẩm
+        self._counters: Dict[ObjectId, Dict[str, int]] = {}
+        self._event_collection: Optional[AsyncCollection] = None
+        self._product_collection: Optional[AsyncCollection] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def size(self) -> int:
+        """Số sự kiện đang chờ ghi"""
+        return len(self._queue)
+
+    async def start(self, event_collection: AsyncCollection, product_collection: AsyncCollection):
+        """Chạy các task ghi nền"""
+        self._event_collection = event_collection
+        self._product_collection = product_collection
+        # Tạo trong event loop đang chạy (mỗi worker/lần khởi động một loop riêng)
+        self._batch_ready = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run_flusher()),
+            asyncio.create_task(self._run_folder())
+        ]
+
+    async def stop(self):
+        """Dừng các task nền sau khi ghi nốt sự kiện và bộ đếm còn trong bộ nhớ"""
+        if not self._tasks:
+            return
+        # Không cancel: lệnh ghi đang chạy được hoàn tất thay vì mất cả batch
+        self._stopping.set()
+        self._batch_ready.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, events: Iterable[ProductEvent], user_id: Optional[str] = None) -> EventIngestResponse:
+        """
+        Thêm sự kiện vào hàng đợi (không chờ I/O)
+
+        Args:
+            events: Các sự kiện
+            user_id: ID user đang đăng nhập (None nếu ẩn danh)
+
+        Returns:
+            EventIngestResponse: Số sự kiện được nhận và bị bỏ
+        """
+        now = datetime.utcnow()
+        accepted = dropped = 0
+        for event in events:
+            product_id = ObjectId(event.product_id)
+            if product_id not in self._counters and len(self._counters) >= self.max_queue:
+                # Quá nhiều sản phẩm có bộ đếm chưa ghi (có thể là product_id ngẫu nhiên)
+                weight, outcome = 0, "dropped"
+            else:
+                weight, outcome = self._admit()
+            product_events.inc(type=event.type, outcome=outcome)
+            if not weight:
+                dropped += 1
+                continue
+
+            document = {"type": event.type, "product_id": product_id, "weight": weight, "created_at": now}
+            if user_id:
+                document["user_id"] = user_id
+            if event.source:
+                document["source"] = event.source
+            self._queue.append(document)
+
+            counters = self._counters.setdefault(product_id, {})
+            field = COUNTER_FIELDS[event.type]
+            counters[field] = counters.get(field, 0) + weight
+            accepted += 1
+
+        if self._batch_ready is not None and len(self._queue) >= self.batch_size:
+            self._batch_ready.set()
+        return EventIngestResponse(accepted=accepted, dropped=dropped)
+
+    def _admit(self) -> Tuple[int, str]:
+        """(trọng số, kết quả) cho một sự kiện mới theo độ đầy của hàng đợi; trọng số 0 là bị bỏ"""
+        fill = len(self._queue) / self.max_queue
+        if fill >= 1:
+            return 0, "dropped"
+        if fill >= self.sample_threshold:
+            if random.random() >= self.sample_rate:
+                return 0, "sampled_out"
+            # Làm tròn ngẫu nhiên để kỳ vọng đúng bằng 1/sample_rate (ví dụ 0.3: 3 hoặc 4, trung bình 3.33)
+            scale = 1 / self.sample_rate
+            weight = math.floor(scale)
+            return weight + (random.random() < scale - weight), "accepted"
+        return 1, "accepted"
+
+    async def flush(self):
+        """Ghi các sự kiện đang chờ vào collection events, mỗi lần tối đa batch_size sự kiện"""
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            try:
+                await self._event_collection.insert_many(batch, ordered=False)
+            except PyMongoError as e:
+                # Không đưa lại vào hàng đợi: khi database chậm/lỗi, hàng đợi vẫn có giới hạn
+                for document in batch:
+                    product_events.inc(type=document["type"], outcome="write_failed")
+                print(f"❌ Lỗi ghi {len(batch)} sự kiện: {e}")
+                return
+
+    async def fold(self):
+        """Cộng bộ đếm đã gom vào document sản phẩm (một bulk_write cho mỗi FOLD_BATCH_SIZE sản phẩm)"""
+        counters, self._counters = self._counters, {}
+        items = list(counters.items())
+        for start in range(0, len(items), _FOLD_BATCH_SIZE):
+            chunk = items[start:start + _FOLD_BATCH_SIZE]
+            try:
+                # Không đổi updated_at: lượt xem không phải thay đổi nội dung sản phẩm
+                await self._product_collection.bulk_write(
+                    [UpdateOne({"_id": product_id}, {"$inc": increments}) for product_id, increments in chunk],
+                    ordered=False
+                )
+            except BulkWriteError as e:
+                # Chỉ giữ lại các lệnh lỗi, các lệnh khác đã được ghi
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                self._restore(chunk[i] for i in failed)
+                print(f"❌ Lỗi cộng bộ đếm cho {len(failed)} sản phẩm")
+            except PyMongoError as e:
+                # Giữ lại để cộng ở lần sau
+                self._restore(items[start:])
+                print(f"❌ Lỗi cộng bộ đếm sản phẩm: {e}")
+                return
+
+    def _restore(self, items: Iterable[Tuple[ObjectId, Dict[str, int]]]):
+        for product_id, increments in items:
+            counters = self._counters.setdefault(product_id, {})
+            for field, value in increments.items():
+                counters[field] = counters.get(field, 0) + value
+
+    async def _run_flusher(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+        # Sự kiện được thêm trong lúc lần ghi cuối đang chạy
+        await self.flush()
+
+    async def _run_folder(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.fold_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.fold()
+        await self.fold()
+
+
+event_pipeline = LazyObject(lambda: EventPipeline(
+    max_queue=settings.EVENTS_MAX_QUEUE,
+    batch_size=settings.EVENTS_BATCH_SIZE,
+    flush_interval=settings.EVENTS_FLUSH_INTERVAL_SECONDS,
+    fold_interval=settings.EVENTS_FOLD_INTERVAL_SECONDS,
+    sample_threshold=settings.EVENTS_SAMPLE_THRESHOLD,
+    sample_rate=settings.EVENTS_SAMPLE_RATE
+))
+
+
+register_indexes(EventPipeline.collection_name, lambda: [
+    # Sự kiện cũ được MongoDB tự xóa
+    IndexModel(
+        [("created_at", ASCENDING)],
+        expireAfterSeconds=settings.EVENTS_RETENTION_DAYS * 24 * 3600,
+        name="created_at_ttl"
+    )
+])
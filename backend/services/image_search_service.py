@@ -0,0 +1,202 @@
+import json
+import os
+import tempfile
+from typing import TYPE_CHECKING, BinaryIO, Optional, Dict, List, Tuple, Union
+from pymongo.asynchronous.collection import AsyncCollection
+from config import settings
+from database import secondary_preferred
+from utils import BoundedWorkerPool, LazyObject, safe_join
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy/Pillow (utils.image_embedding) chỉ được import khi index được build hoặc tìm kiếm lần đầu,
+# không làm chậm thời gian khởi động của process
+
+
+# Pool cho các tác vụ ảnh nặng CPU (decode ảnh, tính embedding, tìm kiếm)
+image_pool = LazyObject(lambda: BoundedWorkerPool(
+    kind="thread",
+    max_workers=settings.IMAGE_POOL_WORKERS,
+    max_queue=settings.IMAGE_POOL_MAX_QUEUE
+))
+
+_EMBEDDINGS_FILE = "embeddings.npy"
+_META_FILE = "index_meta.json"
+
+
+class ImageSearchIndex:
+    """
+    Index tìm kiếm sản phẩm theo ảnh
+
+    Embedding của toàn bộ sản phẩm nằm trong một ma trận NumPy (N x D) được lưu
+    thành file .npy và mở bằng memory map, nên các worker dùng chung page cache
+    thay vì mỗi worker giữ một bản copy. Khi build lại, chỉ sản phẩm mới hoặc
+    đổi ảnh mới phải tính embedding.
+    """
+
+    def __init__(self, index_dir: str, image_root: str):
+        self.index_dir = index_dir
+        self.image_root = image_root
+        # (product_ids, embeddings) được thay cùng lúc để request đang tìm kiếm không thấy trạng thái lẫn lộn
+        self._state: Tuple[List[str], Optional["np.ndarray"]] = ([], None)
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        """True nếu index đã được load/build (kể cả khi build sẵn ở process cha trước khi fork)"""
+        return self._loaded
+
+    @property
+    def size(self) -> int:
+        """Số sản phẩm trong index"""
+        return len(self._state[0])
+
+    async def load_or_build(self, product_collection: AsyncCollection):
+        """
+        Đồng bộ index với danh sách sản phẩm trong MongoDB
+
+        Embedding đã có trong file index được dùng lại nếu ảnh của sản phẩm không đổi.
+
+        Args:
+            product_collection: Collection sản phẩm
+        """
+        products = [
+            (str(product["_id"]), product.get("image") or "")
+            async for product in secondary_preferred(product_collection).find({}, projection={"image": 1})
+        ]
+        state, computed = await image_pool.run(self._sync_index, products)
+        self._state = state
+        self._loaded = True
+        print(f"✅ Image search index: {self.size} sản phẩm ({computed} embedding mới)")
+
+    async def search(self, image_data: Union[bytes, str, BinaryIO], k: int) -> List[Tuple[str, float]]:
+        """
+        Tìm k sản phẩm có ảnh giống nhất
+
+        Args:
+            image_data: Nội dung ảnh cần tìm, đường dẫn hoặc file object của ảnh (đọc trên worker;
+                image pool là thread pool nên có thể nhận file object)
+            k: Số kết quả
+
+        Returns:
+            Danh sách (product_id, score) theo score giảm dần
+
+        Raises:
+            ValueError: Nếu ảnh không hợp lệ
+            PoolSaturatedError: Nếu image pool đã đầy
+        """
+        return await image_pool.run(self._search_sync, image_data, k)
+
+    def _search_sync(self, image_data: Union[bytes, str, BinaryIO], k: int) -> List[Tuple[str, float]]:
+        import numpy as np
+        from utils.image_embedding import compute_image_embedding
+
+        query = compute_image_embedding(image_data)
+        product_ids, embeddings = self._state
+        if not product_ids:
+            return []
+
+        # Embedding đã chuẩn hóa L2: cosine similarity = tích vô hướng, tính cho cả ma trận một lần
+        scores = embeddings @ query
+        k = min(k, len(product_ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(product_ids[i], float(scores[i])) for i in top]
+
+    def _sync_index(self, products: List[Tuple[str, str]]) -> Tuple[Tuple[List[str], "np.ndarray"], int]:
+        """Tính embedding cho sản phẩm mới/đổi ảnh, ghi file index và mở lại bằng memory map"""
+        import numpy as np
+        from utils.image_embedding import compute_image_embedding, EMBEDDING_DIM
+
+        existing = self._load_existing()
+
+        product_ids: List[str] = []
+        images: List[str] = []
+        rows: List["np.ndarray"] = []
+        computed = 0
+        for product_id, image in products:
+            row = existing.get((product_id, image))
+            if row is None:
+                data = self._read_image(image)
+                if data is None:
+                    continue
+                try:
+                    row = compute_image_embedding(data)
+                except ValueError:
+                    continue
+                computed += 1
+            product_ids.append(product_id)
+            images.append(image)
+            rows.append(row)
+
+        matrix = np.vstack(rows).astype(np.float32) if rows else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._write_index(matrix, product_ids, images)
+        return (product_ids, self._open_embeddings(matrix)), computed
+
+    def _load_existing(self) -> Dict[Tuple[str, str], "np.ndarray"]:
+        """Đọc index đã lưu, trả về {(product_id, image): embedding}"""
+        import numpy as np
+        from utils.image_embedding import EMBEDDING_DIM, EMBEDDING_VERSION
+
+        try:
+            with open(os.path.join(self.index_dir, _META_FILE), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != EMBEDDING_VERSION or meta.get("dim") != EMBEDDING_DIM:
+                return {}
+            embeddings = np.load(os.path.join(self.index_dir, _EMBEDDINGS_FILE), mmap_mode="r")
+        except (OSError, ValueError):
+            return {}
+
+        items = meta.get("items", [])
+        if len(items) != len(embeddings):
+            return {}
+        return {(item["id"], item["image"]): embeddings[i] for i, item in enumerate(items)}
+
+    def _write_index(self, matrix: "np.ndarray", product_ids: List[str], images: List[str]):
+        """Ghi file index (ghi ra file tạm rồi os.replace để worker khác không đọc phải file dở dang)"""
+        import numpy as np
+        from utils.image_embedding import EMBEDDING_DIM, EMBEDDING_VERSION
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        meta = {
+            "version": EMBEDDING_VERSION,
+            "dim": EMBEDDING_DIM,
+            "items": [{"id": product_id, "image": image} for product_id, image in zip(product_ids, images)]
+        }
+        self._atomic_write(_EMBEDDINGS_FILE, lambda f: np.save(f, matrix))
+        self._atomic_write(_META_FILE, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+
+    def _atomic_write(self, filename: str, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, prefix=f".{filename}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, os.path.join(self.index_dir, filename))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _open_embeddings(self, matrix: "np.ndarray") -> "np.ndarray":
+        """Mở file vừa ghi bằng memory map; dùng ma trận trong bộ nhớ nếu worker khác vừa ghi đè file"""
+        import numpy as np
+
+        embeddings = np.load(os.path.join(self.index_dir, _EMBEDDINGS_FILE), mmap_mode="r")
+        if embeddings.shape != matrix.shape:
+            return matrix
+        return embeddings
+
+    def _read_image(self, image: str) -> Optional[bytes]:
+        """Đọc ảnh sản phẩm từ thư mục PRODUCT_IMAGE_ROOT (bỏ qua ảnh URL ngoài hoặc không tồn tại)"""
+        path = safe_join(self.image_root, image)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+# Singleton instance
+image_search_index = LazyObject(lambda: ImageSearchIndex(settings.IMAGE_INDEX_DIR, settings.PRODUCT_IMAGE_ROOT))
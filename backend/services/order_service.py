@@ -0,0 +1,316 @@
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import DuplicateKeyError
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from config import settings
+from database import register_indexes
+from models import OrderLine, OrderResponse, OrderListResponse
+from .cart_service import CartService, CartConflictError
+from .product_service import catalog_cache
+
+
+# Projection sản phẩm cần để chốt giá đơn hàng
+ORDER_PRODUCT_PROJECTION = {"name": 1, "image": 1, "price": 1}
+
+
+class OutOfStockError(Exception):
+    """Lỗi khi tồn kho không đủ cho một hoặc nhiều dòng trong giỏ hàng"""
+
+    def __init__(self, product_ids: List[str]):
+        super().__init__("Một số sản phẩm trong giỏ hàng không đủ số lượng tồn kho")
+        self.product_ids = product_ids
+
+
+class _StockShortage(Exception):
+    """Dùng nội bộ để hủy transaction khi giữ hàng thất bại"""
+
+
+class OrderService:
+    """
+    Service đặt hàng từ giỏ hàng
+
+    Một lần checkout gồm: tạo đơn hàng, trừ tồn kho cho mọi dòng bằng một lệnh
+    bulk_write với điều kiện `stock >= quantity` ($inc có điều kiện, không bao giờ
+    âm kho) và làm trống giỏ hàng (điều kiện theo version giỏ đã đọc). Cả ba chạy
+    trong một multi-document transaction: nếu một dòng không đủ hàng hoặc giỏ vừa
+    bị sửa ở nơi khác thì không có thay đổi nào được ghi. Transaction xung đột
+    (nhiều người cùng mua một sản phẩm) được driver tự chạy lại.
+
+    `Idempotency-Key`: đơn hàng lưu khóa client gửi kèm, unique index trên
+    (user_id, idempotency_key) bảo đảm client gửi lại (timeout, mất mạng) nhận lại
+    đúng đơn đã tạo thay vì đặt hàng lần hai.
+
+    Transaction cần replica set. Với MongoDB standalone (ORDER_USE_TRANSACTIONS=false),
+    tồn kho được trừ từng dòng bằng $inc có điều kiện và hoàn lại nếu thất bại giữa chừng:
+    vẫn không bán quá tồn kho nhưng các bước không còn atomic với nhau.
+    """
+
+    collection_name = "orders"
+
+    def __init__(
+        self,
+        order_collection: AsyncCollection,
+        product_collection: AsyncCollection,
+        cart_collection: AsyncCollection,
+        use_transactions: Optional[bool] = None
+    ):
+        self.order_collection = order_collection
+        self.product_collection = product_collection
+        self.cart_collection = cart_collection
+        self.use_transactions = settings.ORDER_USE_TRANSACTIONS if use_transactions is None else use_transactions
+
+    async def checkout(
+        self,
+        user_id: str,
+        idempotency_key: Optional[str] = None,
+        expected_version: Optional[int] = None
+    ) -> Tuple[OrderResponse, bool]:
+        """
+        Đặt hàng toàn bộ giỏ hàng của user
+
+        Args:
+            user_id: ID của user
+            idempotency_key: Khóa idempotency client gửi kèm (None nếu không có)
+            expected_version: Version giỏ hàng client đang thấy (None để không kiểm tra)
+
+        Returns:
+            (đơn hàng, True nếu vừa tạo / False nếu là đơn đã tạo trước đó với cùng khóa)
+
+        Raises:
+            ValueError: Nếu giỏ hàng trống hoặc có sản phẩm không còn bán
+            OutOfStockError: Nếu tồn kho không đủ
+            CartConflictError: Nếu giỏ hàng đã bị thay đổi (version không khớp)
+        """
+        if idempotency_key:
+            existing = await self._find_by_key(user_id, idempotency_key)
+            if existing:
+                return existing, False
+
+        try:
+            if self.use_transactions:
+                client = self.order_collection.database.client
+                async with client.start_session() as session:
+                    order = await session.with_transaction(
+                        lambda s: self._place_order(user_id, idempotency_key, expected_version, s),
+                        read_concern=ReadConcern("snapshot"),
+                        write_concern=WriteConcern("majority")
+                    )
+            else:
+                order = await self._place_order(user_id, idempotency_key, expected_version, None)
+        except DuplicateKeyError:
+            # Request đồng thời với cùng Idempotency-Key đã tạo đơn trước (transaction này đã bị hủy)
+            existing = await self._find_by_key(user_id, idempotency_key) if idempotency_key else None
+            if existing is None:
+                raise
+            return existing, False
+        except _StockShortage as e:
+            raise OutOfStockError(await self._short_products(e.args[0]))
+
+        # Số lượng đã bán thay đổi: chỉ trang sắp xếp theo bán chạy không còn đúng thứ tự
+        catalog_cache.invalidate_sales()
+        return order, True
+
+    async def _place_order(
+        self,
+        user_id: str,
+        idempotency_key: Optional[str],
+        expected_version: Optional[int],
+        session: Optional[AsyncClientSession]
+    ) -> OrderResponse:
+        """Tạo đơn, giữ hàng và làm trống giỏ (trong transaction nếu có session)"""
+        cart = await self.cart_collection.find_one({"user_id": user_id}, session=session)
+        version = (cart or {}).get("version", 0)
+        if expected_version is not None and version != expected_version:
+            raise CartConflictError(await self._cart_service().get_cart(user_id))
+        items = (cart or {}).get("items", [])
+        if not items:
+            raise ValueError("Giỏ hàng trống")
+
+        cursor = self.product_collection.find(
+            {"_id": {"$in": [item["product_id"] for item in items]}},
+            projection=ORDER_PRODUCT_PROJECTION,
+            session=session
+        )
+        products = {product["_id"]: product async for product in cursor}
+        missing = [str(item["product_id"]) for item in items if item["product_id"] not in products]
+        if missing:
+            raise ValueError(f"Sản phẩm không còn được bán: {', '.join(missing)}")
+
+        lines = []
+        for item in items:
+            product = products[item["product_id"]]
+            lines.append({
+                "product_id": item["product_id"],
+                "name": product["name"],
+                "image": product.get("image"),
+                "price": product["price"],
+                "quantity": item["quantity"],
+                "line_total": product["price"] * item["quantity"]
+            })
+
+        order = {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "items": lines,
+            "total_quantity": sum(line["quantity"] for line in lines),
+            "total": sum(line["line_total"] for line in lines),
+            "status": "placed",
+            "created_at": datetime.utcnow()
+        }
+        if idempotency_key:
+            order["idempotency_key"] = idempotency_key
+
+        # Ghi đơn trước: trùng Idempotency-Key thì dừng ngay, chưa trừ kho
+        await self.order_collection.insert_one(order, session=session)
+
+        if session is not None:
+            await self._reserve_stock(items, session)
+            await self._clear_cart(user_id, version, session)
+        else:
+            reserved = await self._reserve_stock_without_transaction(items, order["_id"])
+            try:
+                await self._clear_cart(user_id, version, None)
+            except Exception:
+                await self._release_stock(reserved)
+                await self.order_collection.delete_one({"_id": order["_id"]})
+                raise
+
+        return _to_response(order)
+
+    async def _reserve_stock(self, items: List[Dict[str, Any]], session: AsyncClientSession):
+        """Trừ tồn kho mọi dòng bằng một bulk_write; dòng nào không đủ hàng thì hủy cả transaction"""
+        result = await self.product_collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": item["product_id"], "stock": {"$gte": item["quantity"]}},
+                    _stock_update(item["quantity"])
+                )
+                for item in items
+            ],
+            ordered=False,
+            session=session
+        )
+        if result.matched_count != len(items):
+            raise _StockShortage(items)
+
+    async def _reserve_stock_without_transaction(
+        self,
+        items: List[Dict[str, Any]],
+        order_id: ObjectId
+    ) -> List[Dict[str, Any]]:
+        """Trừ tồn kho từng dòng, hoàn lại các dòng đã trừ và xóa đơn nếu một dòng không đủ hàng"""
+        reserved = []
+        for item in items:
+            result = await self.product_collection.update_one(
+                {"_id": item["product_id"], "stock": {"$gte": item["quantity"]}},
+                _stock_update(item["quantity"])
+            )
+            if not result.matched_count:
+                await self._release_stock(reserved)
+                await self.order_collection.delete_one({"_id": order_id})
+                raise _StockShortage(items)
+            reserved.append(item)
+        return reserved
+
+    async def _release_stock(self, items: List[Dict[str, Any]]):
+        """Hoàn lại tồn kho đã trừ (chỉ dùng khi không có transaction)"""
+        if items:
+            await self.product_collection.bulk_write(
+                [
+                    UpdateOne({"_id": item["product_id"]}, _stock_update(-item["quantity"]))
+                    for item in items
+                ],
+                ordered=False
+            )
+
+    async def _clear_cart(self, user_id: str, version: int, session: Optional[AsyncClientSession]):
+        """Làm trống giỏ nếu giỏ chưa bị sửa kể từ lúc đọc"""
+        result = await self.cart_collection.update_one(
+            {"user_id": user_id, "version": version},
+            {"$set": {"items": [], "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+            session=session
+        )
+        if not result.matched_count:
+            raise CartConflictError(await self._cart_service().get_cart(user_id))
+
+    async def _short_products(self, items: List[Dict[str, Any]]) -> List[str]:
+        """Các sản phẩm hiện không đủ tồn kho cho số lượng trong giỏ"""
+        wanted = {item["product_id"]: item["quantity"] for item in items}
+        cursor = self.product_collection.find({"_id": {"$in": list(wanted)}}, projection={"stock": 1})
+        stock = {product["_id"]: product.get("stock", 0) async for product in cursor}
+        return [str(product_id) for product_id, quantity in wanted.items() if stock.get(product_id, 0) < quantity]
+
+    def _cart_service(self) -> CartService:
+        return CartService(self.cart_collection, self.product_collection)
+
+    async def _find_by_key(self, user_id: str, idempotency_key: str) -> Optional[OrderResponse]:
+        order = await self.order_collection.find_one({"user_id": user_id, "idempotency_key": idempotency_key})
+        return _to_response(order) if order else None
+
+    async def get_order(self, user_id: str, order_id: str) -> Optional[OrderResponse]:
+        """
+        Lấy một đơn hàng của user
+
+        Returns:
+            OrderResponse hoặc None nếu không tìm thấy (hoặc không thuộc user)
+        """
+        if not ObjectId.is_valid(order_id):
+            return None
+        order = await self.order_collection.find_one({"_id": ObjectId(order_id), "user_id": user_id})
+        return _to_response(order) if order else None
+
+    async def list_orders(self, user_id: str, limit: int) -> OrderListResponse:
+        """
+        Lấy các đơn hàng gần nhất của user
+
+        Args:
+            user_id: ID của user
+            limit: Số đơn tối đa
+
+        Returns:
+            OrderListResponse: Đơn hàng, mới nhất trước
+        """
+        cursor = self.order_collection.find({"user_id": user_id}).sort("created_at", DESCENDING).limit(limit)
+        return OrderListResponse(items=[_to_response(order) async for order in cursor])
+
+
+def _stock_update(quantity: int) -> Dict[str, Any]:
+    """
+    Lệnh trừ `quantity` tồn kho (số âm để hoàn lại), cộng vào `sold`
+
+    Tăng version và updated_at để ETag của sản phẩm và search index nhận thay đổi.
+    """
+    return {
+        "$inc": {"stock": -quantity, "sold": quantity, "version": 1},
+        "$set": {"updated_at": datetime.utcnow()}
+    }
+
+
+def _to_response(order: Dict[str, Any]) -> OrderResponse:
+    return OrderResponse(
+        _id=str(order["_id"]),
+        user_id=order["user_id"],
+        items=[OrderLine(**{**line, "product_id": str(line["product_id"])}) for line in order["items"]],
+        total_quantity=order["total_quantity"],
+        total=order["total"],
+        status=order["status"],
+        created_at=order["created_at"]
+    )
+
+
+register_indexes(OrderService.collection_name, [
+    # Danh sách đơn của user, mới nhất trước
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+    # Chỉ đơn có Idempotency-Key tham gia ràng buộc unique
+    IndexModel(
+        [("user_id", ASCENDING), ("idempotency_key", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"idempotency_key": {"$type": "string"}},
+        name="user_idempotency_key_unique"
+    )
+])
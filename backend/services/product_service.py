@@ -0,0 +1,317 @@
+from datetime import datetime
+from typing import AbstractSet, Optional, Dict, Any, List, Tuple
+import orjson
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.asynchronous.collection import AsyncCollection
+from config import settings
+from database import register_indexes, secondary_preferred
+from models import ProductCreate, ProductResponse, ProductCard, ProductQuery, ProductListResponse
+from utils import LazyObject, TTLCache, encode_cursor, decode_cursor
+
+
+# Cách sắp xếp -> (field, hướng). "newest" chỉ dùng _id vì ObjectId tăng theo thời gian tạo
+SORT_SPECS: Dict[str, Tuple[Optional[str], int]] = {
+    "newest": (None, DESCENDING),
+    "price_asc": ("price", ASCENDING),
+    "price_desc": ("price", DESCENDING),
+    "rating": ("rating", DESCENDING),
+    "best_selling": ("sold", DESCENDING),
+}
+
+# Projection chỉ lấy các field ProductCard hiển thị
+CARD_PROJECTION = {
+    "name": 1,
+    "price": 1,
+    "image": 1,
+    "category": 1,
+    "rating": 1,
+    "sold": 1
+}
+
+
+# Field mà thay đổi không làm đổi trang danh mục: tồn kho và mô tả không hiển thị trên thẻ
+# sản phẩm, version/updated_at là dữ liệu quản lý, views/clicks chỉ là bộ đếm sự kiện
+_CATALOG_IGNORED_FIELDS = frozenset({"stock", "description", "version", "updated_at", "views", "clicks"})
+
+# Tiền tố khóa của trang sắp xếp theo số lượng đã bán
+_SALES_KEY_PREFIX = "sold:"
+
+
+class CatalogCache:
+    """
+    Cache response trang danh mục (ETag, body JSON) theo query đã chuẩn hóa
+
+    Một trang phụ thuộc nhiều sản phẩm nên thay đổi nội dung sản phẩm xóa toàn bộ cache.
+    Trang sắp xếp theo số lượng đã bán được giữ riêng và là phần duy nhất bị xóa khi
+    chỉ `sold`/tồn kho thay đổi (mỗi đơn hàng); ở các trang khác, số đã bán trên thẻ
+    sản phẩm có thể cũ tối đa CATALOG_CACHE_TTL_SECONDS.
+    Mỗi phần có `generation` riêng, tăng sau mỗi lần xóa: trang được đọc từ database
+    trước lần xóa không được ghi vào cache (tránh lưu lại dữ liệu cũ khi đang đọc thì có thay đổi).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        # [các trang khác, trang sắp xếp theo số lượng đã bán]
+        self._caches = (TTLCache(maxsize=maxsize, ttl=ttl), TTLCache(maxsize=maxsize, ttl=ttl))
+        self._generations = [0, 0]
+
+    @staticmethod
+    def key(query: ProductQuery) -> str:
+        """Khóa theo tham số đã parse (giá trị mặc định được điền, thứ tự tham số không ảnh hưởng)"""
+        key = orjson.dumps(query.model_dump(exclude_none=True), option=orjson.OPT_SORT_KEYS).decode()
+        return _SALES_KEY_PREFIX + key if SORT_SPECS[query.sort][0] == "sold" else key
+
+    @staticmethod
+    def _part(key: str) -> int:
+        return 1 if key.startswith(_SALES_KEY_PREFIX) else 0
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        return self._caches[self._part(key)].get(key)
+
+    def generation(self, key: str) -> int:
+        """Generation hiện tại của phần cache chứa khóa (đọc trước khi truy vấn database)"""
+        return self._generations[self._part(key)]
+
+    def set(self, key: str, value: Tuple[str, bytes], generation: int):
+        part = self._part(key)
+        if generation == self._generations[part]:
+            self._caches[part].set(key, value)
+
+    def invalidate(self, *_: Any):
+        """Xóa toàn bộ cache (nhận và bỏ qua tham số để dùng làm callback)"""
+        self._clear(0)
+        self._clear(1)
+
+    def invalidate_sales(self):
+        """Xóa các trang sắp xếp theo số lượng đã bán (sau khi đặt hàng)"""
+        self._clear(1)
+
+    def on_product_change(self, product_id: str, fields: Optional[AbstractSet[str]]):
+        """
+        Callback của search indexer khi một sản phẩm thay đổi
+
+        Args:
+            product_id: ID sản phẩm
+            fields: Các field đã đổi (None nếu không rõ: thêm, xóa, thay cả document)
+        """
+        if fields is None:
+            self.invalidate()
+            return
+        changed = fields - _CATALOG_IGNORED_FIELDS
+        if changed - {"sold"}:
+            self.invalidate()
+        elif changed:
+            self.invalidate_sales()
+
+    def _clear(self, part: int):
+        self._generations[part] += 1
+        self._caches[part].clear()
+
+    def stats(self) -> Dict[str, int]:
+        stats = [cache.stats() for cache in self._caches]
+        return {name: sum(part[name] for part in stats) for name in stats[0]}
+
+
+# Cache trang danh mục cho khách chưa đăng nhập, riêng cho từng worker
+catalog_cache = LazyObject(lambda: CatalogCache(
+    maxsize=settings.CATALOG_CACHE_MAX_SIZE,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS
+))
+
+
+class ProductService:
+    """Service xử lý các logic liên quan đến Product"""
+    
+    collection_name = "products"
+    
+    def __init__(self, product_collection: AsyncCollection):
+        self.product_collection = product_collection
+        # Đọc danh mục chấp nhận trễ replication, được phép đọc từ secondary
+        self.read_collection = secondary_preferred(product_collection)
+    
+    async def create_product(self, product_data: ProductCreate) -> ProductResponse:
+        """
+        Tạo sản phẩm mới
+        
+        Args:
+            product_data: Dữ liệu sản phẩm
+            
+        Returns:
+            ProductResponse: Sản phẩm đã được tạo
+        """
+        product_dict = product_data.model_dump()
+        product_dict["created_at"] = product_dict["updated_at"] = datetime.utcnow()
+        product_dict["version"] = 1
+        
+        result = await self.product_collection.insert_one(product_dict)
+        product_dict["_id"] = str(result.inserted_id)
+        catalog_cache.invalidate()
+        
+        return ProductResponse(**product_dict)
+    
+    async def get_product_by_id(self, product_id: str) -> Optional[ProductResponse]:
+        """
+        Lấy chi tiết sản phẩm theo ID
+        
+        Args:
+            product_id: ID của sản phẩm
+            
+        Returns:
+            ProductResponse: Sản phẩm hoặc None nếu không tìm thấy
+        """
+        if not ObjectId.is_valid(product_id):
+            return None
+        
+        product = await self.read_collection.find_one({"_id": ObjectId(product_id)})
+        if not product:
+            return None
+        
+        product["_id"] = str(product["_id"])
+        return ProductResponse(**product)
+    
+    async def get_product_cards(self, product_ids: List[str]) -> List[ProductCard]:
+        """
+        Lấy nhiều sản phẩm (dạng card) trong một truy vấn $in, giữ nguyên thứ tự product_ids
+        
+        Args:
+            product_ids: Danh sách ID sản phẩm
+            
+        Returns:
+            List[ProductCard]: Sản phẩm tìm thấy (ID không tồn tại bị bỏ qua)
+        """
+        object_ids = [ObjectId(product_id) for product_id in product_ids if ObjectId.is_valid(product_id)]
+        if not object_ids:
+            return []
+        
+        cursor = self.read_collection.find({"_id": {"$in": object_ids}}, projection=CARD_PROJECTION)
+        products = {}
+        async for product in cursor:
+            product["_id"] = str(product["_id"])
+            products[product["_id"]] = ProductCard(**product)
+        
+        return [products[product_id] for product_id in product_ids if product_id in products]
+    
+    async def list_products(self, query: ProductQuery) -> ProductListResponse:
+        """
+        Lấy một trang sản phẩm theo keyset pagination trên (sort key, _id)
+        
+        Trang tiếp theo bắt đầu ngay sau phần tử cuối của trang trước nhờ điều kiện
+        trên index, nên chi phí mỗi trang không tăng theo độ sâu (khác với skip/limit).
+        
+        Args:
+            query: Tham số lọc, sắp xếp và phân trang
+            
+        Returns:
+            ProductListResponse: Danh sách sản phẩm và cursor trang tiếp theo
+            
+        Raises:
+            ValueError: Nếu cursor không hợp lệ hoặc khoảng giá không hợp lệ
+        """
+        if query.min_price is not None and query.max_price is not None and query.min_price > query.max_price:
+            raise ValueError("Giá tối thiểu không được lớn hơn giá tối đa")
+        
+        field, direction = SORT_SPECS[query.sort]
+        
+        conditions = _build_filters(query)
+        if query.cursor:
+            conditions.append(_keyset_condition(query.cursor, query.sort, field, direction))
+        
+        mongo_filter: Dict[str, Any] = {}
+        if len(conditions) == 1:
+            mongo_filter = conditions[0]
+        elif conditions:
+            mongo_filter = {"$and": conditions}
+        
+        sort = [(field, direction), ("_id", direction)] if field else [("_id", direction)]
+        
+        # Lấy dư một phần tử để biết còn trang sau hay không
+        cursor = self.read_collection.find(
+            mongo_filter,
+            projection=CARD_PROJECTION,
+            sort=sort,
+            limit=query.limit + 1
+        )
+        products = await cursor.to_list()
+        
+        has_more = len(products) > query.limit
+        products = products[:query.limit]
+        
+        next_cursor = None
+        if has_more:
+            last = products[-1]
+            next_cursor = encode_cursor({
+                "s": query.sort,
+                "v": last.get(field) if field else None,
+                "id": str(last["_id"])
+            })
+        
+        items = []
+        for product in products:
+            product["_id"] = str(product["_id"])
+            items.append(ProductCard(**product))
+        
+        return ProductListResponse(items=items, next_cursor=next_cursor, has_more=has_more)
+
+
+def _build_filters(query: ProductQuery) -> List[Dict[str, Any]]:
+    """Chuyển tham số lọc thành các điều kiện MongoDB"""
+    conditions = []
+    if query.category:
+        conditions.append({"category": query.category})
+    
+    price_range = {}
+    if query.min_price is not None:
+        price_range["$gte"] = query.min_price
+    if query.max_price is not None:
+        price_range["$lte"] = query.max_price
+    if price_range:
+        conditions.append({"price": price_range})
+    
+    if query.min_rating is not None:
+        conditions.append({"rating": {"$gte": query.min_rating}})
+    return conditions
+
+
+def _keyset_condition(cursor: str, sort: str, field: Optional[str], direction: int) -> Dict[str, Any]:
+    """
+    Điều kiện "đứng sau phần tử cuối trang trước" theo thứ tự (field, _id)
+    
+    Raises:
+        ValueError: Nếu cursor không hợp lệ hoặc thuộc cách sắp xếp khác
+    """
+    data = decode_cursor(cursor)
+    if data.get("s") != sort or not ObjectId.is_valid(data.get("id", "")):
+        raise ValueError("Cursor không hợp lệ")
+    
+    last_id = ObjectId(data["id"])
+    op = "$lt" if direction == DESCENDING else "$gt"
+    if not field:
+        return {"_id": {op: last_id}}
+    
+    last_value = data.get("v")
+    return {"$or": [
+        {field: {op: last_value}},
+        {field: last_value, "_id": {op: last_id}}
+    ]}
+
+
+def _product_indexes() -> List[IndexModel]:
+    """Compound index cho từng cách sắp xếp, có và không có lọc theo danh mục (equality trước sort)"""
+    indexes = [
+        IndexModel([("category", ASCENDING), ("_id", DESCENDING)], name="category_newest"),
+        # Cho việc đồng bộ incremental (search index polling theo updated_at)
+        IndexModel([("updated_at", ASCENDING)], name="updated_at")
+    ]
+    for sort, (field, direction) in SORT_SPECS.items():
+        # price_desc dùng chung index với price_asc (duyệt ngược)
+        if field is None or sort == "price_desc":
+            continue
+        indexes.append(IndexModel([(field, direction), ("_id", direction)], name=f"{field}_id"))
+        indexes.append(IndexModel(
+            [("category", ASCENDING), (field, direction), ("_id", direction)],
+            name=f"category_{field}_id"
+        ))
+    return indexes
+
+
+register_indexes(ProductService.collection_name, _product_indexes())
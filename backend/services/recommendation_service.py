@@ -0,0 +1,378 @@
+import time
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import DESCENDING, ReplaceOne
+from pymongo.asynchronous.collection import AsyncCollection
+from config import settings
+from database import secondary_preferred
+from models import RecommendationResponse, RecommendationBuildResponse, UserResponse
+from utils import BoundedWorkerPool, LazyObject, ReadThroughCache, create_cache_backend
+from .product_service import ProductService
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy chỉ được import khi job build chạy, không làm chậm thời gian khởi động của API
+
+# Trọng số tín hiệu sở thích của user với danh mục
+ORDER_WEIGHT = 3.0  # mỗi sản phẩm đã mua (theo số lượng)
+CART_WEIGHT = 1.0   # mỗi sản phẩm đang nằm trong giỏ
+CLICK_WEIGHT = 0.5  # mỗi lần bấm vào sản phẩm
+VIEW_WEIGHT = 0.2   # mỗi lần xem chi tiết sản phẩm
+# Số lượt xem/bấm tối đa được tính cho một cặp user/sản phẩm (tải lại trang nhiều lần không lấn át đơn hàng)
+MAX_EVENTS_PER_PRODUCT = 5
+# Số tín hiệu "ảo" lấy từ nhóm cha khi làm mượt: user ít tín hiệu được kéo về sở thích của
+# segment, segment ít user được kéo về sở thích chung
+PRIOR_STRENGTH = 5.0
+
+# Nhóm tuổi: (tuổi nhỏ hơn, tên nhóm); None là nhóm cuối
+AGE_BUCKETS: Tuple[Tuple[Optional[int], str], ...] = (
+    (18, "under_18"),
+    (25, "18_24"),
+    (35, "25_34"),
+    (45, "35_44"),
+    (None, "45_plus"),
+)
+
+POPULAR_KEY = "popular"
+_USER_BATCH_SIZE = 2048
+_WRITE_BATCH_SIZE = 1000
+
+# Một lần build tại một thời điểm trên mỗi process
+recommendation_pool = BoundedWorkerPool(kind="thread", max_workers=1, max_queue=0, retry_after=30)
+
+# Gợi ý đã ghép thông tin sản phẩm, theo user (khóa: "<user_id>:<segment>")
+recommendation_cache = LazyObject(lambda: ReadThroughCache(create_cache_backend(
+    namespace="recommendation",
+    maxsize=settings.RECOMMENDATION_CACHE_MAX_SIZE,
+    ttl=settings.RECOMMENDATION_CACHE_TTL_SECONDS,
+    dumps=lambda response: response.model_dump_json(by_alias=True),
+    loads=RecommendationResponse.model_validate_json
+)))
+
+
+def segment_key(gender: Optional[str], date_of_birth: Optional[datetime], today: date) -> str:
+    """
+    Segment của user theo giới tính và nhóm tuổi (thông tin bổ sung từ /update-profile)
+
+    Returns:
+        Ví dụ "female:25_34", "unknown:unknown" nếu chưa có thông tin
+    """
+    age_bucket = "unknown"
+    if date_of_birth is not None:
+        age = today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+        age_bucket = next(name for limit, name in AGE_BUCKETS if limit is None or age < limit)
+    return f"{gender or 'unknown'}:{age_bucket}"
+
+
+class RecommendationService:
+    """
+    Service đọc gợi ý sản phẩm đã được job build tính sẵn
+
+    Mỗi request là một truy vấn `_id $in` lấy cùng lúc danh sách của user, của
+    segment và danh sách phổ biến (dùng danh sách đầu tiên có), rồi một truy vấn
+    `$in` lấy thông tin sản phẩm. Kết quả được cache theo user nên phần lớn
+    request chỉ là một lần đọc cache.
+    """
+
+    collection_name = "recommendations"
+
+    def __init__(
+        self,
+        recommendation_collection: AsyncCollection,
+        product_collection: AsyncCollection,
+        cache: ReadThroughCache = recommendation_cache
+    ):
+        # Gợi ý được tính lại định kỳ, chấp nhận trễ replication
+        self.recommendation_collection = secondary_preferred(recommendation_collection)
+        self.product_service = ProductService(product_collection)
+        self.cache = cache
+
+    async def get_recommendations(self, user: UserResponse, limit: int) -> RecommendationResponse:
+        """
+        Lấy sản phẩm gợi ý cho user
+
+        Args:
+            user: Profile của user (giới tính, ngày sinh dùng để chọn segment)
+            limit: Số sản phẩm tối đa
+
+        Returns:
+            RecommendationResponse: Gợi ý riêng của user, nếu chưa có thì theo segment, cuối cùng là phổ biến chung
+        """
+        segment = segment_key(user.gender, user.date_of_birth, date.today())
+        response = await self.cache.get_or_load(f"{user.id}:{segment}", lambda: self._load(user.id, segment))
+        return response.model_copy(update={"items": response.items[:limit]})
+
+    async def _load(self, user_id: str, segment: str) -> RecommendationResponse:
+        keys = [f"user:{user_id}", f"segment:{segment}", POPULAR_KEY]
+        documents = {
+            document["_id"]: document
+            async for document in self.recommendation_collection.find({"_id": {"$in": keys}})
+        }
+        for key, source in zip(keys, ("user", "segment", "popular")):
+            document = documents.get(key)
+            # Danh sách rỗng (ví dụ user đã mua hết ứng viên) không được che các danh sách dự phòng
+            if document and document["product_ids"]:
+                items = await self.product_service.get_product_cards([str(product_id) for product_id in document["product_ids"]])
+                return RecommendationResponse(items=items, source=source, generated_at=document["generated_at"])
+
+        # Job chưa chạy lần nào: sản phẩm bán chạy nhất
+        cursor = self.product_service.read_collection.find({}, projection={"_id": 1}).sort(
+            [("sold", DESCENDING), ("_id", DESCENDING)]
+        ).limit(settings.RECOMMENDATION_TOP_N)
+        product_ids = [str(product["_id"]) async for product in cursor]
+        return RecommendationResponse(items=await self.product_service.get_product_cards(product_ids), source="popular")
+
+
+class RecommendationBuilder:
+    """
+    Job offline tính sẵn gợi ý sản phẩm (chạy định kỳ bằng build_recommendations.py hoặc API admin)
+
+    1. Ma trận affinity user x danh mục (NumPy) từ đơn hàng (ORDER_WEIGHT mỗi sản
+       phẩm đã mua), giỏ hàng (CART_WEIGHT mỗi sản phẩm đang trong giỏ) và lượt
+       xem/bấm sản phẩm của user đã đăng nhập (collection `events`).
+    2. Sở thích của mỗi segment (giới tính x nhóm tuổi) là tổng các hàng của user
+       thuộc segment, làm mượt về sở thích chung; sở thích của user được làm mượt
+       về segment của mình (user mới chỉ có vài tín hiệu vẫn có gợi ý hợp lý).
+    3. Điểm sản phẩm = sở thích với danh mục / (thứ hạng phổ biến trong danh mục + 1, theo đã bán rồi lượt xem):
+       danh mục được chia chỗ theo mức độ yêu thích thay vì chiếm hết danh sách.
+       Sản phẩm user đã mua bị loại, danh sách được bù bằng các ứng viên tiếp theo.
+
+    Kết quả ghi vào collection `recommendations` dạng gọn: mỗi document chỉ gồm
+    `_id` ("user:<id>", "segment:<segment>" hoặc "popular"), `product_ids` và
+    `generated_at`. Chỉ user có tín hiệu (và còn sản phẩm để gợi ý) mới có document riêng; document của lần
+    build trước không còn được tạo lại bị xóa.
+    """
+
+    def __init__(
+        self,
+        recommendation_collection: AsyncCollection,
+        product_collection: AsyncCollection,
+        order_collection: AsyncCollection,
+        cart_collection: AsyncCollection,
+        user_collection: AsyncCollection,
+        event_collection: AsyncCollection,
+        top_n: Optional[int] = None
+    ):
+        self.recommendation_collection = recommendation_collection
+        # Job đọc toàn bộ dữ liệu, không cạnh tranh với primary
+        self.product_collection = secondary_preferred(product_collection)
+        self.order_collection = secondary_preferred(order_collection)
+        self.cart_collection = secondary_preferred(cart_collection)
+        self.user_collection = secondary_preferred(user_collection)
+        self.event_collection = secondary_preferred(event_collection)
+        self.top_n = top_n or settings.RECOMMENDATION_TOP_N
+
+    async def build(self) -> RecommendationBuildResponse:
+        """
+        Tính lại và ghi toàn bộ gợi ý
+
+        Returns:
+            RecommendationBuildResponse: Thống kê lần build
+
+        Raises:
+            PoolSaturatedError: Nếu process đang chạy một lần build khác
+        """
+        start = time.perf_counter()
+        # MongoDB lưu datetime theo millisecond: cắt trước để document vừa ghi không bị xóa như document cũ
+        now = datetime.utcnow()
+        run_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+        products = [
+            (
+                product["_id"],
+                product.get("category") or "",
+                product.get("sold", 0),
+                product.get("views", 0),
+                product.get("rating", 0)
+            )
+            async for product in self.product_collection.find(
+                {}, projection={"category": 1, "sold": 1, "views": 1, "rating": 1}
+            )
+        ]
+        interactions = await self._load_interactions()
+        signal_users = {user_id for user_id, _, _, _ in interactions}
+        profiles = {}
+        async for user in self.user_collection.find({}, projection={"gender": 1, "date_of_birth": 1}):
+            user_id = str(user["_id"])
+            if user_id in signal_users:
+                profiles[user_id] = (user.get("gender"), user.get("date_of_birth"))
+
+        users, segments, popular = await recommendation_pool.run(
+            compute_recommendations, products, interactions, profiles, self.top_n, run_at.date()
+        )
+
+        documents = [(POPULAR_KEY, popular)]
+        documents.extend((f"segment:{segment}", product_ids) for segment, product_ids in segments.items())
+        documents.extend((f"user:{user_id}", product_ids) for user_id, product_ids in users.items() if product_ids)
+        for i in range(0, len(documents), _WRITE_BATCH_SIZE):
+            await self.recommendation_collection.bulk_write(
+                [
+                    ReplaceOne({"_id": key}, {"product_ids": product_ids, "generated_at": run_at}, upsert=True)
+                    for key, product_ids in documents[i:i + _WRITE_BATCH_SIZE]
+                ],
+                ordered=False
+            )
+        # User không còn tín hiệu (đơn/giỏ bị xóa) quay về gợi ý theo segment
+        await self.recommendation_collection.delete_many({"generated_at": {"$lt": run_at}})
+
+        report = RecommendationBuildResponse(
+            users=len(users),
+            segments=len(segments),
+            categories=len({category for _, category, _, _, _ in products}),
+            products=len(products),
+            duration_ms=(time.perf_counter() - start) * 1000
+        )
+        print(
+            f"✅ Recommendations: {report.users} user, {report.segments} segment, "
+            f"{report.products} sản phẩm ({report.duration_ms:.0f}ms)"
+        )
+        return report
+
+    async def _load_interactions(self) -> List[Tuple[str, ObjectId, float, bool]]:
+        """Tín hiệu (user_id, product_id, trọng số, đã mua), được gộp theo cặp user/sản phẩm ngay trên MongoDB"""
+        interactions = []
+        orders = await self.order_collection.aggregate([
+            {"$match": {"status": "placed"}},
+            {"$unwind": "$items"},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "product_id": "$items.product_id"},
+                "quantity": {"$sum": "$items.quantity"}
+            }}
+        ])
+        async for row in orders:
+            interactions.append((row["_id"]["user_id"], row["_id"]["product_id"], ORDER_WEIGHT * row["quantity"], True))
+        carts = await self.cart_collection.aggregate([
+            {"$unwind": "$items"},
+            {"$project": {"_id": 0, "user_id": 1, "product_id": "$items.product_id"}}
+        ])
+        async for row in carts:
+            interactions.append((row["user_id"], row["product_id"], CART_WEIGHT, False))
+        events = await self.event_collection.aggregate([
+            {"$match": {"user_id": {"$exists": True}}},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "product_id": "$product_id", "type": "$type"},
+                "count": {"$sum": "$weight"}
+            }}
+        ])
+        async for row in events:
+            weight = CLICK_WEIGHT if row["_id"]["type"] == "click" else VIEW_WEIGHT
+            count = min(row["count"], MAX_EVENTS_PER_PRODUCT)
+            interactions.append((row["_id"]["user_id"], row["_id"]["product_id"], weight * count, False))
+        return interactions
+
+
+def compute_recommendations(
+    products: List[Tuple[ObjectId, str, int, int, float]],
+    interactions: List[Tuple[str, ObjectId, float, bool]],
+    profiles: Dict[str, Tuple[Optional[str], Optional[datetime]]],
+    top_n: int,
+    today: date
+) -> Tuple[Dict[str, List[ObjectId]], Dict[str, List[ObjectId]], List[ObjectId]]:
+    """
+    Tính top-N sản phẩm cho từng user, từng segment và danh sách phổ biến chung (chạy trên worker pool)
+
+    Args:
+        products: (product_id, danh mục, đã bán, lượt xem, đánh giá) của mọi sản phẩm
+        interactions: (user_id, product_id, trọng số, đã mua)
+        profiles: user_id -> (giới tính, ngày sinh) của các user có tín hiệu
+        top_n: Số sản phẩm gợi ý cho mỗi danh sách
+        today: Ngày dùng để tính tuổi
+
+    Returns:
+        (user_id -> product_ids, segment -> product_ids, product_ids phổ biến)
+    """
+    import numpy as np
+
+    if not products:
+        return {}, {}, []
+
+    categories = sorted({category for _, category, _, _, _ in products})
+    category_index = {category: i for i, category in enumerate(categories)}
+    product_index = {product_id: i for i, (product_id, _, _, _, _) in enumerate(products)}
+    product_category = np.array([category_index[category] for _, category, _, _, _ in products], dtype=np.int64)
+
+    interactions = [row for row in interactions if row[1] in product_index]
+    bought_per_user: Dict[str, int] = {}
+    for user_id, _, _, bought in interactions:
+        if bought:
+            bought_per_user[user_id] = bought_per_user.get(user_id, 0) + 1
+
+    # Ứng viên: sản phẩm phổ biến nhất của mỗi danh mục (đã bán, lượt xem, đánh giá), điểm giảm theo thứ hạng.
+    # Lấy thêm tối đa top_n ứng viên mỗi danh mục để vẫn đủ top_n sau khi loại sản phẩm user đã mua
+    depth = top_n + min(max(bought_per_user.values(), default=0), top_n)
+    by_category: Dict[int, List[int]] = {}
+    for i in sorted(range(len(products)), key=lambda i: (-products[i][2], -products[i][3], -products[i][4])):
+        ranked = by_category.setdefault(product_category[i], [])
+        if len(ranked) < depth:
+            ranked.append(i)
+    candidates = np.array([i for ranked in by_category.values() for i in ranked], dtype=np.int64)
+    discount = np.array(
+        [1.0 / (rank + 1) for ranked in by_category.values() for rank in range(len(ranked))],
+        dtype=np.float32
+    )
+    candidate_category = product_category[candidates]
+    candidate_position = {int(product): position for position, product in enumerate(candidates)}
+
+    # Ma trận affinity user x danh mục
+    user_ids = sorted({user_id for user_id, _, _, _ in interactions})
+    user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+    rows = np.array([user_index[user_id] for user_id, _, _, _ in interactions], dtype=np.int64)
+    columns = np.array([product_category[product_index[product_id]] for _, product_id, _, _ in interactions], dtype=np.int64)
+    weights = np.array([weight for _, _, weight, _ in interactions], dtype=np.float32)
+    affinity = np.zeros((len(user_ids), len(categories)), dtype=np.float32)
+    np.add.at(affinity, (rows, columns), weights)
+
+    # Làm mượt theo thứ bậc: chung (Laplace) -> segment -> user
+    overall = affinity.sum(axis=0) + 1.0
+    overall /= overall.sum()
+    segment_names = sorted({segment_key(*profiles.get(user_id, (None, None)), today) for user_id in user_ids})
+    segment_index = {segment: i for i, segment in enumerate(segment_names)}
+    user_segment = np.array(
+        [segment_index[segment_key(*profiles.get(user_id, (None, None)), today)] for user_id in user_ids],
+        dtype=np.int64
+    )
+    segment_totals = np.zeros((len(segment_names), len(categories)), dtype=np.float32)
+    np.add.at(segment_totals, user_segment, affinity)
+    segment_pref = (segment_totals + PRIOR_STRENGTH * overall) / (segment_totals.sum(axis=1, keepdims=True) + PRIOR_STRENGTH)
+
+    # Sản phẩm đã mua không được gợi ý lại (chỉ xét sản phẩm là ứng viên)
+    purchased = [
+        (user_index[user_id], candidate_position[product_index[product_id]])
+        for user_id, product_id, _, bought in interactions
+        if bought and product_index[product_id] in candidate_position
+    ]
+    purchased_rows = np.array([row for row, _ in purchased], dtype=np.int64)
+    purchased_columns = np.array([column for _, column in purchased], dtype=np.int64)
+
+    def top_products(preferences: "np.ndarray", excluded: Optional[Tuple["np.ndarray", "np.ndarray"]] = None) -> List[List[ObjectId]]:
+        scores = preferences[:, candidate_category] * discount
+        # Lấy thêm số sản phẩm bị loại nhiều nhất của một hàng để sau khi bỏ chúng vẫn còn top_n
+        extra = 0
+        if excluded is not None and len(excluded[0]):
+            scores[excluded] = -1.0
+            extra = int(np.bincount(excluded[0]).max())
+        n = min(top_n + extra, scores.shape[1])
+        top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+        return [
+            [products[candidates[column]][0] for column in row if scores[i, column] > 0][:top_n]
+            for i, row in enumerate(top)
+        ]
+
+    users: Dict[str, List[ObjectId]] = {}
+    user_totals = affinity.sum(axis=1, keepdims=True)
+    for start in range(0, len(user_ids), _USER_BATCH_SIZE):
+        end = start + _USER_BATCH_SIZE
+        preferences = (affinity[start:end] + PRIOR_STRENGTH * segment_pref[user_segment[start:end]]) / (
+            user_totals[start:end] + PRIOR_STRENGTH
+        )
+        in_batch = (purchased_rows >= start) & (purchased_rows < end)
+        excluded = (purchased_rows[in_batch] - start, purchased_columns[in_batch])
+        for user_id, product_ids in zip(user_ids[start:end], top_products(preferences, excluded)):
+            users[user_id] = product_ids
+
+    segments = dict(zip(segment_names, top_products(segment_pref))) if segment_names else {}
+    popular = top_products(overall[np.newaxis, :])[0]
+    return users, segments, popular
@@ -0,0 +1,502 @@
+import asyncio
+import heapq
+import math
+import time
+from bisect import insort
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Dict, Any, List, Set, Tuple
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import OperationFailure, PyMongoError
+from config import settings
+from utils.text import tokenize
+from .event_service import COUNTER_FIELDS
+
+
+# Các field cần để index một sản phẩm (kèm các field hiển thị trên ProductCard để polling biết field nào đổi)
+SEARCH_PROJECTION = {
+    "name": 1, "category": 1, "description": 1, "sold": 1, "updated_at": 1,
+    "price": 1, "image": 1, "rating": 1
+}
+
+# Field của ProductCard ngoài `sold`: polling so sánh các field này để phân biệt
+# thay đổi nội dung thẻ sản phẩm với thay đổi chỉ về số lượng bán/tồn kho
+_CARD_FIELDS = ("name", "price", "image", "category", "rating")
+
+# Số gợi ý tối đa giữ sẵn tại mỗi node của trie
+SUGGESTION_SIZE = 10
+
+# Token trong tên sản phẩm được tính trọng số cao hơn danh mục/mô tả
+_NAME_WEIGHT = 2
+
+
+class _Doc:
+    __slots__ = ("name", "sold", "terms", "name_terms", "length")
+
+    def __init__(self, name: str, sold: int, terms: Dict[str, int], name_terms: Set[str]):
+        self.name = name
+        self.sold = sold
+        self.terms = terms
+        self.name_terms = name_terms
+        self.length = sum(terms.values())
+
+
+class _TrieNode:
+    __slots__ = ("children", "count", "top", "dirty")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Số sản phẩm có term kết thúc tại node này trong tên
+        self.count = 0
+        # Top sản phẩm bán chạy có term bắt đầu bằng prefix này: [(-sold, product_id)]
+        self.top: List[Tuple[int, str]] = []
+        # True khi top có thể thiếu phần tử (sản phẩm bị xóa/giảm sold), tính lại khi truy vấn
+        self.dirty = False
+
+
+class SearchIndex:
+    """
+    Inverted index trong bộ nhớ cho tìm kiếm sản phẩm
+
+    - Tìm kiếm: xếp hạng BM25 nhân hệ số phổ biến 1 + boost * log(1 + sold)
+    - Autocomplete: trie trên các term (đã bỏ dấu) của tên sản phẩm, mỗi node
+      giữ sẵn top sản phẩm bán chạy nên một truy vấn chỉ là đi theo prefix
+
+    Không thread-safe: chỉ cập nhật/đọc trên thread của event loop
+    (trừ lần build đầu tiên, khi index chưa được dùng).
+    """
+
+    def __init__(self, popularity_boost: float, k1: float = 1.2, b: float = 0.75):
+        self.popularity_boost = popularity_boost
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[str, _Doc] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._name_postings: Dict[str, Set[str]] = {}
+        self._total_length = 0
+        self._trie = _TrieNode()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def product_ids(self) -> Set[str]:
+        """ID các sản phẩm đang có trong index"""
+        return set(self._docs)
+
+    def upsert(self, product: Dict[str, Any]):
+        """Thêm hoặc cập nhật một sản phẩm (document MongoDB có các field trong SEARCH_PROJECTION)"""
+        product_id = str(product["_id"])
+        name = product.get("name") or ""
+        name_terms = tokenize(name)
+        terms = Counter({term: count * _NAME_WEIGHT for term, count in Counter(name_terms).items()})
+        terms.update(tokenize(product.get("category") or ""))
+        terms.update(tokenize(product.get("description") or ""))
+        new = _Doc(name, int(product.get("sold") or 0), dict(terms), set(name_terms))
+
+        old = self._docs.get(product_id)
+        if old is not None:
+            self._remove_postings(product_id, old)
+        self._add_postings(product_id, new)
+        self._docs[product_id] = new
+
+        old_name_terms = old.name_terms if old is not None else set()
+        for term in old_name_terms - new.name_terms:
+            self._trie_discard(term, product_id)
+        for term in new.name_terms:
+            decreased = old is not None and term in old_name_terms and new.sold < old.sold
+            self._trie_offer(term, product_id, new.sold, is_new=term not in old_name_terms, decreased=decreased)
+
+    def remove(self, product_id: str):
+        """Xóa sản phẩm khỏi index"""
+        old = self._docs.pop(product_id, None)
+        if old is None:
+            return
+        self._remove_postings(product_id, old)
+        for term in old.name_terms:
+            self._trie_discard(term, product_id)
+
+    def search(self, query: str, limit: int, offset: int = 0) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Tìm sản phẩm theo BM25 có tính độ phổ biến
+
+        Args:
+            query: Chuỗi tìm kiếm (có hoặc không dấu)
+            limit: Số kết quả
+            offset: Bỏ qua bao nhiêu kết quả đầu
+
+        Returns:
+            (Danh sách (product_id, score) theo score giảm dần, tổng số sản phẩm khớp)
+        """
+        terms = set(tokenize(query))
+        if not terms or not self._docs:
+            return [], 0
+
+        total_docs = len(self._docs)
+        avg_length = self._total_length / total_docs
+        scores: Dict[str, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for product_id, tf in postings.items():
+                length_norm = 1 - self.b + self.b * self._docs[product_id].length / avg_length
+                scores[product_id] = scores.get(product_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+        for product_id in scores:
+            scores[product_id] *= 1 + self.popularity_boost * math.log1p(self._docs[product_id].sold)
+
+        ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])
+        return ranked[offset:], len(scores)
+
+    def autocomplete(self, query: str, limit: int) -> List[Tuple[str, str]]:
+        """
+        Gợi ý sản phẩm theo prefix: các từ đầy đủ phải khớp, từ cuối được hiểu là prefix
+
+        Args:
+            query: Chuỗi người dùng đang gõ
+            limit: Số gợi ý (tối đa SUGGESTION_SIZE)
+
+        Returns:
+            Danh sách (product_id, tên sản phẩm) theo số lượng bán giảm dần
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        *full_terms, prefix = tokens
+
+        if not full_terms:
+            node = self._find_node(prefix)
+            if node is None:
+                return []
+            if node.dirty:
+                self._refresh_node(node, prefix)
+            return [(product_id, self._docs[product_id].name) for _, product_id in node.top[:limit]]
+
+        # Nhiều từ: giao các posting list (bắt đầu từ list ngắn nhất), rồi lọc theo prefix của từ cuối
+        postings = sorted((self._postings.get(term, {}) for term in full_terms), key=len)
+        candidates = set(postings[0])
+        for other in postings[1:]:
+            candidates.intersection_update(other)
+        matched = [
+            product_id for product_id in candidates
+            if any(term.startswith(prefix) for term in self._docs[product_id].name_terms)
+        ]
+        best = heapq.nlargest(limit, matched, key=lambda product_id: self._docs[product_id].sold)
+        return [(product_id, self._docs[product_id].name) for product_id in best]
+
+    def _add_postings(self, product_id: str, doc: _Doc):
+        for term, tf in doc.terms.items():
+            self._postings.setdefault(term, {})[product_id] = tf
+        for term in doc.name_terms:
+            self._name_postings.setdefault(term, set()).add(product_id)
+        self._total_length += doc.length
+
+    def _remove_postings(self, product_id: str, doc: _Doc):
+        for term in doc.terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[term]
+        for term in doc.name_terms:
+            name_postings = self._name_postings.get(term)
+            if name_postings is not None:
+                name_postings.discard(product_id)
+                if not name_postings:
+                    del self._name_postings[term]
+        self._total_length -= doc.length
+
+    def _find_node(self, prefix: str) -> Optional[_TrieNode]:
+        node = self._trie
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _trie_offer(self, term: str, product_id: str, sold: int, is_new: bool, decreased: bool):
+        """Đưa sản phẩm vào top của mọi node trên đường đi của term"""
+        node = self._trie
+        for ch in term:
+            node = node.children.setdefault(ch, _TrieNode())
+            self._node_offer(node, product_id, sold, decreased)
+        if is_new:
+            node.count += 1
+
+    def _node_offer(self, node: _TrieNode, product_id: str, sold: int, decreased: bool):
+        for i, (_, existing_id) in enumerate(node.top):
+            if existing_id == product_id:
+                del node.top[i]
+                # Sold giảm: sản phẩm ngoài top có thể đã vượt lên, cần tính lại
+                if decreased:
+                    node.dirty = True
+                break
+        if len(node.top) < SUGGESTION_SIZE or -sold < node.top[-1][0]:
+            insort(node.top, (-sold, product_id))
+            del node.top[SUGGESTION_SIZE:]
+
+    def _trie_discard(self, term: str, product_id: str):
+        """Gỡ sản phẩm khỏi các node trên đường đi của term"""
+        node = self._trie
+        for ch in term:
+            node = node.children.get(ch)
+            if node is None:
+                return
+            for i, (_, existing_id) in enumerate(node.top):
+                if existing_id == product_id:
+                    del node.top[i]
+                    node.dirty = True
+                    break
+        node.count -= 1
+
+    def _refresh_node(self, node: _TrieNode, prefix: str):
+        """Tính lại top của node từ các term bên dưới"""
+        candidates: Set[str] = set()
+        stack = [(node, prefix)]
+        while stack:
+            current, term = stack.pop()
+            if current.count > 0:
+                candidates.update(self._name_postings.get(term, ()))
+            stack.extend((child, term + ch) for ch, child in current.children.items())
+        node.top = sorted((-self._docs[product_id].sold, product_id) for product_id in candidates)[:SUGGESTION_SIZE]
+        node.dirty = False
+
+
+def _card_state(product: Dict[str, Any]) -> Tuple[int, int, int]:
+    """(hash nội dung thẻ sản phẩm, số lượng đã bán, hash mô tả) của một document"""
+    return (
+        hash(tuple(product.get(field) for field in _CARD_FIELDS)),
+        int(product.get("sold") or 0),
+        hash(product.get("description"))
+    )
+
+
+def _build_index(products: List[Dict[str, Any]]) -> Tuple[SearchIndex, Dict[str, Tuple[int, int, int]]]:
+    index = SearchIndex(popularity_boost=settings.SEARCH_POPULARITY_BOOST)
+    cards = {}
+    for product in products:
+        index.upsert(product)
+        cards[str(product["_id"])] = _card_state(product)
+    return index, cards
+
+
+class SearchIndexer:
+    """
+    Giữ SearchIndex đồng bộ với collection sản phẩm
+
+    Build toàn bộ khi khởi động, sau đó cập nhật từng sản phẩm theo change stream
+    (replica set / Atlas). Nếu server không hỗ trợ change stream, chuyển sang
+    polling theo `updated_at`: mỗi lần đọc lại cả SEARCH_POLL_LAG_SECONDS giây trước mốc
+    mới nhất đã thấy (lệnh ghi chậm hoặc server lệch đồng hồ có thể làm sản phẩm có
+    `updated_at` cũ hơn xuất hiện sau), sản phẩm không đổi so với index thì bỏ qua.
+    Polling không thấy sản phẩm bị xóa và vẫn có thể lỡ lệnh ghi trễ hơn khoảng lùi đó,
+    nên cứ mỗi SEARCH_RECONCILE_INTERVAL_SECONDS lại đối chiếu toàn bộ collection với index.
+    Các callback đăng ký bằng `on_change` được gọi với ID sản phẩm và các field đã đổi
+    sau mỗi thay đổi (kể cả thay đổi từ worker/process khác).
+    """
+
+    def __init__(self):
+        # Index rỗng cho tới khi build() (không đọc settings lúc import module)
+        self.index = SearchIndex(popularity_boost=0.0)
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[str, Optional[Set[str]]], Any]] = []
+        # Trạng thái (xem _card_state) theo sản phẩm, để polling biết sản phẩm nào/field nào đổi
+        self._cards: Dict[str, Tuple[int, int, int]] = {}
+        self._built = False
+        self._use_stream = False
+        self._resume_token: Optional[Dict[str, Any]] = None
+        self._poll_since: Optional[datetime] = None
+
+    def on_change(self, listener: Callable[[str, Optional[Set[str]]], Any]):
+        """
+        Đăng ký callback (đồng bộ) nhận ID sản phẩm vừa được thêm/sửa/xóa
+
+        Tham số thứ hai là tập field cấp cao nhất đã đổi, hoặc None nếu không biết
+        (thêm/xóa/thay cả document, build lại index). Ở chế độ polling chỉ phân biệt được
+        field của ProductCard: {"sold"} nếu chỉ số đã bán đổi, tập rỗng nếu thẻ sản phẩm
+        không đổi (ví dụ chỉ tồn kho hoặc mô tả), None nếu nội dung thẻ đổi.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, product_id: str, fields: Optional[Set[str]] = None):
+        for listener in self._listeners:
+            listener(product_id, fields)
+
+    async def build(self, product_collection: AsyncCollection):
+        """
+        Build toàn bộ index và ghi nhận mốc để theo dõi thay đổi từ đó (resume token hoặc `updated_at`)
+
+        serve.py gọi hàm này ở process cha trước khi fork để các worker dùng chung index
+        (copy-on-write) thay vì mỗi worker tự đọc toàn bộ collection.
+        """
+        self._resume_token = None
+        self._use_stream = False
+        if settings.SEARCH_USE_CHANGE_STREAM:
+            try:
+                # Mở change stream trước khi đọc toàn bộ để không bỏ sót thay đổi trong lúc build;
+                # resume token cho phép worker mở lại stream từ đúng thời điểm này
+                async with await product_collection.watch(full_document="updateLookup") as stream:
+                    self._resume_token = stream.resume_token
+                self._use_stream = True
+            except PyMongoError as e:
+                print(f"⚠️ Không dùng được change stream, chuyển sang polling: {e}")
+
+        # Polling đọc lại từ SEARCH_POLL_LAG_SECONDS trước mốc này (bù lệnh ghi chậm, lệch đồng hồ)
+        self._poll_since = datetime.utcnow()
+        products = await product_collection.find({}, projection=SEARCH_PROJECTION).to_list()
+        # Build trên thread riêng để không chặn event loop với catalog lớn
+        self.index, self._cards = await asyncio.to_thread(_build_index, products)
+        self._built = True
+        print(f"✅ Search index: {len(self.index)} sản phẩm")
+
+    async def start(self, product_collection: AsyncCollection):
+        """Build index (nếu chưa được build sẵn trước khi fork) và chạy task theo dõi thay đổi ở background"""
+        if not self._built:
+            await self.build(product_collection)
+        if self._use_stream:
+            self._task = asyncio.create_task(self._watch(product_collection, self._resume_token))
+        else:
+            self._task = asyncio.create_task(self._poll(product_collection, self._poll_since))
+
+    async def stop(self):
+        """Dừng task theo dõi thay đổi"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self, product_collection: AsyncCollection, resume_token: Optional[Dict[str, Any]]):
+        stream = None
+        while True:
+            try:
+                if stream is None:
+                    stream = await product_collection.watch(full_document="updateLookup", resume_after=resume_token)
+                async with stream:
+                    async for change in stream:
+                        self._apply_change(change)
+            except OperationFailure as e:
+                # Không mở/resume được change stream (ví dụ resume token đã trôi khỏi oplog)
+                print(f"⚠️ Change stream bị lỗi, chuyển sang polling: {e}")
+                break
+            except PyMongoError as e:
+                print(f"⚠️ Mất kết nối change stream, thử lại: {e}")
+                await asyncio.sleep(settings.SEARCH_POLL_INTERVAL_SECONDS)
+            if stream is not None:
+                resume_token = stream.resume_token or resume_token
+                stream = None
+        # Thay đổi từ lúc mất change stream có thể đã bị bỏ sót: đọc lại toàn bộ rồi mới polling
+        await self._poll(product_collection, None)
+
+    def _apply_change(self, change: Dict[str, Any]):
+        operation = change.get("operationType")
+        if operation == "update" and _counters_only(change.get("updateDescription") or {}):
+            # Bộ đếm lượt xem/bấm được cộng định kỳ, không ảnh hưởng search index và ETag
+            return
+        product_id = str(change["documentKey"]["_id"])
+        fields = None
+        if operation in ("insert", "update", "replace"):
+            if change.get("fullDocument"):
+                self.index.upsert(change["fullDocument"])
+                self._cards[product_id] = _card_state(change["fullDocument"])
+            if operation == "update":
+                fields = _changed_fields(change.get("updateDescription") or {})
+        elif operation == "delete":
+            self.index.remove(product_id)
+            self._cards.pop(product_id, None)
+        else:
+            return
+        self._notify(product_id, fields)
+
+    async def _poll(self, product_collection: AsyncCollection, since: Optional[datetime]):
+        """Polling theo `updated_at` (since=None: đọc lại toàn bộ collection ở lần đầu)"""
+        reconciled_at = time.monotonic()
+        lag = timedelta(seconds=settings.SEARCH_POLL_LAG_SECONDS)
+        while True:
+            await asyncio.sleep(settings.SEARCH_POLL_INTERVAL_SECONDS)
+            try:
+                if since is None:
+                    since = await self._resync(product_collection)
+                    reconciled_at = time.monotonic()
+                    continue
+                # Đọc lại cả khoảng lùi `lag`: sản phẩm đã đọc mà không đổi bị bỏ qua trong _upsert
+                cursor = product_collection.find(
+                    {"updated_at": {"$gte": since - lag}},
+                    projection=SEARCH_PROJECTION,
+                    sort=[("updated_at", 1)]
+                )
+                async for product in cursor:
+                    since = max(since, product["updated_at"])
+                    self._upsert(product)
+                if time.monotonic() - reconciled_at >= settings.SEARCH_RECONCILE_INTERVAL_SECONDS:
+                    await self._reconcile(product_collection)
+                    reconciled_at = time.monotonic()
+            except PyMongoError as e:
+                print(f"⚠️ Lỗi polling search index: {e}")
+
+    async def _reconcile(self, product_collection: AsyncCollection):
+        """
+        Đối chiếu toàn bộ collection với index
+
+        Cập nhật sản phẩm có nội dung khác index (lệnh ghi trễ hơn khoảng lùi của polling)
+        và xóa sản phẩm không còn trong collection (polling không thấy lệnh xóa).
+        """
+        existing = set()
+        async for product in product_collection.find({}, projection=SEARCH_PROJECTION):
+            existing.add(str(product["_id"]))
+            self._upsert(product)
+        for product_id in self.index.product_ids() - existing:
+            self.index.remove(product_id)
+            self._cards.pop(product_id, None)
+            self._notify(product_id)
+
+    def _upsert(self, product: Dict[str, Any]):
+        """
+        Cập nhật index với document đọc được khi polling/đối chiếu và báo cho listener
+
+        Document giống trạng thái đã index (đọc lại trong khoảng lùi) bị bỏ qua. Field báo
+        cho listener chỉ phân biệt được theo ProductCard (xem `on_change`).
+        """
+        product_id = str(product["_id"])
+        state = _card_state(product)
+        old = self._cards.get(product_id)
+        if old == state:
+            return
+        self.index.upsert(product)
+        self._cards[product_id] = state
+        if old is None or old[0] != state[0]:
+            fields = None
+        else:
+            fields = {"sold"} if old[1] != state[1] else set()
+        self._notify(product_id, fields)
+
+    async def _resync(self, product_collection: AsyncCollection) -> datetime:
+        """Build lại toàn bộ index từ collection, trả về mốc polling tiếp theo"""
+        since = datetime.utcnow()
+        products = await product_collection.find({}, projection=SEARCH_PROJECTION).to_list()
+        index, self._cards = await asyncio.to_thread(_build_index, products)
+        changed = self.index.product_ids() | index.product_ids()
+        self.index = index
+        print(f"✅ Search index build lại: {len(index)} sản phẩm")
+        for product_id in changed:
+            self._notify(product_id)
+        return since
+
+
+def _changed_fields(description: Dict[str, Any]) -> Set[str]:
+    """Tên field cấp cao nhất bị thay đổi trong updateDescription của change stream"""
+    paths = list(description.get("updatedFields", {})) + list(description.get("removedFields", []))
+    return {path.split(".", 1)[0] for path in paths}
+
+
+def _counters_only(description: Dict[str, Any]) -> bool:
+    """Lệnh update chỉ thay đổi các field bộ đếm sự kiện (views/clicks)"""
+    fields = _changed_fields(description)
+    return bool(fields) and fields <= set(COUNTER_FIELDS.values())
+
+
+# Singleton instance
+search_indexer = SearchIndexer()
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.asynchronous.collection import AsyncCollection
+from config import settings
+from database import register_indexes
+from models import RefreshTokenResponse
+from utils import create_access_token, new_refresh_secret, hash_refresh_secret
+
+
+class RefreshTokenReuseError(ValueError):
+    """Lỗi khi một refresh token đã được đổi bị dùng lại (token có thể đã bị lộ)"""
+
+    def __init__(self):
+        super().__init__("Refresh token đã được sử dụng, vui lòng đăng nhập lại")
+
+
+class SessionService:
+    """
+    Service quản lý phiên đăng nhập (refresh token xoay vòng)
+
+    Mỗi lần đăng nhập tạo một document session; refresh token có dạng
+    `<session_id>.<bí mật>` và database chỉ lưu HMAC của phần bí mật. Mỗi lần
+    refresh, token được đổi sang token mới (rotation) và HMAC của token vừa dùng
+    được thêm vào `retired_hashes`: nếu bất kỳ token cũ nào của phiên bị gửi lại
+    (kể cả khi kẻ đánh cắp đã đổi token nhiều lần), cả phiên bị thu hồi (reuse
+    detection), nên kẻ đánh cắp token lẫn người dùng thật đều phải đăng nhập lại.
+
+    Refresh gia hạn phiên thêm REFRESH_TOKEN_EXPIRE_DAYS nhưng không quá
+    SESSION_MAX_DAYS kể từ lúc đăng nhập, nên `retired_hashes` cũng có giới hạn.
+    Refresh chỉ cần một lệnh find_one_and_update theo _id và một lần HMAC, không
+    truy vấn user và không chạy bcrypt. Session hết hạn được MongoDB tự xóa qua
+    TTL index trên `expires_at`.
+    """
+
+    collection_name = "refresh_sessions"
+
+    def __init__(self, session_collection: AsyncCollection):
+        self.session_collection = session_collection
+
+    def _expires_at(self, now: datetime) -> datetime:
+        return now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+    async def create_session(self, user_id: str, email: str) -> str:
+        """
+        Tạo phiên mới sau khi đăng nhập thành công
+
+        Args:
+            user_id: ID của user
+            email: Email của user (để tạo access token khi refresh mà không truy vấn user)
+
+        Returns:
+            Refresh token
+        """
+        secret = new_refresh_secret()
+        now = datetime.utcnow()
+        session_id = ObjectId()
+        await self.session_collection.insert_one({
+            "_id": session_id,
+            "user_id": user_id,
+            "email": email,
+            "token_hash": hash_refresh_secret(secret),
+            "retired_hashes": [],
+            "created_at": now,
+            "expires_at": self._expires_at(now)
+        })
+        return f"{session_id}.{secret}"
+
+    async def refresh(self, refresh_token: str) -> RefreshTokenResponse:
+        """
+        Đổi refresh token lấy access token mới và refresh token mới
+
+        Args:
+            refresh_token: Refresh token hiện tại của phiên
+
+        Returns:
+            RefreshTokenResponse: Cặp token mới
+
+        Raises:
+            RefreshTokenReuseError: Nếu token đã được đổi trước đó (phiên bị thu hồi)
+            ValueError: Nếu token không hợp lệ, hết hạn hoặc phiên đã bị thu hồi
+        """
+        session_id, presented_hash = self._parse(refresh_token)
+        secret = new_refresh_secret()
+        now = datetime.utcnow()
+
+        # Điều kiện theo HMAC hiện tại: hai request dùng cùng một token thì chỉ một request đổi được.
+        # Phiên quá SESSION_MAX_DAYS kể từ lúc đăng nhập không refresh được nữa (TTL xóa sau đó)
+        session = await self.session_collection.find_one_and_update(
+            {
+                "_id": session_id,
+                "token_hash": presented_hash,
+                "expires_at": {"$gt": now},
+                "created_at": {"$gt": now - timedelta(days=settings.SESSION_MAX_DAYS)}
+            },
+            {
+                "$set": {
+                    "token_hash": hash_refresh_secret(secret),
+                    "expires_at": self._expires_at(now),
+                    "last_used_at": now
+                },
+                "$push": {"retired_hashes": presented_hash}
+            },
+            projection={"user_id": 1, "email": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+
+        if session is None:
+            # Một token đã bị thay thế được gửi lại: thu hồi cả phiên
+            revoked = await self.session_collection.delete_one(
+                {"_id": session_id, "retired_hashes": presented_hash}
+            )
+            if revoked.deleted_count:
+                raise RefreshTokenReuseError()
+            raise ValueError("Refresh token không hợp lệ hoặc đã hết hạn")
+
+        access_token = create_access_token(data={"sub": session["user_id"], "email": session["email"]})
+        return RefreshTokenResponse.model_construct(
+            access_token=access_token,
+            refresh_token=f"{session_id}.{secret}",
+            token_type="bearer"
+        )
+
+    async def revoke(self, refresh_token: str, user_id: Optional[str] = None) -> bool:
+        """
+        Thu hồi phiên của refresh token (đăng xuất)
+
+        Args:
+            refresh_token: Refresh token hiện tại của phiên
+            user_id: Chỉ thu hồi nếu phiên thuộc user này
+
+        Returns:
+            True nếu đã thu hồi, False nếu token không hợp lệ
+        """
+        try:
+            session_id, presented_hash = self._parse(refresh_token)
+        except ValueError:
+            return False
+
+        query = {"_id": session_id, "token_hash": presented_hash}
+        if user_id is not None:
+            query["user_id"] = user_id
+        result = await self.session_collection.delete_one(query)
+        return result.deleted_count > 0
+
+    def _parse(self, refresh_token: str) -> Tuple[ObjectId, bytes]:
+        """Tách refresh token thành (session_id, HMAC của phần bí mật)"""
+        session_id, _, secret = refresh_token.partition(".")
+        if not secret or not ObjectId.is_valid(session_id):
+            raise ValueError("Refresh token không hợp lệ hoặc đã hết hạn")
+        return ObjectId(session_id), hash_refresh_secret(secret)
+
+
+# Session hết hạn được xóa bởi TTL monitor của MongoDB (chạy khoảng mỗi 60 giây,
+# nên truy vấn vẫn tự kiểm tra expires_at)
+register_indexes(SessionService.collection_name, [
+    IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl")
+])
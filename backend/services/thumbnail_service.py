@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import os
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from utils import BoundedWorkerPool, LazyObject, TTLCache, safe_join
+
+
+# Tăng khi đổi cách render để không dùng lại thumbnail cũ trong cache
+THUMBNAIL_VERSION = 1
+
+# Định dạng thumbnail -> media type
+THUMBNAIL_FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Resize/encode ảnh nặng CPU: mặc định chạy trên process pool để không tranh GIL với event loop
+thumbnail_pool = LazyObject(lambda: BoundedWorkerPool(
+    kind=settings.THUMBNAIL_POOL_KIND,
+    max_workers=settings.THUMBNAIL_POOL_WORKERS,
+    max_queue=settings.THUMBNAIL_POOL_MAX_QUEUE
+))
+
+
+def _render(source_path: str, target_path: str, width: int, fmt: str, quality: int):
+    # Hàm cấp module để gửi được sang process pool; Pillow chỉ được import trong worker
+    from utils.image_thumbnail import render_thumbnail
+    render_thumbnail(source_path, target_path, width, fmt, quality)
+
+
+def _file_digest(path: str) -> str:
+    """SHA-256 nội dung file (đọc theo chunk)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ThumbnailService:
+    """
+    Thumbnail ảnh sản phẩm với các chiều rộng cố định, cache trên đĩa
+
+    File thumbnail được đặt tên theo hash nội dung ảnh gốc (không theo đường dẫn):
+    ảnh gốc đổi nội dung thì tên mới, ảnh giống nhau dùng chung một file, và các
+    worker dùng chung cache trên đĩa. Mỗi thumbnail chỉ được tạo một lần; các
+    request đồng thời cho cùng thumbnail chờ chung một lần render.
+    """
+
+    def __init__(self, image_root: str, cache_dir: str, widths: List[int], quality: int):
+        self.image_root = image_root
+        self.cache_dir = cache_dir
+        self.widths = sorted(widths)
+        self.quality = quality
+        # (đường dẫn, mtime, size) -> hash nội dung, để không đọc lại ảnh gốc mỗi request
+        self._digests = TTLCache(maxsize=10000, ttl=3600)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def negotiate_format(accept: Optional[str]) -> str:
+        """WebP nếu client chấp nhận (header Accept), ngược lại JPEG"""
+        return "webp" if accept and "image/webp" in accept else "jpeg"
+
+    async def get_thumbnail(self, image: str, width: int, fmt: str) -> Optional[Tuple[str, str]]:
+        """
+        Lấy (tạo nếu chưa có) thumbnail của ảnh sản phẩm
+
+        Args:
+            image: Đường dẫn ảnh trong PRODUCT_IMAGE_ROOT (field `image` của sản phẩm)
+            width: Chiều rộng, phải thuộc THUMBNAIL_WIDTHS
+            fmt: "webp" hoặc "jpeg"
+
+        Returns:
+            (đường dẫn file thumbnail, tên file theo hash nội dung), hoặc None nếu không tìm thấy ảnh gốc
+
+        Raises:
+            ValueError: Nếu width/định dạng không hợp lệ hoặc ảnh gốc không đọc được
+            PoolSaturatedError: Nếu thumbnail pool đã đầy
+        """
+        if width not in self.widths:
+            raise ValueError(f"Chiều rộng phải là một trong {self.widths}")
+        if fmt not in THUMBNAIL_FORMATS:
+            raise ValueError(f"Định dạng phải là một trong {list(THUMBNAIL_FORMATS)}")
+
+        source = safe_join(self.image_root, image)
+        if source is None:
+            return None
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+
+        stat_key = (source, stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(stat_key)
+        if digest is None:
+            digest = await asyncio.to_thread(_file_digest, source)
+            self._digests.set(stat_key, digest)
+
+        name = f"{digest}-v{THUMBNAIL_VERSION}-{width}.{fmt}"
+        target = os.path.join(self.cache_dir, digest[:2], name)
+        if not os.path.exists(target):
+            await self._render_once(source, target, width, fmt)
+        return target, name
+
+    async def _render_once(self, source: str, target: str, width: int, fmt: str):
+        task = self._inflight.get(target)
+        if task is None:
+            task = asyncio.ensure_future(thumbnail_pool.run(_render, source, target, width, fmt, self.quality))
+            self._inflight[target] = task
+            task.add_done_callback(lambda _: self._inflight.pop(target, None))
+        # shield: request bị hủy (client ngắt kết nối) không hủy lần render các request khác đang chờ
+        await asyncio.shield(task)
+
+
+# Singleton instance
+thumbnail_service = LazyObject(lambda: ThumbnailService(
+    image_root=settings.PRODUCT_IMAGE_ROOT,
+    cache_dir=settings.THUMBNAIL_CACHE_DIR,
+    widths=settings.THUMBNAIL_WIDTHS,
+    quality=settings.THUMBNAIL_QUALITY
+))
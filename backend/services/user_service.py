@@ -1,16 +1,105 @@
+import asyncio
+import csv
+import hashlib
+import io
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple
 from bson import ObjectId
-from pymongo.collection import Collection
-from models import UserCreate, UserResponse, UserInDB, UserUpdate
-from utils import get_password_hash, verify_password, create_access_token
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pydantic import ValidationError
+from database import register_indexes, secondary_preferred
+from models import (
+    UserCreate,
+    UserResponse,
+    UserInDB,
+    TokenResponse,
+    UserUpdate,
+    UserBulkUpdateItem,
+    BulkUpdateResponse,
+    UserImportError,
+    UserImportResponse
+)
+from utils import (
+    get_password_hash_async,
+    verify_password_async,
+    verify_dummy_password_async,
+    password_needs_rehash,
+    create_access_token,
+    PoolSaturatedError,
+    ReadThroughCache,
+    create_cache_backend,
+    SlidingWindowLimiter,
+    create_rate_limit_backend,
+    LazyObject
+)
+from utils.streaming import Record
+from config import settings
+from .session_service import SessionService
+
+
+class UserImportAborted(Exception):
+    """Lỗi làm dừng import giữa chừng, kèm kết quả của các dòng đã xử lý trước đó"""
+
+    def __init__(self, response: UserImportResponse):
+        super().__init__(response.aborted)
+        self.response = response
+
+
+# Projection loại bỏ các field nhạy cảm ngay trên server
+PUBLIC_PROJECTION = {"hashed_password": 0}
+
+# Cache profile user dùng chung cho mọi request (khóa: "id:<id>" và "email:<email>")
+user_cache = LazyObject(lambda: ReadThroughCache(create_cache_backend(
+    namespace="user",
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    dumps=lambda user: user.model_dump_json(by_alias=True),
+    loads=UserResponse.model_validate_json
+)))
+
+# Giới hạn số lần đăng nhập theo IP và theo email (đếm từ lần đăng nhập thành công gần nhất)
+login_ip_limiter = LazyObject(lambda: SlidingWindowLimiter(
+    "login_ip",
+    create_rate_limit_backend("login_ip"),
+    limit=settings.LOGIN_RATE_LIMIT_PER_IP,
+    window=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+))
+login_email_limiter = LazyObject(lambda: SlidingWindowLimiter(
+    "login_email",
+    create_rate_limit_backend("login_email"),
+    limit=settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+    window=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+))
+
+
+def _email_key(email: str) -> str:
+    # Không lưu email dạng rõ trong bộ đếm (có thể nằm trên Redis dùng chung)
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:32]
 
 
 class UserService:
     """Service xử lý các logic liên quan đến User"""
     
-    def __init__(self, user_collection: Collection):
+    collection_name = "user"
+    
+    def __init__(
+        self,
+        user_collection: AsyncCollection,
+        cache: ReadThroughCache = user_cache,
+        ip_limiter: SlidingWindowLimiter = login_ip_limiter,
+        email_limiter: SlidingWindowLimiter = login_email_limiter,
+        session_service: Optional[SessionService] = None
+    ):
         self.user_collection = user_collection
+        # Profile đọc qua cache được phép đọc từ secondary; đăng nhập và ghi luôn dùng primary
+        self.read_collection = secondary_preferred(user_collection)
+        self.cache = cache
+        self.ip_limiter = ip_limiter
+        self.email_limiter = email_limiter
+        # Có session service thì đăng nhập trả thêm refresh token
+        self.session_service = session_service
     
     async def create_user(self, user_data: UserCreate) -> UserResponse:
         """
@@ -24,36 +113,29 @@ class UserService:
             
         Raises:
             ValueError: Nếu email đã tồn tại
+            PoolSaturatedError: Nếu password pool đã đầy
         """
-        # Kiểm tra email đã tồn tại chưa
-        existing_user = self.user_collection.find_one({"email": user_data.email})
-        if existing_user:
-            raise ValueError("Email đã được sử dụng")
-        
-        # Hash mật khẩu
-        hashed_password = get_password_hash(user_data.password)
+        # Hash mật khẩu (chạy trên password pool)
+        hashed_password = await get_password_hash_async(user_data.password)
         
         # Chuẩn bị dữ liệu để lưu
-        user_dict = {
-            "full_name": user_data.full_name,
-            "email": user_data.email,
-            "date_of_birth": user_data.date_of_birth,
-            "gender": user_data.gender,
-            "hashed_password": hashed_password,
-            "is_admin": False,
-            "created_at": datetime.utcnow()
-        }
+        user_dict = _user_document(user_data, hashed_password)
         
-        # Insert vào database
-        result = self.user_collection.insert_one(user_dict)
+        # Insert vào database, unique index trên email đảm bảo không trùng kể cả khi đăng ký đồng thời
+        try:
+            result = await self.user_collection.insert_one(user_dict)
+        except DuplicateKeyError:
+            raise ValueError("Email đã được sử dụng")
         
-        # Lấy user vừa tạo
-        created_user = self.user_collection.find_one({"_id": result.inserted_id})
+        # Dựng response từ document trong bộ nhớ, không cần đọc lại từ database
+        user_dict["_id"] = str(result.inserted_id)
+        user_dict.pop("hashed_password")
+        user = UserResponse(**user_dict)
         
-        # Convert ObjectId sang string
-        created_user["_id"] = str(created_user["_id"])
+        # Ghi thẳng vào cache để lần đọc ngay sau không gặp secondary chưa kịp replicate
+        await self.cache.set(user, f"id:{user.id}", f"email:{user.email}")
         
-        return UserResponse(**created_user)
+        return user
     
     async def authenticate_user(self, email: str, password: str) -> Optional[UserInDB]:
         """
@@ -65,20 +147,51 @@ class UserService:
             
         Returns:
             UserInDB: User đã xác thực hoặc None nếu thất bại
+            
+        Raises:
+            PoolSaturatedError: Nếu password pool đã đầy
         """
-        user = self.user_collection.find_one({"email": email})
+        user = await self.user_collection.find_one({"email": email})
         
         if not user:
+            # Tốn một lần bcrypt như email có thật để thời gian phản hồi không lộ tài khoản nào tồn tại
+            await verify_dummy_password_async(password)
             return None
         
-        if not verify_password(password, user["hashed_password"]):
+        if not await verify_password_async(password, user["hashed_password"]):
             return None
         
+        # Hash lại nếu hash cũ được tạo với cost thấp hơn cấu hình hiện tại
+        if password_needs_rehash(user["hashed_password"]):
+            user["hashed_password"] = await self._rehash_password(user, password)
+        
         # Convert ObjectId sang string
         user["_id"] = str(user["_id"])
         
         return UserInDB(**user)
     
+    async def _rehash_password(self, user: Dict[str, Any], password: str) -> str:
+        """
+        Hash lại mật khẩu với BCRYPT_ROUNDS hiện tại và lưu vào database
+        
+        Nếu password pool đang đầy thì bỏ qua, sẽ hash lại ở lần đăng nhập sau.
+        
+        Returns:
+            Hash mới, hoặc hash cũ nếu không hash lại được
+        """
+        old_hash = user["hashed_password"]
+        try:
+            new_hash = await get_password_hash_async(password)
+        except PoolSaturatedError:
+            return old_hash
+        
+        # Điều kiện theo hash cũ để không ghi đè nếu mật khẩu vừa bị đổi
+        await self.user_collection.update_one(
+            {"_id": user["_id"], "hashed_password": old_hash},
+            {"$set": {"hashed_password": new_hash}}
+        )
+        return new_hash
+    
     async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
         """
         Lấy thông tin user theo ID
@@ -89,19 +202,13 @@ class UserService:
         Returns:
             UserResponse: Thông tin user hoặc None nếu không tìm thấy
         """
-        try:
-            user = self.user_collection.find_one({"_id": ObjectId(user_id)})
-        except:
+        if not ObjectId.is_valid(user_id):
             return None
         
-        if not user:
-            return None
-        
-        # Convert ObjectId sang string và loại bỏ hashed_password
-        user["_id"] = str(user["_id"])
-        user.pop("hashed_password", None)
-        
-        return UserResponse(**user)
+        return await self.cache.get_or_load(
+            f"id:{user_id}",
+            lambda: self._load_user({"_id": ObjectId(user_id)})
+        )
     
     async def get_user_by_email(self, email: str) -> Optional[UserResponse]:
         """
@@ -113,58 +220,83 @@ class UserService:
         Returns:
             UserResponse: Thông tin user hoặc None nếu không tìm thấy
         """
-        user = self.user_collection.find_one({"email": email})
+        return await self.cache.get_or_load(
+            f"email:{email}",
+            lambda: self._load_user({"email": email})
+        )
+    
+    async def _load_user(self, query: Dict[str, Any]) -> Optional[UserResponse]:
+        """Đọc user từ database (bỏ qua cache), hashed_password bị loại bỏ bằng projection"""
+        user = await self.read_collection.find_one(query, projection=PUBLIC_PROJECTION)
         
         if not user:
             return None
         
-        # Convert ObjectId sang string và loại bỏ hashed_password
+        # Convert ObjectId sang string
         user["_id"] = str(user["_id"])
-        user.pop("hashed_password", None)
         
         return UserResponse(**user)
     
-    async def login(self, email: str, password: str) -> Dict[str, Any]:
+    async def login(self, email: str, password: str, client_ip: Optional[str] = None) -> TokenResponse:
         """
         Đăng nhập user và tạo access token
         
+        Giới hạn tần suất theo IP và theo email được kiểm tra trước khi truy vấn
+        database hay chạy bcrypt; đăng nhập thành công xóa bộ đếm của email.
+        
         Args:
             email: Email của user
             password: Mật khẩu
+            client_ip: IP của client (None: không giới hạn theo IP)
             
         Returns:
-            Dict: Chứa access_token, token_type và user info
+            TokenResponse: Chứa access_token, refresh_token, token_type và user info
             
         Raises:
             ValueError: Nếu email hoặc password sai
+            RateLimitExceeded: Nếu IP hoặc email đã vượt giới hạn số lần đăng nhập
+            PoolSaturatedError: Nếu password pool đã đầy
         """
+        email_key = _email_key(email)
+        if client_ip:
+            await self.ip_limiter.acquire(client_ip)
+        await self.email_limiter.acquire(email_key)
+        
         # Xác thực user
         user = await self.authenticate_user(email, password)
         
         if not user:
             raise ValueError("Email hoặc mật khẩu không chính xác")
         
+        await self.email_limiter.reset(email_key)
+        
         # Tạo access token
         access_token = create_access_token(
             data={"sub": str(user.id), "email": user.email}
         )
+        refresh_token = None
+        if self.session_service is not None:
+            refresh_token = await self.session_service.create_session(str(user.id), user.email)
         
-        # Chuẩn bị user response (loại bỏ hashed_password)
-        user_dict = user.model_dump(exclude={"hashed_password"})
+        # UserInDB đã được validate khi đọc từ database, dựng response không validate lại
+        public_user = UserResponse.model_construct(
+            **{field: getattr(user, field) for field in UserResponse.model_fields}
+        )
         
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user": user_dict
-        }
+        return TokenResponse.model_construct(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer",
+            user=public_user
+        )
     
-    async def update_user_info(self, update_data: UserUpdate, user_email: Optional[str] = None) -> UserResponse:
+    async def update_user_info(self, update_data: UserUpdate, user_email: str) -> UserResponse:
         """
         Cập nhật thông tin user (giới tính, ngày sinh)
         
         Args:
             update_data: Dữ liệu cần cập nhật
-            user_email: Email của user (nếu None sẽ lấy user đầu tiên từ database)
+            user_email: Email của user cần cập nhật
             
         Returns:
             UserResponse: Thông tin user sau khi cập nhật
@@ -172,38 +304,285 @@ class UserService:
         Raises:
             ValueError: Nếu không tìm thấy user
         """
-        # Tìm user để cập nhật
-        query = {}
-        if user_email:
-            query = {"email": user_email}
-        
-        # Chuẩn bị dữ liệu cập nhật
-        update_dict = {}
-        if update_data.date_of_birth is not None:
-            update_dict["date_of_birth"] = update_data.date_of_birth
-        if update_data.gender is not None:
-            update_dict["gender"] = update_data.gender
-        
+        update_dict = _build_update_dict(update_data)
         if not update_dict:
             raise ValueError("Không có thông tin nào để cập nhật")
         
-        # Cập nhật trong database
-        if query:
-            # Nếu có query cụ thể, cập nhật user đó
-            result = self.user_collection.update_one(query, {"$set": update_dict})
-            if result.matched_count == 0:
-                raise ValueError("Không tìm thấy user")
-            updated_user = self.user_collection.find_one(query)
-        else:
-            # Nếu không có query, cập nhật user đầu tiên (để test)
-            updated_user = self.user_collection.find_one({})
-            if not updated_user:
-                raise ValueError("Không tìm thấy user")
-            self.user_collection.update_one({"_id": updated_user["_id"]}, {"$set": update_dict})
-            updated_user = self.user_collection.find_one({"_id": updated_user["_id"]})
-        
-        # Convert ObjectId sang string và loại bỏ hashed_password
+        # Cập nhật và lấy document mới trong một round trip (atomic),
+        # hashed_password bị loại bỏ ngay trên server bằng projection
+        updated_user = await self.user_collection.find_one_and_update(
+            {"email": user_email},
+            {"$set": update_dict, "$inc": {"version": 1}},
+            projection=PUBLIC_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if not updated_user:
+            raise ValueError("Không tìm thấy user")
+        
+        # Convert ObjectId sang string
         updated_user["_id"] = str(updated_user["_id"])
-        updated_user.pop("hashed_password", None)
+        user = UserResponse(**updated_user)
+        
+        # Document mới đọc từ primary, ghi vào cache thay cho bản cũ
+        await self.cache.set(user, f"id:{user.id}", f"email:{user_email}")
+        
+        return user
+    
+    async def bulk_update_user_info(self, items: List[UserBulkUpdateItem]) -> BulkUpdateResponse:
+        """
+        Cập nhật thông tin nhiều user trong một lệnh bulk_write (dùng cho backfill dữ liệu)
+        
+        Args:
+            items: Danh sách bản cập nhật, mỗi bản xác định user theo email
+            
+        Returns:
+            BulkUpdateResponse: Số user khớp, số user thay đổi và các email bị bỏ qua
+        """
+        operations = []
+        emails = []
+        skipped = []
+        for item in items:
+            update_dict = _build_update_dict(item)
+            if not update_dict:
+                skipped.append(item.email)
+                continue
+            operations.append(UpdateOne({"email": item.email}, {"$set": update_dict, "$inc": {"version": 1}}))
+            emails.append(item.email)
+        
+        if not operations:
+            return BulkUpdateResponse(matched_count=0, modified_count=0, skipped=skipped)
+        
+        # ordered=False: server áp dụng song song, một bản lỗi không chặn các bản còn lại
+        result = await self.user_collection.bulk_write(operations, ordered=False)
+        
+        # Xóa cache của các user bị ảnh hưởng (cần _id để xóa khóa theo ID)
+        cursor = self.user_collection.find({"email": {"$in": emails}}, projection={"_id": 1})
+        await self.cache.invalidate(
+            *(f"email:{email}" for email in emails),
+            *[f"id:{user['_id']}" async for user in cursor]
+        )
+        
+        return BulkUpdateResponse(
+            matched_count=result.matched_count,
+            modified_count=result.modified_count,
+            skipped=skipped
+        )
+
+    async def import_users(self, records: AsyncIterator[Record]) -> UserImportResponse:
+        """
+        Tạo user hàng loạt từ stream bản ghi (NDJSON/CSV đã parse)
+        
+        Bản ghi được xử lý theo từng chunk USER_IMPORT_CHUNK_SIZE dòng: validate bằng
+        UserCreate, hash mật khẩu trên password pool (tối đa USER_IMPORT_HASH_CONCURRENCY
+        tác vụ cùng lúc để vẫn còn worker cho đăng nhập) rồi ghi bằng một lệnh
+        insert_many không thứ tự. Stream chỉ được đọc tiếp khi chunk trước đã ghi xong,
+        nên bộ nhớ dùng không phụ thuộc kích thước file.
+        
+        Args:
+            records: Các bản ghi (số dòng, dict hoặc lỗi parse)
+            
+        Returns:
+            UserImportResponse: Số user đã tạo, số dòng lỗi và lỗi theo dòng
+            
+        Raises:
+            UserImportAborted: Nếu import dừng giữa chừng (mất kết nối database, body lỗi...);
+                các chunk trước đó đã được ghi và có trong kết quả kèm theo
+        """
+        report = _ImportReport(settings.USER_IMPORT_MAX_ERRORS)
+        semaphore = asyncio.Semaphore(settings.USER_IMPORT_HASH_CONCURRENCY)
+        chunk: List[Tuple[int, UserCreate]] = []
+        
+        try:
+            async for row, value in records:
+                if isinstance(value, Exception):
+                    report.add_error(row, None, str(value))
+                    continue
+                try:
+                    chunk.append((row, UserCreate.model_validate(value)))
+                except ValidationError as e:
+                    report.add_error(row, value.get("email"), _validation_message(e))
+                    continue
+                if len(chunk) >= settings.USER_IMPORT_CHUNK_SIZE:
+                    await self._import_chunk(chunk, semaphore, report)
+                    chunk = []
+            
+            if chunk:
+                await self._import_chunk(chunk, semaphore, report)
+        except Exception as e:
+            raise UserImportAborted(report.response(aborted=str(e))) from e
+        return report.response()
+    
+    async def _import_chunk(
+        self,
+        chunk: List[Tuple[int, UserCreate]],
+        semaphore: asyncio.Semaphore,
+        report: "_ImportReport"
+    ):
+        """Hash mật khẩu và insert một chunk user đã validate"""
+        # Một truy vấn $in cho cả chunk: dòng có email đã tồn tại (hoặc trùng dòng trước trong
+        # chunk) bị báo lỗi ngay, không tốn một lần bcrypt
+        existing = {
+            document["email"]
+            async for document in self.user_collection.find(
+                {"email": {"$in": [user.email for _, user in chunk]}},
+                projection={"_id": 0, "email": 1}
+            )
+        }
+        pending: List[Tuple[int, UserCreate]] = []
+        for row, user in chunk:
+            if user.email in existing:
+                report.add_error(row, user.email, "Email đã được sử dụng")
+                continue
+            existing.add(user.email)
+            pending.append((row, user))
+        if not pending:
+            return
+        
+        async def hash_password(password: str) -> str:
+            async with semaphore:
+                while True:
+                    try:
+                        return await get_password_hash_async(password)
+                    except PoolSaturatedError as e:
+                        # Pool đang bận với đăng nhập/đăng ký: chờ rồi thử lại thay vì làm hỏng dòng
+                        await asyncio.sleep(e.retry_after)
+        
+        hashes = await asyncio.gather(*(hash_password(user.password) for _, user in pending))
+        documents = [_user_document(user, hashed) for (_, user), hashed in zip(pending, hashes)]
+        
+        try:
+            # ordered=False: dòng trùng email (user được tạo đồng thời) không chặn các dòng còn lại
+            result = await self.user_collection.insert_many(documents, ordered=False)
+            report.inserted += len(result.inserted_ids)
+        except BulkWriteError as e:
+            report.inserted += e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                row, user = pending[error["index"]]
+                message = "Email đã được sử dụng" if error.get("code") == 11000 else error.get("errmsg", "Lỗi ghi")
+                report.add_error(row, user.email, message)
+    
+    async def export_users(self, fmt: str) -> AsyncIterator[bytes]:
+        """
+        Xuất toàn bộ user (dạng UserResponse) theo từng batch từ cursor MongoDB
         
-        return UserResponse(**updated_user)
+        Mỗi batch USER_EXPORT_BATCH_SIZE user được serialize thành một chunk bytes,
+        không đọc cả collection vào bộ nhớ. Đọc từ secondary nếu được cấu hình.
+        
+        Args:
+            fmt: "ndjson" hoặc "csv" (có dòng header)
+            
+        Returns:
+            Async iterator các chunk bytes của file
+        """
+        batch_size = settings.USER_EXPORT_BATCH_SIZE
+        columns = [field.alias or name for name, field in UserResponse.model_fields.items()]
+        cursor = self.read_collection.find({}, projection=PUBLIC_PROJECTION, sort=[("_id", ASCENDING)])
+        cursor = cursor.batch_size(batch_size)
+        
+        batch: List[UserResponse] = []
+        if fmt == "csv":
+            yield _csv_line(columns)
+        async for user in cursor:
+            user["_id"] = str(user["_id"])
+            batch.append(UserResponse.model_validate(user))
+            if len(batch) >= batch_size:
+                yield _serialize_users(batch, fmt, columns)
+                batch = []
+        if batch:
+            yield _serialize_users(batch, fmt, columns)
+
+
+class _ImportReport:
+    """Kết quả import đang tích lũy (số lỗi lưu lại bị giới hạn để không tăng bộ nhớ theo file)"""
+    
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[UserImportError] = []
+    
+    def add_error(self, row: int, email: Optional[str], message: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(UserImportError(row=row, email=email if isinstance(email, str) else None, error=message))
+    
+    def response(self, aborted: Optional[str] = None) -> UserImportResponse:
+        self.errors.sort(key=lambda error: error.row)
+        return UserImportResponse(
+            inserted=self.inserted,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+            aborted=aborted
+        )
+
+
+def _validation_message(error: ValidationError) -> str:
+    """Gộp lỗi validate của pydantic thành một dòng"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+
+def _csv_line(values: List[Any]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _csv_value(value: Any) -> Any:
+    """Giá trị một ô CSV: None thành ô rỗng, bool viết như JSON (true/false)"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def _serialize_users(users: List[UserResponse], fmt: str, columns: List[str]) -> bytes:
+    """Serialize một batch user thành NDJSON hoặc các dòng CSV"""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        for user in users:
+            data = user.model_dump(mode="json", by_alias=True)
+            writer.writerow([_csv_value(data[column]) for column in columns])
+        return buffer.getvalue().encode("utf-8")
+    return b"".join(
+        UserResponse.__pydantic_serializer__.to_json(user, by_alias=True) + b"\n" for user in users
+    )
+
+
+def _user_document(user_data: UserCreate, hashed_password: str) -> Dict[str, Any]:
+    """Document user mới để lưu vào database"""
+    return {
+        "full_name": user_data.full_name,
+        "email": user_data.email,
+        "date_of_birth": user_data.date_of_birth,
+        "gender": user_data.gender,
+        "hashed_password": hashed_password,
+        "is_admin": False,
+        "created_at": _now_ms(),
+        "version": 1
+    }
+
+
+def _build_update_dict(update_data: UserUpdate) -> Dict[str, Any]:
+    """Chuẩn bị dữ liệu $set từ các field được cung cấp"""
+    update_dict = {}
+    if update_data.date_of_birth is not None:
+        update_dict["date_of_birth"] = update_data.date_of_birth
+    if update_data.gender is not None:
+        update_dict["gender"] = update_data.gender
+    return update_dict
+
+
+def _now_ms() -> datetime:
+    """Thời gian hiện tại (UTC) làm tròn tới millisecond như BSON datetime lưu trong MongoDB"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+register_indexes(UserService.collection_name, [
+    IndexModel([("email", ASCENDING)], unique=True, name="email_unique")
+])
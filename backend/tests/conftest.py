@@ -0,0 +1,72 @@
+"""
+Fixture dùng chung cho test
+
+Test chạy trên mongomock (benchmarks/mongomock_async.py), không cần mongod. Biến
+môi trường được đặt trước khi import ứng dụng vì settings đọc .env ở lần dùng đầu.
+
+Yêu cầu: pip install -r requirements-dev.txt
+"""
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production")
+os.environ["DATABASE_NAME"] = "smart_sport_test"
+os.environ["BCRYPT_ROUNDS"] = "4"
+# mongomock không có change stream và transaction
+os.environ["SEARCH_USE_CHANGE_STREAM"] = "false"
+os.environ["ORDER_USE_TRANSACTIONS"] = "false"
+os.environ["IMAGE_INDEX_DIR"] = tempfile.mkdtemp(prefix="test_image_index_")
+os.environ["THUMBNAIL_CACHE_DIR"] = tempfile.mkdtemp(prefix="test_thumbnails_")
+os.environ["IMAGE_UPLOAD_MAX_BYTES"] = str(256 * 1024)
+
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.mongomock_async import AsyncMockClient, AsyncMockDatabase
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+def mock_client() -> AsyncMockClient:
+    """Client mongomock rỗng cho mỗi test"""
+    return AsyncMockClient()
+
+
+@pytest.fixture
+def mock_db(mock_client: AsyncMockClient) -> AsyncMockDatabase:
+    """Database rỗng, đã có các index khai báo qua register_indexes"""
+    import services  # noqa: F401 (các service khai báo index khi import)
+    from database import _registered_indexes
+
+    database = mock_client["smart_sport_test"]
+
+    async def create_indexes():
+        for collection_name, indexes in _registered_indexes().items():
+            # mongomock bỏ qua partialFilterExpression: index unique một phần sẽ chặn cả document thiếu field
+            supported = [index for index in indexes if "partialFilterExpression" not in index.document]
+            if supported:
+                await database[collection_name].create_indexes(supported)
+
+    asyncio.run(create_indexes())
+    return database
+
+
+@pytest.fixture
+def client(mock_client: AsyncMockClient, mock_db: AsyncMockDatabase):
+    """TestClient của ứng dụng, dùng `mock_db` thay cho MongoDB"""
+    from database import db
+    from main import app
+    from services import catalog_cache
+
+    # Đặt sẵn client để lifespan không tạo AsyncMongoClient thật (giống benchmarks/bench_api.py)
+    db.client = mock_client
+    db.database = mock_db
+    # Cache trang danh mục là singleton của process: không dùng lại trang của test trước
+    catalog_cache.invalidate()
+    with TestClient(app) as test_client:
+        yield test_client
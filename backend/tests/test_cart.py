@@ -0,0 +1,116 @@
+import pytest
+from bson import ObjectId
+from models import MAX_LINE_QUANTITY
+from services import CartService, CartConflictError, ProductService
+from utils import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def products(mock_db):
+    result = await mock_db[ProductService.collection_name].insert_many([
+        {"name": "Bóng đá", "image": "/images/ball.jpg", "price": 100.0, "stock": 10, "description": "..."},
+        {"name": "Giày chạy", "image": "/images/shoe.jpg", "price": 250.0, "stock": 5, "description": "..."}
+    ])
+    return [str(product_id) for product_id in result.inserted_ids]
+
+
+@pytest.fixture
+def cart_service(mock_db) -> CartService:
+    return CartService(mock_db[CartService.collection_name], mock_db[ProductService.collection_name])
+
+
+async def test_get_cart_prices_lines_with_current_prices(cart_service, mock_db, products):
+    await cart_service.add_item("u1", products[0], 2)
+    await cart_service.add_item("u1", products[1], 1)
+    await mock_db[ProductService.collection_name].update_one(
+        {"_id": ObjectId(products[0])}, {"$set": {"price": 120.0}}
+    )
+
+    cart = await cart_service.get_cart("u1")
+
+    assert [line.product_id for line in cart.items] == products
+    assert [line.line_total for line in cart.items] == [240.0, 250.0]
+    assert cart.subtotal == 490.0
+    assert cart.total_quantity == 3
+    assert cart.version == 2
+
+
+async def test_get_cart_marks_deleted_products_unavailable(cart_service, mock_db, products):
+    await cart_service.add_item("u1", products[0], 1)
+    await cart_service.add_item("u1", products[1], 1)
+    await mock_db[ProductService.collection_name].delete_one({"_id": ObjectId(products[1])})
+
+    cart = await cart_service.get_cart("u1")
+
+    assert [line.available for line in cart.items] == [True, False]
+    assert cart.subtotal == 100.0
+
+
+async def test_get_cart_without_cart_is_empty(cart_service):
+    cart = await cart_service.get_cart("nobody")
+    assert cart.items == [] and cart.version == 0
+
+
+async def test_add_same_product_merges_line(cart_service, products):
+    await cart_service.add_item("u1", products[0], 1)
+    cart = await cart_service.add_item("u1", products[0], 3)
+
+    assert len(cart.items) == 1
+    assert cart.items[0].quantity == 4
+    assert cart.version == 2
+
+
+async def test_add_rejects_quantity_over_line_limit(cart_service, products):
+    await cart_service.add_item("u1", products[0], MAX_LINE_QUANTITY)
+    with pytest.raises(ValueError):
+        await cart_service.add_item("u1", products[0], 1)
+
+
+async def test_stale_version_conflicts_and_returns_current_cart(cart_service, products):
+    await cart_service.add_item("u1", products[0], 1)
+    # Tab khác sửa giỏ: version 1 -> 2
+    await cart_service.add_item("u1", products[1], 1)
+
+    with pytest.raises(CartConflictError) as conflict:
+        await cart_service.update_item("u1", products[0], 5, expected_version=1)
+
+    assert conflict.value.cart.version == 2
+    assert conflict.value.cart.items[0].quantity == 1
+
+
+async def test_matching_version_applies_change(cart_service, products):
+    cart = await cart_service.add_item("u1", products[0], 1)
+
+    cart = await cart_service.update_item("u1", products[0], 5, expected_version=cart.version)
+
+    assert cart.items[0].quantity == 5
+    assert cart.version == 2
+
+
+@pytest.mark.parametrize("operation", ["add", "remove", "clear"])
+async def test_every_mutation_checks_version(cart_service, products, operation):
+    await cart_service.add_item("u1", products[0], 1)
+    await cart_service.add_item("u1", products[1], 1)
+
+    with pytest.raises(CartConflictError):
+        if operation == "add":
+            await cart_service.add_item("u1", products[0], 1, expected_version=1)
+        elif operation == "remove":
+            await cart_service.remove_item("u1", products[0], expected_version=1)
+        else:
+            await cart_service.clear_cart("u1", expected_version=1)
+
+    assert (await cart_service.get_cart("u1")).version == 2
+
+
+async def test_route_returns_409_with_current_cart(client, products):
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'u1', 'email': 'u1@example.com'})}"}
+    assert client.post("/api/cart/items", json={"product_id": products[0]}, headers=headers).json()["version"] == 1
+    client.post("/api/cart/items", json={"product_id": products[1]}, headers=headers)
+
+    response = client.patch(f"/api/cart/items/{products[0]}", json={"quantity": 3, "version": 1}, headers=headers)
+
+    assert response.status_code == 409
+    assert response.json()["cart"]["version"] == 2
@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from models import ProductQuery
+from services import ProductService, catalog_cache
+from services.product_service import CatalogCache
+
+
+@pytest.fixture
+def product_ids(client, mock_db):
+    result = asyncio.run(mock_db[ProductService.collection_name].insert_many([
+        {
+            "name": f"Sản phẩm {i}", "price": 100.0 * (i + 1), "image": "/images/p.jpg", "category": "Bóng đá",
+            "rating": 4.0, "sold": i, "stock": 10, "version": 0
+        }
+        for i in range(3)
+    ]))
+    return [str(product_id) for product_id in result.inserted_ids]
+
+
+def _set(mock_db, product_id: str, **fields):
+    asyncio.run(mock_db[ProductService.collection_name].update_one(
+        {"_id": ObjectId(product_id)}, {"$set": fields, "$inc": {"version": 1}}
+    ))
+
+
+def test_catalog_etag_and_304(client, product_ids):
+    response = client.get("/api/products")
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+
+    not_modified = client.get("/api/products", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+
+def test_product_etag_follows_version(client, mock_db, product_ids):
+    etag = client.get(f"/api/products/{product_ids[0]}").headers["ETag"]
+    assert client.get(f"/api/products/{product_ids[0]}", headers={"If-None-Match": etag}).status_code == 304
+
+    _set(mock_db, product_ids[0], price=1.0)
+
+    response = client.get(f"/api/products/{product_ids[0]}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_anonymous_catalog_page_is_cached_until_product_changes(client, mock_db, product_ids):
+    first = client.get("/api/products").json()
+    # Ghi thẳng vào database: không có thông báo thay đổi nên trang vẫn lấy từ cache
+    _set(mock_db, product_ids[0], name="Tên mới")
+    assert client.get("/api/products").json() == first
+
+    catalog_cache.on_product_change(product_ids[0], {"name", "version", "updated_at"})
+
+    names = [item["name"] for item in client.get("/api/products").json()["items"]]
+    assert "Tên mới" in names
+
+
+def test_authenticated_requests_bypass_catalog_cache(client, mock_db, product_ids):
+    client.get("/api/products")
+    _set(mock_db, product_ids[0], name="Tên mới")
+
+    response = client.get("/api/products", headers={"Authorization": "Bearer anything"})
+
+    assert "Tên mới" in [item["name"] for item in response.json()["items"]]
+
+
+def _filled_cache():
+    cache = CatalogCache(maxsize=10, ttl=60)
+    newest = cache.key(ProductQuery())
+    best_selling = cache.key(ProductQuery(sort="best_selling"))
+    for key in (newest, best_selling):
+        cache.set(key, ("etag", b"{}"), cache.generation(key))
+    return cache, newest, best_selling
+
+
+@pytest.mark.parametrize("fields, newest_kept, best_selling_kept", [
+    ({"stock", "version", "updated_at"}, True, True),
+    ({"views", "clicks"}, True, True),
+    ({"description", "version", "updated_at"}, True, True),
+    ({"sold", "stock", "version", "updated_at"}, True, False),
+    ({"price", "version", "updated_at"}, False, False),
+    (None, False, False),
+])
+def test_catalog_cache_invalidation_by_changed_fields(fields, newest_kept, best_selling_kept):
+    cache, newest, best_selling = _filled_cache()
+
+    cache.on_product_change("p1", fields)
+
+    assert (cache.get(newest) is not None) == newest_kept
+    assert (cache.get(best_selling) is not None) == best_selling_kept
+
+
+def test_catalog_cache_skips_pages_read_before_invalidation():
+    cache = CatalogCache(maxsize=10, ttl=60)
+    key = cache.key(ProductQuery())
+    generation = cache.generation(key)
+
+    # Sản phẩm đổi trong lúc trang đang được đọc từ database
+    cache.invalidate()
+    cache.set(key, ("etag", b"{}"), generation)
+
+    assert cache.get(key) is None
+
+
+def test_catalog_cache_key_ignores_parameter_order():
+    assert CatalogCache.key(ProductQuery(category="Bóng đá", limit=12)) == CatalogCache.key(ProductQuery(limit=12, category="Bóng đá"))
@@ -0,0 +1,123 @@
+import pytest
+from bson import ObjectId
+from database import _registered_indexes
+from services import CartService, CartConflictError, OrderService, OutOfStockError, ProductService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def products(mock_db):
+    result = await mock_db[ProductService.collection_name].insert_many([
+        {"name": "Bóng đá", "image": "/images/ball.jpg", "price": 100.0, "stock": 10, "sold": 0, "version": 0},
+        {"name": "Giày chạy", "image": "/images/shoe.jpg", "price": 250.0, "stock": 1, "sold": 0, "version": 0}
+    ])
+    return [str(product_id) for product_id in result.inserted_ids]
+
+
+@pytest.fixture
+def cart_service(mock_db) -> CartService:
+    return CartService(mock_db[CartService.collection_name], mock_db[ProductService.collection_name])
+
+
+@pytest.fixture
+def order_service(mock_db) -> OrderService:
+    return OrderService(
+        mock_db[OrderService.collection_name],
+        mock_db[ProductService.collection_name],
+        mock_db[CartService.collection_name],
+        use_transactions=False
+    )
+
+
+async def _stock(mock_db, product_id: str) -> dict:
+    return await mock_db[ProductService.collection_name].find_one(
+        {"_id": ObjectId(product_id)}, projection={"stock": 1, "sold": 1}
+    )
+
+
+async def test_checkout_reserves_stock_and_clears_cart(order_service, cart_service, mock_db, products):
+    await cart_service.add_item("u1", products[0], 3)
+    await cart_service.add_item("u1", products[1], 1)
+
+    order, created = await order_service.checkout("u1")
+
+    assert created
+    assert order.total == 550.0 and order.total_quantity == 4
+    assert await _stock(mock_db, products[0]) == {"_id": ObjectId(products[0]), "stock": 7, "sold": 3}
+    assert await _stock(mock_db, products[1]) == {"_id": ObjectId(products[1]), "stock": 0, "sold": 1}
+    assert (await cart_service.get_cart("u1")).items == []
+
+
+async def test_same_idempotency_key_returns_the_first_order(order_service, cart_service, mock_db, products):
+    # Mọi đơn trong test đều có khóa: mongomock tạo được index unique (không hỗ trợ partial filter)
+    await mock_db[OrderService.collection_name].create_indexes(_registered_indexes()[OrderService.collection_name])
+    await cart_service.add_item("u1", products[0], 2)
+
+    first, first_created = await order_service.checkout("u1", idempotency_key="key-1")
+    # Giỏ đã trống: nếu không nhận ra khóa, lần gửi lại sẽ báo lỗi giỏ trống thay vì trả đơn cũ
+    retry, retry_created = await order_service.checkout("u1", idempotency_key="key-1")
+
+    assert first_created and not retry_created
+    assert retry.id == first.id
+    assert await mock_db[OrderService.collection_name].count_documents({}) == 1
+    assert (await _stock(mock_db, products[0]))["stock"] == 8
+
+
+async def test_idempotency_key_is_scoped_per_user(order_service, cart_service, products):
+    await cart_service.add_item("u1", products[0], 1)
+    await cart_service.add_item("u2", products[0], 1)
+
+    first, _ = await order_service.checkout("u1", idempotency_key="same")
+    second, created = await order_service.checkout("u2", idempotency_key="same")
+
+    assert created and second.id != first.id
+
+
+async def test_out_of_stock_releases_reserved_lines(order_service, cart_service, mock_db, products):
+    await cart_service.add_item("u1", products[0], 2)
+    await cart_service.add_item("u1", products[1], 2)
+
+    with pytest.raises(OutOfStockError) as shortage:
+        await order_service.checkout("u1")
+
+    assert shortage.value.product_ids == [products[1]]
+    # Dòng đầu đã bị trừ rồi được hoàn lại
+    assert await _stock(mock_db, products[0]) == {"_id": ObjectId(products[0]), "stock": 10, "sold": 0}
+    assert await _stock(mock_db, products[1]) == {"_id": ObjectId(products[1]), "stock": 1, "sold": 0}
+    assert await mock_db[OrderService.collection_name].count_documents({}) == 0
+    assert len((await cart_service.get_cart("u1")).items) == 2
+
+
+async def test_cart_changed_during_checkout_compensates(order_service, cart_service, mock_db, products):
+    await cart_service.add_item("u1", products[0], 2)
+    clear_cart = order_service._clear_cart
+
+    async def clear_after_concurrent_edit(user_id, version, session):
+        # Tab khác sửa giỏ sau khi checkout đã đọc giỏ và trừ kho
+        await cart_service.add_item(user_id, products[1], 1)
+        await clear_cart(user_id, version, session)
+
+    order_service._clear_cart = clear_after_concurrent_edit
+
+    with pytest.raises(CartConflictError):
+        await order_service.checkout("u1")
+
+    assert await _stock(mock_db, products[0]) == {"_id": ObjectId(products[0]), "stock": 10, "sold": 0}
+    assert await mock_db[OrderService.collection_name].count_documents({}) == 0
+    assert len((await cart_service.get_cart("u1")).items) == 2
+
+
+async def test_stale_cart_version_places_nothing(order_service, cart_service, mock_db, products):
+    await cart_service.add_item("u1", products[0], 1)
+
+    with pytest.raises(CartConflictError):
+        await order_service.checkout("u1", expected_version=0)
+
+    assert (await _stock(mock_db, products[0]))["stock"] == 10
+    assert await mock_db[OrderService.collection_name].count_documents({}) == 0
+
+
+async def test_empty_cart_is_rejected(order_service):
+    with pytest.raises(ValueError):
+        await order_service.checkout("u1")
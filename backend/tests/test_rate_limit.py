@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from config import settings
+from utils import MemoryRateLimitBackend, RateLimitExceeded, SlidingWindowLimiter
+from utils import rate_limit
+
+pytestmark = pytest.mark.anyio
+
+
+class _Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    # Đầu một cửa sổ 60 giây
+    clock = _Clock(600_000.0)
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def limiter() -> SlidingWindowLimiter:
+    return SlidingWindowLimiter("test", MemoryRateLimitBackend(maxsize=100), limit=3, window=60)
+
+
+async def test_rejects_after_limit(limiter, clock):
+    for _ in range(3):
+        await limiter.acquire("k")
+
+    with pytest.raises(RateLimitExceeded) as exceeded:
+        await limiter.acquire("k")
+
+    assert exceeded.value.retry_after >= 1
+    # Khóa khác không bị ảnh hưởng
+    await limiter.acquire("other")
+
+
+async def test_rejected_attempts_are_not_counted(limiter, clock):
+    for _ in range(3):
+        await limiter.acquire("k")
+    for _ in range(5):
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire("k")
+
+    assert await limiter.backend.counts("k", int(clock.now // 60)) == (0, 3)
+
+
+async def test_concurrent_acquires_never_exceed_limit(limiter, clock):
+    results = await asyncio.gather(*(limiter.acquire("k") for _ in range(20)), return_exceptions=True)
+
+    assert sum(result is None for result in results) == 3
+    assert all(isinstance(result, RateLimitExceeded) for result in results if result is not None)
+
+
+async def test_previous_window_is_weighted(limiter, clock):
+    for _ in range(3):
+        await limiter.acquire("k")
+
+    # Đúng đầu cửa sổ sau: 3 lần của cửa sổ trước vẫn được tính đủ
+    clock.now += 60
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire("k")
+
+    # Cuối cửa sổ sau: phần cửa sổ trước còn lại nhỏ, được phép tiếp
+    clock.now += 50
+    await limiter.acquire("k")
+
+    # Hai cửa sổ sau: không còn tính lần nào
+    clock.now += 120
+    for _ in range(3):
+        await limiter.acquire("k")
+
+
+async def test_retry_after_is_enough(limiter, clock):
+    for _ in range(3):
+        await limiter.acquire("k")
+    with pytest.raises(RateLimitExceeded) as exceeded:
+        await limiter.acquire("k")
+
+    clock.now += exceeded.value.retry_after
+    await limiter.acquire("k")
+
+
+async def test_reset_clears_key(limiter, clock):
+    for _ in range(3):
+        await limiter.acquire("k")
+
+    await limiter.reset("k")
+
+    await limiter.acquire("k")
+
+
+async def test_check_does_not_count(limiter, clock):
+    for _ in range(5):
+        await limiter.check("k")
+    for _ in range(3):
+        await limiter.acquire("k")
+
+    with pytest.raises(RateLimitExceeded):
+        await limiter.check("k")
+
+
+async def test_memory_backend_bounds_keys(clock):
+    limiter = SlidingWindowLimiter("test", MemoryRateLimitBackend(maxsize=2), limit=1, window=60)
+    await limiter.acquire("a")
+    await limiter.acquire("b")
+    await limiter.acquire("c")
+
+    assert len(limiter.backend._data) == 2
+    # Khóa ít dùng nhất đã bị loại
+    await limiter.acquire("a")
+
+
+def test_login_returns_429_after_email_limit(client):
+    email = "limited@example.com"
+    client.post("/api/auth/register", json={"full_name": "Nguyễn Văn A", "email": email, "password": "secret1"})
+
+    statuses = [
+        client.post("/api/auth/login", json={"email": email, "password": "wrong-password"}).status_code
+        for _ in range(settings.LOGIN_RATE_LIMIT_PER_EMAIL)
+    ]
+    response = client.post("/api/auth/login", json={"email": email, "password": "secret1"})
+
+    assert set(statuses) == {401}
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from config import settings
+from services import SessionService, RefreshTokenReuseError
+from utils import decode_access_token, hash_refresh_secret
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def session_service(mock_db) -> SessionService:
+    return SessionService(mock_db[SessionService.collection_name])
+
+
+async def test_refresh_rotates_token(session_service):
+    token = await session_service.create_session("u1", "u1@example.com")
+
+    response = await session_service.refresh(token)
+
+    assert response.refresh_token != token
+    assert response.refresh_token.split(".")[0] == token.split(".")[0]
+    assert decode_access_token(response.access_token)["sub"] == "u1"
+    # Token mới dùng được cho lần refresh tiếp theo
+    await session_service.refresh(response.refresh_token)
+
+
+async def test_database_stores_only_hashes(session_service, mock_db):
+    token = await session_service.create_session("u1", "u1@example.com")
+    new_token = (await session_service.refresh(token)).refresh_token
+
+    session = await mock_db[SessionService.collection_name].find_one({})
+
+    assert session["token_hash"] == hash_refresh_secret(new_token.split(".")[1])
+    assert session["retired_hashes"] == [hash_refresh_secret(token.split(".")[1])]
+    assert token.split(".")[1] not in str(session)
+
+
+async def test_reusing_previous_token_revokes_session(session_service, mock_db):
+    first = await session_service.create_session("u1", "u1@example.com")
+    second = (await session_service.refresh(first)).refresh_token
+
+    with pytest.raises(RefreshTokenReuseError):
+        await session_service.refresh(first)
+
+    assert await mock_db[SessionService.collection_name].count_documents({}) == 0
+    with pytest.raises(ValueError):
+        await session_service.refresh(second)
+
+
+async def test_reuse_is_detected_after_several_rotations(session_service):
+    # Kẻ đánh cắp đổi token hai lần trước khi người dùng thật quay lại với token cũ
+    stolen = await session_service.create_session("u1", "u1@example.com")
+    attacker = (await session_service.refresh(stolen)).refresh_token
+    attacker = (await session_service.refresh(attacker)).refresh_token
+
+    with pytest.raises(RefreshTokenReuseError):
+        await session_service.refresh(stolen)
+    with pytest.raises(ValueError):
+        await session_service.refresh(attacker)
+
+
+async def test_wrong_secret_does_not_revoke(session_service):
+    token = await session_service.create_session("u1", "u1@example.com")
+    session_id = token.split(".")[0]
+
+    with pytest.raises(ValueError) as error:
+        await session_service.refresh(f"{session_id}.not-the-secret")
+
+    assert not isinstance(error.value, RefreshTokenReuseError)
+    await session_service.refresh(token)
+
+
+@pytest.mark.parametrize("token", ["", "abc", "not-an-id.secret", f"{ObjectId()}."])
+async def test_malformed_token_is_rejected(session_service, token):
+    with pytest.raises(ValueError):
+        await session_service.refresh(token)
+
+
+async def test_session_has_absolute_lifetime(session_service, mock_db):
+    token = await session_service.create_session("u1", "u1@example.com")
+    # Vẫn refresh đều (expires_at còn hạn) nhưng đã quá SESSION_MAX_DAYS kể từ lúc đăng nhập
+    await mock_db[SessionService.collection_name].update_one({}, {"$set": {
+        "created_at": datetime.utcnow() - timedelta(days=settings.SESSION_MAX_DAYS, seconds=1),
+        "expires_at": datetime.utcnow() + timedelta(days=1)
+    }})
+
+    with pytest.raises(ValueError):
+        await session_service.refresh(token)
+
+
+async def test_idle_session_expires(session_service, mock_db):
+    token = await session_service.create_session("u1", "u1@example.com")
+    await mock_db[SessionService.collection_name].update_one(
+        {}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+
+    with pytest.raises(ValueError):
+        await session_service.refresh(token)
+
+
+async def test_revoke_only_with_current_token_of_owner(session_service):
+    token = await session_service.create_session("u1", "u1@example.com")
+
+    assert not await session_service.revoke(token, user_id="u2")
+    assert await session_service.revoke(token, user_id="u1")
+    with pytest.raises(ValueError):
+        await session_service.refresh(token)
+
+
+def test_refresh_route_returns_401_on_reuse(client):
+    client.post("/api/auth/register", json={"full_name": "Nguyễn Văn A", "email": "a@example.com", "password": "secret1"})
+    first = client.post("/api/auth/login", json={"email": "a@example.com", "password": "secret1"}).json()["refresh_token"]
+
+    assert client.post("/api/auth/refresh", json={"refresh_token": first}).status_code == 200
+    assert client.post("/api/auth/refresh", json={"refresh_token": first}).status_code == 401
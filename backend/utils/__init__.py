@@ -2,12 +2,105 @@ from .auth import (
     verify_password,
     get_password_hash,
     create_access_token,
-    decode_access_token
+    decode_access_token,
+    verify_access_token,
+    revoke_access_token,
+    new_refresh_secret,
+    hash_refresh_secret,
+    token_cache,
+    revoked_tokens,
+    verify_password_async,
+    get_password_hash_async,
+    verify_dummy_password_async,
+    password_needs_rehash,
+    password_pool
 )
+from .cache import (
+    TTLCache,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ReadThroughCache,
+    create_cache_backend
+)
+from .metrics import (
+    registry as metrics_registry,
+    register_cache_metrics,
+    set_const_labels as set_metrics_labels,
+    mongo_command_listener,
+    MetricsMiddleware,
+    CallbackMetric,
+    CONTENT_TYPE_LATEST
+)
+from .responses import ORJSONResponse, model_response, dump_model
+from .http_cache import weak_etag, content_etag, etag_matches, conditional_response, CacheControlMiddleware
+from .revocation import RevocationListFull, MemoryRevocationBackend, RedisRevocationBackend
+from .rate_limit import (
+    RateLimitExceeded,
+    MemoryRateLimitBackend,
+    RedisRateLimitBackend,
+    SlidingWindowLimiter,
+    create_rate_limit_backend
+)
+from .streaming import iter_lines, iter_ndjson, iter_csv
+from .files import UploadTooLargeError, BodySizeLimitMiddleware, check_upload_size, safe_join
+from .pagination import encode_cursor, decode_cursor
+from .worker_pool import BoundedWorkerPool, PoolSaturatedError
+from .lazy import LazyObject
 
 __all__ = [
     verify_password,
     get_password_hash,
     create_access_token,
-    decode_access_token
+    decode_access_token,
+    verify_access_token,
+    revoke_access_token,
+    new_refresh_secret,
+    hash_refresh_secret,
+    token_cache,
+    revoked_tokens,
+    verify_password_async,
+    get_password_hash_async,
+    verify_dummy_password_async,
+    password_needs_rehash,
+    password_pool,
+    TTLCache,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ReadThroughCache,
+    create_cache_backend,
+    metrics_registry,
+    register_cache_metrics,
+    set_metrics_labels,
+    mongo_command_listener,
+    MetricsMiddleware,
+    CallbackMetric,
+    CONTENT_TYPE_LATEST,
+    ORJSONResponse,
+    model_response,
+    dump_model,
+    weak_etag,
+    content_etag,
+    etag_matches,
+    conditional_response,
+    CacheControlMiddleware,
+    RevocationListFull,
+    MemoryRevocationBackend,
+    RedisRevocationBackend,
+    RateLimitExceeded,
+    MemoryRateLimitBackend,
+    RedisRateLimitBackend,
+    SlidingWindowLimiter,
+    create_rate_limit_backend,
+    iter_lines,
+    iter_ndjson,
+    iter_csv,
+    UploadTooLargeError,
+    BodySizeLimitMiddleware,
+    check_upload_size,
+    safe_join,
+    encode_cursor,
+    decode_cursor,
+    BoundedWorkerPool,
+    PoolSaturatedError,
+    LazyObject
 ]
\ No newline at end of file
@@ -1,13 +1,37 @@
-from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
 from config import settings
+from .cache import TTLCache
+from .lazy import LazyObject
+from .metrics import jwt_duration, password_hash_duration, password_pool_wait, timed_call
+from .revocation import create_revocation_backend
+from .worker_pool import BoundedWorkerPool
 import bcrypt
+import hashlib
+import hmac
+import secrets
+import time
+import uuid
+
+
+# Pool chạy bcrypt ngoài event loop (bcrypt nhả GIL nên thread pool là đủ)
+password_pool = LazyObject(lambda: BoundedWorkerPool(
+    kind=settings.PASSWORD_POOL_KIND,
+    max_workers=settings.PASSWORD_POOL_WORKERS,
+    max_queue=settings.PASSWORD_POOL_MAX_QUEUE,
+    retry_after=settings.PASSWORD_POOL_RETRY_AFTER
+))
+
+# Claims của các token đã verify, khóa là SHA-256 của token
+token_cache = LazyObject(lambda: TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS))
+
+# jti của các token đã thu hồi, giữ tới đúng exp của từng token (memory hoặc Redis theo CACHE_BACKEND)
+revoked_tokens = LazyObject(create_revocation_backend)
 
 
 def hash_password(password: str) -> bytes:
     """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -21,7 +45,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True nếu mật khẩu đúng, False nếu sai
     """
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return _checkpw(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -34,7 +58,83 @@ def get_password_hash(password: str) -> str:
     Returns:
         Mật khẩu đã được hash (string)
     """
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return _hashpw(password, settings.BCRYPT_ROUNDS)
+
+
+def _hashpw(password: str, rounds: int) -> str:
+    # Hàm module-level để có thể pickle khi chạy trên process pool
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify mật khẩu trên password pool (không chặn event loop)
+    
+    Raises:
+        PoolSaturatedError: Nếu password pool đã đầy
+    """
+    return await _run_timed("verify", _checkpw, plain_password, hashed_password)
+
+
+# Hash giả có cùng cost với hash thật, tạo khi cần lần đầu (không làm chậm khởi động)
+_dummy_hash: Optional[str] = None
+
+
+async def verify_dummy_password_async(plain_password: str) -> bool:
+    """
+    Verify mật khẩu với một hash giả khi email không tồn tại
+    
+    Đăng nhập với email không tồn tại tốn cùng một lần bcrypt như email có thật,
+    nên thời gian phản hồi không cho biết tài khoản nào tồn tại. Luôn trả về False.
+    
+    Raises:
+        PoolSaturatedError: Nếu password pool đã đầy
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await get_password_hash_async(uuid.uuid4().hex)
+    await verify_password_async(plain_password, _dummy_hash)
+    return False
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash mật khẩu trên password pool (không chặn event loop)
+    
+    Raises:
+        PoolSaturatedError: Nếu password pool đã đầy
+    """
+    return await _run_timed("hash", _hashpw, password, settings.BCRYPT_ROUNDS)
+
+
+async def _run_timed(operation: str, fn, *args):
+    """Chạy bcrypt trên password pool, ghi nhận riêng thời gian chạy trên worker và thời gian chờ trong hàng đợi"""
+    start = time.perf_counter()
+    result, duration = await password_pool.run(timed_call, fn, *args)
+    password_hash_duration.observe(duration, operation=operation)
+    password_pool_wait.observe(max(0.0, time.perf_counter() - start - duration), operation=operation)
+    return result
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Kiểm tra hash có được tạo với cost thấp hơn BCRYPT_ROUNDS hiện tại không
+    
+    Args:
+        hashed_password: Mật khẩu đã hash (dạng $2b$<cost>$...)
+        
+    Returns:
+        True nếu cần hash lại với cost hiện tại
+    """
+    try:
+        rounds = int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds < settings.BCRYPT_ROUNDS
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -48,6 +148,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         JWT token string
     """
+    # python-jose (kéo theo cryptography/ecdsa) chỉ được import khi cần ký/verify token lần đầu
+    from jose import jwt
+
     to_encode = data.copy()
     
     if expires_delta:
@@ -55,9 +158,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    with jwt_duration.time(operation="encode"):
+        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     return encoded_jwt
 
@@ -72,8 +176,90 @@ def decode_access_token(token: str) -> Optional[dict]:
     Returns:
         Dữ liệu đã decode hoặc None nếu token không hợp lệ
     """
+    from jose import JWTError, jwt
+
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        with jwt_duration.time(operation="decode"):
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+
+def new_refresh_secret() -> str:
+    """Tạo phần bí mật ngẫu nhiên của refresh token (256 bit, URL-safe)"""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_secret(secret: str) -> bytes:
+    """
+    HMAC-SHA256 (khóa SECRET_KEY) của phần bí mật trong refresh token
+    
+    Database chỉ lưu giá trị này: lộ collection session không lộ token dùng được,
+    và verify chỉ tốn một lần HMAC (không dùng bcrypt).
+    
+    Args:
+        secret: Phần bí mật của refresh token
+        
+    Returns:
+        Digest 32 byte
+    """
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), secret.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+async def verify_access_token(token: str) -> Optional[dict]:
+    """
+    Verify JWT token, dùng token_cache để bỏ qua HMAC và parse JSON với token đã gặp
+    
+    Entry trong cache không sống lâu hơn thời hạn (exp) của token, và token
+    đã bị thu hồi luôn bị từ chối kể cả khi còn trong cache.
+    
+    Args:
+        token: JWT token string
+        
+    Returns:
+        Claims của token hoặc None nếu token không hợp lệ, hết hạn hoặc đã bị thu hồi
+    """
+    key = _token_key(token)
+    payload = token_cache.get(key)
+    
+    if payload is None:
+        payload = decode_access_token(token)
+        if payload is None:
+            return None
+        remaining = payload.get("exp", 0) - time.time()
+        token_cache.set(key, payload, ttl=remaining)
+    elif payload.get("exp", 0) <= time.time():
+        token_cache.delete(key)
+        return None
+    
+    if payload.get("jti") and await revoked_tokens.contains(payload["jti"]):
+        return None
+    
+    return payload
+
+
+async def revoke_access_token(token: str) -> bool:
+    """
+    Thu hồi JWT token (đăng xuất), token bị từ chối tới đúng thời điểm hết hạn (exp)
+    
+    Args:
+        token: JWT token string
+        
+    Returns:
+        True nếu thu hồi thành công, False nếu token không hợp lệ
+        
+    Raises:
+        RevocationListFull: Nếu danh sách thu hồi trong bộ nhớ đã đầy token chưa hết hạn
+    """
+    payload = await verify_access_token(token)
+    if payload is None or not payload.get("jti"):
+        return False
+    
+    await revoked_tokens.add(payload["jti"], payload["exp"])
+    token_cache.delete(_token_key(token))
+    return True
@@ -0,0 +1,238 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from config import settings
+
+
+class TTLCache:
+    """
+    LRU cache có giới hạn kích thước và thời gian sống (TTL) cho từng entry
+
+    Không thread-safe: chỉ dùng trên thread của event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Lấy giá trị còn hạn, entry hết hạn được xóa và tính là miss"""
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Lưu giá trị, loại bỏ entry ít dùng nhất nếu vượt maxsize
+
+        Args:
+            key: Khóa
+            value: Giá trị
+            ttl: Thời gian sống (giây), mặc định dùng ttl của cache
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Xóa entry (nếu có)"""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Xóa toàn bộ entry"""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Số liệu hit/miss và kích thước hiện tại"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize
+        }
+
+
+class MemoryCacheBackend:
+    """Cache backend trong process (LRU + TTL)"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Any:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.cache.delete(key)
+
+    async def close(self):
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+
+class RedisCacheBackend:
+    """
+    Cache backend dùng chung giữa các worker qua Redis
+
+    `client` là bất kỳ client nào tương thích `redis.asyncio.Redis`
+    (get/set/delete/aclose), nên có thể thay bằng fake khi test.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        prefix: str,
+        ttl: float,
+        dumps: Callable[[Any], str],
+        loads: Callable[[Any], Any]
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.dumps = dumps
+        self.loads = loads
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl >= 1:
+            await self.client.set(self.prefix + key, self.dumps(value), ex=int(ttl))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def close(self):
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def create_cache_backend(
+    namespace: str,
+    maxsize: int,
+    ttl: float,
+    dumps: Callable[[Any], str],
+    loads: Callable[[Any], Any]
+):
+    """
+    Tạo cache backend theo settings.CACHE_BACKEND ("memory" hoặc "redis")
+
+    Args:
+        namespace: Tiền tố khóa khi dùng Redis
+        maxsize: Số entry tối đa (backend memory)
+        ttl: Thời gian sống mặc định (giây)
+        dumps: Hàm serialize giá trị (backend redis)
+        loads: Hàm deserialize giá trị (backend redis)
+    """
+    if settings.CACHE_BACKEND == "redis":
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis cần cài đặt package 'redis'") from e
+        if not settings.REDIS_URL:
+            raise RuntimeError("CACHE_BACKEND=redis cần cấu hình REDIS_URL")
+        client = aioredis.from_url(settings.REDIS_URL)
+        return RedisCacheBackend(client, f"{namespace}:", ttl, dumps, loads)
+    return MemoryCacheBackend(maxsize=maxsize, ttl=ttl)
+
+
+class ReadThroughCache:
+    """
+    Read-through cache: đọc từ backend, nếu miss thì gọi loader và lưu kết quả
+
+    Các lần miss đồng thời cho cùng một khóa được gộp thành một lần gọi loader
+    (single-flight), các request còn lại chờ cùng kết quả. Giá trị None không được cache.
+    """
+
+    def __init__(self, backend: Any):
+        self.backend = backend
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Lấy giá trị theo khóa, gọi `loader()` khi cache miss
+
+        Args:
+            key: Khóa cache
+            loader: Coroutine function tải giá trị từ nguồn (database)
+        """
+        value = await self.backend.get(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # shield: request đầu tiên bị hủy (client ngắt kết nối) không làm hủy lần tải của các request khác
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        # Không lưu nếu khóa đã bị invalidate/set trong lúc đang tải (giá trị vừa tải có thể đã cũ)
+        if value is not None and self._inflight.get(key) is asyncio.current_task():
+            await self.backend.set(key, value)
+            if self._inflight.get(key) is not asyncio.current_task():
+                # Bị invalidate/set trong lúc đang ghi: với Redis lệnh xóa có thể tới trước lệnh ghi
+                await self.backend.delete(key)
+        return value
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def set(self, value: Any, *keys: str):
+        """Ghi giá trị mới nhất (vừa ghi vào database) vào cache dưới các khóa"""
+        for key in keys:
+            # Kết quả đang tải có thể là dữ liệu cũ, không để request sau dùng lại
+            self._inflight.pop(key, None)
+            await self.backend.set(key, value)
+
+    async def invalidate(self, *keys: str):
+        """Xóa các khóa khỏi cache (gọi sau khi dữ liệu thay đổi)"""
+        for key in keys:
+            # Kết quả đang tải có thể là dữ liệu cũ, không để request sau dùng lại
+            self._inflight.pop(key, None)
+        await self.backend.delete(*keys)
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
@@ -0,0 +1,118 @@
+import os
+from typing import Any, Callable, Dict, Optional
+import orjson
+from fastapi import UploadFile
+
+
+class UploadTooLargeError(Exception):
+    """Lỗi khi file upload vượt quá dung lượng cho phép"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File vượt quá dung lượng cho phép ({max_bytes // (1024 * 1024)} MB)")
+        self.max_bytes = max_bytes
+
+
+def safe_join(root: str, relative: str) -> Optional[str]:
+    """
+    Đường dẫn tuyệt đối của `relative` bên trong thư mục `root`
+
+    Args:
+        root: Thư mục gốc
+        relative: Đường dẫn tương đối (có thể bắt đầu bằng /, ví dụ field `image` của sản phẩm)
+
+    Returns:
+        Đường dẫn thật, hoặc None nếu là URL ngoài hoặc trỏ ra ngoài `root` (../, symlink)
+    """
+    if not relative or "://" in relative:
+        return None
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, relative.lstrip("/")))
+    if not path.startswith(root + os.sep):
+        return None
+    return path
+
+
+def check_upload_size(file: UploadFile, max_bytes: int):
+    """
+    Kiểm tra dung lượng file upload đã được parse
+
+    Starlette đã ghi file ra SpooledTemporaryFile khi parse form (giữ trong bộ nhớ tới
+    1 MB, lớn hơn thì ra file tạm) nên `file.size` có sẵn, không cần đọc lại file.
+
+    Raises:
+        UploadTooLargeError: Nếu file vượt quá max_bytes
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware giới hạn dung lượng body request theo path prefix
+
+    Request có Content-Length vượt giới hạn bị trả 413 ngay, không đọc body. Body gửi
+    theo chunk (không có Content-Length) được đếm khi route đọc và bị dừng ngay khi vượt
+    giới hạn, thay vì nhận hết rồi mới kiểm tra. `limits` trả về ánh xạ path prefix ->
+    số byte tối đa, được gọi khi middleware được khởi tạo (có thể đọc settings).
+    """
+
+    def __init__(self, app: Callable, limits: Callable[[], Dict[str, int]]):
+        self.app = app
+        self.limits = sorted(limits().items(), key=lambda item: len(item[0]), reverse=True)
+
+    def _limit(self, path: str) -> Optional[int]:
+        for prefix, limit in self.limits:
+            if path == prefix or path.startswith(prefix + "/"):
+                return limit
+        return None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        limit = self._limit(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def receive_wrapper() -> Dict[str, Any]:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise UploadTooLargeError(limit)
+            return message
+
+        async def send_wrapper(message: Dict[str, Any]):
+            nonlocal response_started
+            # Route có thể đã đổi lỗi đọc body thành response khác (FastAPI trả 400 khi parse form lỗi)
+            if exceeded and not response_started:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except UploadTooLargeError:
+            if response_started:
+                raise
+        if exceeded and not response_started:
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send: Callable, limit: int):
+        body = orjson.dumps({"detail": str(UploadTooLargeError(limit))})
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,111 @@
+import hashlib
+from typing import Any, Callable, Dict, Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def weak_etag(*parts: Any) -> str:
+    """
+    Weak ETag từ các thành phần xác định nội dung (ví dụ ID và version của document)
+
+    Cùng thành phần cho cùng ETag trên mọi worker, không cần serialize response.
+    """
+    digest = hashlib.blake2b("\x1f".join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def content_etag(body: bytes) -> str:
+    """Weak ETag theo nội dung response (dùng khi response không gắn với một version)"""
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    So sánh header If-None-Match với ETag theo kiểu weak (bỏ qua tiền tố W/)
+
+    Args:
+        if_none_match: Giá trị header (có thể gồm nhiều ETag cách nhau bởi dấu phẩy, hoặc *)
+        etag: ETag hiện tại của tài nguyên
+
+    Returns:
+        bool: True nếu client đang giữ đúng bản hiện tại
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+def conditional_response(
+    request: Request,
+    etag: str,
+    build: Callable[[], Response],
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Trả 304 nếu If-None-Match khớp ETag, ngược lại gọi `build()` và gắn ETag
+
+    Response 304 không có body nên nội dung không bị serialize.
+
+    Args:
+        request: Request hiện tại
+        etag: ETag của nội dung hiện tại
+        build: Hàm dựng response đầy đủ (chỉ được gọi khi client chưa có bản hiện tại)
+        headers: Header bổ sung cho cả hai trường hợp (ví dụ Vary)
+
+    Returns:
+        Response 304 hoặc response đầy đủ kèm header ETag
+    """
+    headers = {**(headers or {}), "ETag": etag}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response = build()
+    response.headers.update(headers)
+    return response
+
+
+class CacheControlMiddleware:
+    """
+    ASGI middleware gắn header Cache-Control cho response GET/HEAD theo router
+
+    `policies` trả về ánh xạ path prefix (prefix của router) -> giá trị Cache-Control,
+    được gọi khi middleware được khởi tạo (lần đầu app nhận lifespan/request, không
+    phải lúc import) nên có thể đọc settings; prefix dài nhất khớp với path được dùng. Chỉ áp dụng cho response 200/304 chưa
+    tự đặt Cache-Control; response lỗi không được cache.
+    """
+
+    def __init__(self, app: Callable, policies: Callable[[], Dict[str, str]]):
+        self.app = app
+        self.policies = sorted(policies().items(), key=lambda item: len(item[0]), reverse=True)
+
+    def _policy(self, path: str) -> Optional[str]:
+        for prefix, policy in self.policies:
+            if path == prefix or path.startswith(prefix + "/"):
+                return policy
+        return None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        policy = self._policy(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Dict[str, Any]):
+            if message["type"] == "http.response.start" and message["status"] in (200, 304):
+                headers = message.get("headers", [])
+                if not any(name.lower() == b"cache-control" for name, _ in headers):
+                    message["headers"] = [*headers, (b"cache-control", policy.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
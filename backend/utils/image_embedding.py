@@ -0,0 +1,59 @@
+import io
+from typing import BinaryIO, Union
+import numpy as np
+from PIL import Image
+
+
+# Tăng khi thay đổi cách tính embedding để index cũ được tính lại
+EMBEDDING_VERSION = 1
+
+# Histogram màu RGB 4x4x4 (64 chiều) + ảnh xám 8x8 (64 chiều)
+COLOR_BINS = 4
+TEXTURE_SIZE = 8
+EMBEDDING_DIM = COLOR_BINS ** 3 + TEXTURE_SIZE * TEXTURE_SIZE
+
+# Kích thước ảnh dùng để tính embedding (ảnh lớn được thu nhỏ trước)
+_WORK_SIZE = (64, 64)
+
+
+def compute_image_embedding(data: Union[bytes, str, BinaryIO]) -> np.ndarray:
+    """
+    Tính embedding (CPU) cho ảnh: histogram màu kết hợp cấu trúc ảnh xám thu nhỏ
+    
+    Vector trả về đã chuẩn hóa L2 nên độ tương đồng cosine chính là tích vô hướng.
+    
+    Args:
+        data: Nội dung file ảnh, đường dẫn hoặc file object (đọc từ vị trí hiện tại)
+        
+    Returns:
+        Vector float32 có EMBEDDING_DIM chiều
+        
+    Raises:
+        ValueError: Nếu dữ liệu không phải ảnh hợp lệ
+    """
+    try:
+        image = Image.open(io.BytesIO(data) if isinstance(data, bytes) else data)
+        # Với JPEG, decode thẳng ở độ phân giải thấp thay vì decode full-size rồi thu nhỏ
+        image.draft("RGB", (_WORK_SIZE[0] * 2, _WORK_SIZE[1] * 2))
+        image = image.convert("RGB").resize(_WORK_SIZE, Image.Resampling.BILINEAR)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError("File không phải ảnh hợp lệ") from e
+    
+    pixels = np.asarray(image, dtype=np.uint8)
+    
+    # Histogram màu: mỗi pixel được gán vào một trong 4x4x4 ô màu
+    quantized = (pixels // (256 // COLOR_BINS)).astype(np.int32)
+    codes = (quantized[..., 0] * COLOR_BINS + quantized[..., 1]) * COLOR_BINS + quantized[..., 2]
+    histogram = np.bincount(codes.ravel(), minlength=COLOR_BINS ** 3).astype(np.float32)
+    # sqrt (Hellinger) giảm ảnh hưởng của màu nền chiếm diện tích lớn
+    histogram = np.sqrt(histogram / histogram.sum())
+    
+    # Cấu trúc: ảnh xám 8x8, chuẩn hóa về trung bình 0 để không phụ thuộc độ sáng
+    gray = np.asarray(image.convert("L").resize((TEXTURE_SIZE, TEXTURE_SIZE), Image.Resampling.BOX), dtype=np.float32).ravel()
+    gray -= gray.mean()
+    gray_norm = np.linalg.norm(gray)
+    if gray_norm > 0:
+        gray /= gray_norm
+    
+    embedding = np.concatenate([histogram, gray])
+    return embedding / np.linalg.norm(embedding)
@@ -0,0 +1,65 @@
+import os
+import tempfile
+from PIL import Image, ImageOps
+
+
+# Định dạng thumbnail -> (format của Pillow, tham số khi lưu ngoài quality)
+SAVE_OPTIONS = {
+    "webp": ("WEBP", {"method": 4}),
+    "jpeg": ("JPEG", {"optimize": True, "progressive": True})
+}
+
+
+def render_thumbnail(source_path: str, target_path: str, width: int, fmt: str, quality: int):
+    """
+    Tạo thumbnail rộng tối đa `width` px (giữ tỉ lệ, không phóng to) và ghi ra target_path
+
+    File được ghi ra file tạm cùng thư mục rồi os.replace, nên request khác (hoặc
+    worker khác) không bao giờ đọc phải file dở dang.
+
+    Args:
+        source_path: Đường dẫn ảnh gốc
+        target_path: Đường dẫn file thumbnail
+        width: Chiều rộng tối đa
+        fmt: "webp" hoặc "jpeg"
+        quality: Chất lượng nén (1-100)
+
+    Raises:
+        ValueError: Nếu ảnh gốc không phải ảnh hợp lệ
+    """
+    pil_format, options = SAVE_OPTIONS[fmt]
+    try:
+        with Image.open(source_path) as image:
+            # Với JPEG, decode thẳng ở độ phân giải thấp nhất vẫn không nhỏ hơn width
+            image.draft("RGB", (width, width))
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.Resampling.LANCZOS)
+            image = _convert_mode(image, keep_alpha=fmt == "webp")
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError("File không phải ảnh hợp lệ") from e
+
+    directory = os.path.dirname(target_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".thumb-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, format=pil_format, quality=quality, **options)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _convert_mode(image: Image.Image, keep_alpha: bool) -> Image.Image:
+    """Chuyển về RGB/RGBA; ảnh trong suốt được đặt trên nền trắng nếu định dạng không hỗ trợ alpha"""
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if not has_alpha:
+        return image.convert("RGB")
+    image = image.convert("RGBA")
+    if keep_alpha:
+        return image
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return background
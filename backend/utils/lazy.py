@@ -0,0 +1,34 @@
+from typing import Any, Callable
+
+
+class LazyObject:
+    """
+    Proxy tới object được tạo ở lần truy cập thuộc tính đầu tiên (giống `config.settings`)
+
+    Dùng cho các singleton cấp module cần đọc settings khi khởi tạo (worker pool,
+    cache, rate limiter...): import module không đọc .env, thiếu biến bắt buộc chỉ
+    báo lỗi khi singleton được dùng lần đầu (trong lifespan hoặc request).
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_wrapped", None)
+
+    def _get(self) -> Any:
+        wrapped = object.__getattribute__(self, "_wrapped")
+        if wrapped is None:
+            wrapped = object.__getattribute__(self, "_factory")()
+            object.__setattr__(self, "_wrapped", wrapped)
+        return wrapped
+
+    def __getattr__(self, name: str):
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._get(), name, value)
+
+    def __len__(self) -> int:
+        return len(self._get())
+
+    def __repr__(self) -> str:
+        return repr(self._get())
@@ -0,0 +1,375 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from pymongo import monitoring
+
+
+# Content-Type của Prometheus text exposition format
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket mặc định (giây) cho latency request và lệnh MongoDB
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Bucket cho các thao tác rất ngắn (ký/verify JWT)
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+# Bucket cho thời gian serialize body response
+SERIALIZE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+LabelValues = Tuple[str, ...]
+
+# Label gắn vào mọi series của process (serve.py đặt label `worker` khi chạy nhiều worker)
+_const_labels: List[str] = []
+
+
+def set_const_labels(**labels: str):
+    """Gắn thêm label cố định vào mọi series xuất ra từ process này"""
+    _const_labels.extend(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = _const_labels + [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Counter đơn điệu tăng, có label"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """
+    Histogram có label theo định dạng Prometheus (bucket tích lũy, _sum, _count)
+
+    An toàn khi gọi từ nhiều thread (bcrypt chạy trên worker pool, pymongo gọi
+    listener từ thread của driver).
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # {label values: [count từng bucket (không tích lũy) + bucket +Inf, sum]}
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def time(self, **labels: str) -> "_Timer":
+        """Context manager đo thời gian chạy của một đoạn code"""
+        return _Timer(self, labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class CallbackMetric:
+    """Metric lấy giá trị tại thời điểm scrape (số liệu cache, số tác vụ đang chờ...)"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Iterable[str] = (),
+        type_name: str = "gauge"
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.type_name = type_name
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.callback().items()
+        ]
+
+
+class MetricsRegistry:
+    """Tập hợp các metric của process, xuất ra Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric: Any) -> Any:
+        """Đăng ký metric (trả về chính metric để dùng khi khai báo)"""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric đã được đăng ký: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Xuất toàn bộ metric theo Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Registry dùng chung của process
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Thời gian xử lý request theo route template",
+    labelnames=("method", "route", "status")
+))
+
+mongo_command_duration = registry.register(Histogram(
+    "mongodb_command_duration_seconds",
+    "Thời gian round trip của lệnh MongoDB theo collection và command",
+    labelnames=("collection", "command")
+))
+
+mongo_command_failures = registry.register(Counter(
+    "mongodb_command_failures_total",
+    "Số lệnh MongoDB thất bại theo collection và command",
+    labelnames=("collection", "command")
+))
+
+password_hash_duration = registry.register(Histogram(
+    "password_hash_duration_seconds",
+    "Thời gian CPU của bcrypt trên worker (hash/verify)",
+    labelnames=("operation",)
+))
+
+password_pool_wait = registry.register(Histogram(
+    "password_pool_wait_seconds",
+    "Thời gian tác vụ bcrypt chờ trong hàng đợi password pool",
+    labelnames=("operation",)
+))
+
+jwt_duration = registry.register(Histogram(
+    "jwt_duration_seconds",
+    "Thời gian ký/verify JWT (chỉ tính các lần không trúng token cache)",
+    labelnames=("operation",),
+    buckets=FAST_BUCKETS
+))
+
+response_serialize_duration = registry.register(Histogram(
+    "response_serialize_duration_seconds",
+    "Thời gian serialize body JSON của response (orjson hoặc serializer của pydantic)",
+    labelnames=("encoder",),
+    buckets=SERIALIZE_BUCKETS
+))
+
+rate_limit_rejections = registry.register(Counter(
+    "rate_limit_rejections_total",
+    "Số request bị từ chối do vượt giới hạn tần suất",
+    labelnames=("limiter",)
+))
+
+product_events = registry.register(Counter(
+    "product_events_total",
+    "Số sự kiện hành vi theo loại và kết quả (accepted, sampled_out, dropped, write_failed)",
+    labelnames=("type", "outcome")
+))
+
+
+# Nguồn số liệu cache đã đăng ký: {tên cache: hàm trả về stats}
+_cache_sources: Dict[str, Callable[[], Dict[str, int]]] = {}
+
+
+def register_cache_metrics(name: str, stats: Callable[[], Dict[str, int]]):
+    """
+    Xuất số liệu hit/miss/size của một cache
+
+    Args:
+        name: Tên cache (dùng làm label `cache`)
+        stats: Hàm trả về dict stats (như TTLCache.stats)
+    """
+    _cache_sources[name] = stats
+
+
+def _cache_field(field: str) -> Callable[[], Dict[LabelValues, float]]:
+    def collect() -> Dict[LabelValues, float]:
+        values = {}
+        for name, stats in _cache_sources.items():
+            current = stats()
+            if field in current:
+                values[(name,)] = current[field]
+        return values
+    return collect
+
+
+registry.register(CallbackMetric(
+    "cache_hits_total", "Số lần đọc trúng cache", _cache_field("hits"), ("cache",), type_name="counter"
+))
+registry.register(CallbackMetric(
+    "cache_misses_total", "Số lần đọc trượt cache", _cache_field("misses"), ("cache",), type_name="counter"
+))
+registry.register(CallbackMetric(
+    "cache_size", "Số entry hiện có trong cache", _cache_field("size"), ("cache",)
+))
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Listener của pymongo ghi nhận số lượng và latency round trip theo collection/command
+
+    Được truyền vào client qua `event_listeners`. Thời gian lấy từ `duration_micros`
+    của driver, collection lấy từ command document của sự kiện started.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple[Any, int], str] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else "-"
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        collection = self._pop_collection(event)
+        mongo_command_duration.observe(
+            event.duration_micros / 1_000_000, collection=collection, command=event.command_name
+        )
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        collection = self._pop_collection(event)
+        mongo_command_duration.observe(
+            event.duration_micros / 1_000_000, collection=collection, command=event.command_name
+        )
+        mongo_command_failures.inc(collection=collection, command=event.command_name)
+
+    def _pop_collection(self, event: Any) -> str:
+        with self._lock:
+            return self._collections.pop((event.connection_id, event.request_id), "-")
+
+
+# Listener dùng chung cho mọi MongoClient của process
+mongo_command_listener = MongoCommandListener()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware ghi nhận thời gian xử lý request theo route template
+
+    Label `route` là path template (ví dụ `/api/products/{product_id}`) để số
+    series không tăng theo giá trị tham số; request không khớp route nào được
+    gộp vào `unmatched`. Thời gian tính tới khi gửi xong body response.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Dict[str, Any]):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", None) or "unmatched",
+                status=str(status_code)
+            )
+
+
+def timed_call(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """
+    Gọi `fn(*args)` và trả về (kết quả, thời gian chạy tính bằng giây)
+
+    Hàm module-level để có thể pickle khi chạy trên process pool.
+    """
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
@@ -0,0 +1,34 @@
+import base64
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    """
+    Mã hóa vị trí của phần tử cuối trang thành cursor (base64url, không padding)
+    
+    Args:
+        data: Dữ liệu JSON-serializable (ví dụ giá trị sort key và _id)
+        
+    Returns:
+        Cursor string
+    """
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Giải mã cursor tạo bởi encode_cursor
+    
+    Raises:
+        ValueError: Nếu cursor không hợp lệ
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor không hợp lệ")
+    if not isinstance(data, dict):
+        raise ValueError("Cursor không hợp lệ")
+    return data
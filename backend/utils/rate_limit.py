@@ -0,0 +1,208 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Tuple
+from config import settings
+from .metrics import rate_limit_rejections
+
+
+class RateLimitExceeded(Exception):
+    """Lỗi khi vượt quá số lần cho phép trong cửa sổ thời gian"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Quá nhiều yêu cầu, vui lòng thử lại sau")
+        self.retry_after = retry_after
+
+
+class MemoryRateLimitBackend:
+    """
+    Lưu bộ đếm của từng khóa trong bộ nhớ của process
+
+    Mỗi khóa giữ (chỉ số cửa sổ, số lần của cửa sổ hiện tại, số lần của cửa sổ trước).
+    Số khóa bị giới hạn bởi `maxsize` (loại khóa ít dùng nhất) để không thể làm
+    đầy bộ nhớ bằng cách đổi IP/email liên tục. Không thread-safe: chỉ dùng trên
+    thread của event loop.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, List[int]]" = OrderedDict()
+
+    async def counts(self, key: str, window_index: int) -> Tuple[int, int]:
+        entry = self._data.get(key)
+        if entry is None:
+            return 0, 0
+        index, current, previous = entry
+        if index == window_index:
+            return previous, current
+        if index == window_index - 1:
+            return current, 0
+        return 0, 0
+
+    async def incr(self, key: str, window_index: int, window: float) -> Tuple[int, int]:
+        entry = self._data.get(key)
+        if entry is None:
+            entry = self._data[key] = [window_index, 1, 0]
+        elif entry[0] == window_index:
+            entry[1] += 1
+        else:
+            previous = entry[1] if entry[0] == window_index - 1 else 0
+            entry = self._data[key] = [window_index, 1, previous]
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return entry[2], entry[1]
+
+    async def decr(self, key: str, window_index: int):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] == window_index and entry[1] > 0:
+            entry[1] -= 1
+
+    async def delete(self, key: str, window_index: int):
+        self._data.pop(key, None)
+
+    async def close(self):
+        self._data.clear()
+
+
+class RedisRateLimitBackend:
+    """
+    Lưu bộ đếm trong Redis để các worker/instance dùng chung giới hạn
+
+    Mỗi cửa sổ là một khóa `<prefix><key>:<chỉ số cửa sổ>` tăng bằng INCR và
+    tự hết hạn sau hai cửa sổ. `client` là bất kỳ client nào tương thích
+    `redis.asyncio.Redis` (mget/pipeline/decr/delete/aclose).
+    """
+
+    def __init__(self, client: Any, prefix: str):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: str, window_index: int) -> str:
+        return f"{self.prefix}{key}:{window_index}"
+
+    async def counts(self, key: str, window_index: int) -> Tuple[int, int]:
+        previous, current = await self.client.mget(
+            self._key(key, window_index - 1), self._key(key, window_index)
+        )
+        return int(previous or 0), int(current or 0)
+
+    async def incr(self, key: str, window_index: int, window: float) -> Tuple[int, int]:
+        redis_key = self._key(key, window_index)
+        # MULTI/EXEC: tăng, đặt hạn và đọc cửa sổ trước trong một lần, không xen với request khác
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(redis_key)
+            pipe.expire(redis_key, math.ceil(window * 2))
+            pipe.get(self._key(key, window_index - 1))
+            current, _, previous = await pipe.execute()
+        return int(previous or 0), int(current)
+
+    async def decr(self, key: str, window_index: int):
+        await self.client.decr(self._key(key, window_index))
+
+    async def delete(self, key: str, window_index: int):
+        await self.client.delete(self._key(key, window_index - 1), self._key(key, window_index))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_rate_limit_backend(namespace: str):
+    """
+    Tạo backend cho rate limiter theo settings.RATE_LIMIT_BACKEND ("memory" hoặc "redis")
+
+    Args:
+        namespace: Tiền tố khóa khi dùng Redis
+    """
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis cần cài đặt package 'redis'") from e
+        if not settings.REDIS_URL:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis cần cấu hình REDIS_URL")
+        return RedisRateLimitBackend(aioredis.from_url(settings.REDIS_URL), f"ratelimit:{namespace}:")
+    return MemoryRateLimitBackend(maxsize=settings.RATE_LIMIT_MAX_KEYS)
+
+
+class SlidingWindowLimiter:
+    """
+    Giới hạn số lần theo cửa sổ trượt (sliding window counter)
+
+    Số lần ước lượng = lần của cửa sổ trước * phần cửa sổ trước còn nằm trong
+    khoảng `window` giây gần nhất + lần của cửa sổ hiện tại. Chỉ cần hai bộ đếm
+    cho mỗi khóa (không lưu từng timestamp) mà không cho phép dồn gấp đôi số lần ở
+    ranh giới giữa hai cửa sổ như fixed window.
+
+    `acquire` đếm trước rồi mới so với giới hạn bằng số lần backend trả về sau khi
+    tăng (một thao tác nguyên tử), nên các request đồng thời - kể cả từ worker khác
+    qua Redis - không cùng lọt qua trước khi kịp được đếm.
+    """
+
+    def __init__(self, name: str, backend: Any, limit: int, window: float):
+        self.name = name
+        self.backend = backend
+        self.limit = limit
+        self.window = window
+
+    def _position(self) -> Tuple[int, float]:
+        # Dùng thời gian thực (không phải monotonic) để các process dùng chung Redis có cùng chỉ số cửa sổ
+        now = time.time()
+        index = int(now // self.window)
+        return index, now - index * self.window
+
+    async def check(self, key: str):
+        """
+        Kiểm tra khóa còn được phép thêm một lần nữa không
+
+        Raises:
+            RateLimitExceeded: Nếu đã đạt giới hạn
+        """
+        index, elapsed = self._position()
+        previous, current = await self.backend.counts(key, index)
+        weight = 1 - elapsed / self.window
+        if previous * weight + current < self.limit:
+            return
+        rate_limit_rejections.inc(limiter=self.name)
+        raise RateLimitExceeded(self._retry_after(previous, current, elapsed))
+
+    async def acquire(self, key: str):
+        """
+        Đếm thêm một lần cho khóa, từ chối nếu các lần trước đó đã đạt giới hạn
+
+        Raises:
+            RateLimitExceeded: Nếu đã đạt giới hạn (lần bị từ chối được trừ lại)
+        """
+        index, elapsed = self._position()
+        previous, current = await self.backend.incr(key, index, self.window)
+        weight = 1 - elapsed / self.window
+        # `current` đã gồm lần này: được phép nếu số lần trước nó còn dưới giới hạn
+        if previous * weight + current - 1 < self.limit:
+            return
+        await self.backend.decr(key, index)
+        rate_limit_rejections.inc(limiter=self.name)
+        raise RateLimitExceeded(self._retry_after(previous, current - 1, elapsed))
+
+    async def hit(self, key: str):
+        """Đếm thêm một lần cho khóa"""
+        index, _ = self._position()
+        await self.backend.incr(key, index, self.window)
+
+    async def reset(self, key: str):
+        """Xóa bộ đếm của khóa (ví dụ sau khi đăng nhập thành công)"""
+        index, _ = self._position()
+        await self.backend.delete(key, index)
+
+    def _retry_after(self, previous: int, current: int, elapsed: float) -> int:
+        """Số giây tới khi số lần ước lượng giảm xuống dưới giới hạn"""
+        allowed = self.limit - 1
+        if current <= allowed and previous > 0:
+            # Chờ phần cửa sổ trước trượt ra ngoài trong cửa sổ hiện tại
+            wait = self.window * (1 - (allowed - current) / previous) - elapsed
+        else:
+            # Chờ sang cửa sổ sau, khi cửa sổ hiện tại trở thành cửa sổ trước
+            wait = (self.window - elapsed) + self.window * max(0.0, 1 - allowed / current)
+        return max(1, math.ceil(wait))
+
+    async def close(self):
+        await self.backend.close()
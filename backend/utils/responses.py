@@ -0,0 +1,80 @@
+from decimal import Decimal
+from typing import Any, Dict, Optional
+import orjson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from .metrics import response_serialize_duration
+
+
+def orjson_default(value: Any) -> Any:
+    """
+    Encode các kiểu BSON mà orjson không tự xử lý
+
+    datetime được orjson encode trực tiếp (ISO 8601), nên document đọc từ
+    MongoDB có thể trả về mà không cần dựng lại dict qua jsonable_encoder.
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Không encode được kiểu {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response encode bằng orjson
+
+    Dùng làm response class mặc định cho các endpoint trả về dict (health, lỗi,
+    document MongoDB thô). Endpoint có response_model vẫn dùng serializer của pydantic.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with response_serialize_duration.time(encoder="orjson"):
+            return orjson.dumps(
+                content,
+                default=orjson_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+
+
+def dump_model(model: BaseModel) -> bytes:
+    """Serialize model thành JSON (theo alias) bằng serializer của pydantic, có đo thời gian"""
+    with response_serialize_duration.time(encoder="pydantic"):
+        return model.__pydantic_serializer__.to_json(model, by_alias=True)
+
+
+def model_response(
+    model: BaseModel,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Trả về model đã được service dựng (và validate) sẵn mà không validate lại
+
+    FastAPI validate lại giá trị trả về theo response_model rồi mới serialize;
+    với model nội bộ đáng tin cậy, bước này là thừa. Hàm này serialize model một
+    lần bằng serializer (Rust) của pydantic, theo alias như response_model mặc định.
+    Endpoint vẫn khai báo response_model để giữ tài liệu OpenAPI.
+
+    Args:
+        model: Model cần trả về
+        status_code: HTTP status code
+        headers: Header bổ sung
+
+    Returns:
+        Response chứa JSON của model
+    """
+    return Response(
+        content=dump_model(model),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
@@ -0,0 +1,96 @@
+import heapq
+import math
+import time
+from typing import Any, Dict, List, Tuple
+from config import settings
+
+
+class RevocationListFull(Exception):
+    """Lỗi khi danh sách token thu hồi (backend memory) đã đầy các token chưa hết hạn"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Không thể thu hồi token lúc này, vui lòng thử lại sau")
+        self.retry_after = retry_after
+
+
+class MemoryRevocationBackend:
+    """
+    Lưu jti của các token đã thu hồi trong bộ nhớ của process, tới đúng `exp` của token
+
+    Entry không bao giờ bị loại trước khi token hết hạn (khác LRU: loại entry sớm
+    là làm token đã đăng xuất dùng lại được). Khi đã có `maxsize` token chưa hết
+    hạn, lần thu hồi mới bị từ chối bằng RevocationListFull. Chỉ có hiệu lực trong
+    process hiện tại: chạy nhiều worker phải dùng backend redis.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._expires: Dict[str, float] = {}
+        # (exp, jti) theo thứ tự hết hạn, để dọn entry hết hạn mà không duyệt cả dict
+        self._heap: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def _purge(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            exp, jti = heapq.heappop(self._heap)
+            if self._expires.get(jti) == exp:
+                del self._expires[jti]
+
+    async def add(self, jti: str, exp: float):
+        now = time.time()
+        if exp <= now:
+            return
+        self._purge(now)
+        if jti not in self._expires and len(self._expires) >= self.maxsize:
+            raise RevocationListFull(max(1, math.ceil(self._heap[0][0] - now)))
+        self._expires[jti] = exp
+        heapq.heappush(self._heap, (exp, jti))
+
+    async def contains(self, jti: str) -> bool:
+        exp = self._expires.get(jti)
+        return exp is not None and exp > time.time()
+
+    async def close(self):
+        self._expires.clear()
+        self._heap.clear()
+
+
+class RedisRevocationBackend:
+    """
+    Lưu jti của các token đã thu hồi trong Redis để mọi worker/instance cùng từ chối
+
+    Mỗi jti là một khóa hết hạn cùng lúc với token. `client` là bất kỳ client nào
+    tương thích `redis.asyncio.Redis` (set/exists/aclose). Redis nên cấu hình
+    `maxmemory-policy noeviction` (hoặc volatile-* với instance riêng) để khóa
+    không bị loại trước khi token hết hạn.
+    """
+
+    def __init__(self, client: Any, prefix: str):
+        self.client = client
+        self.prefix = prefix
+
+    async def add(self, jti: str, exp: float):
+        ttl = math.ceil(exp - time.time())
+        if ttl > 0:
+            await self.client.set(self.prefix + jti, 1, ex=ttl)
+
+    async def contains(self, jti: str) -> bool:
+        return bool(await self.client.exists(self.prefix + jti))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_revocation_backend():
+    """Tạo backend lưu token đã thu hồi theo settings.CACHE_BACKEND ("memory" hoặc "redis")"""
+    if settings.CACHE_BACKEND == "redis":
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis cần cài đặt package 'redis'") from e
+        if not settings.REDIS_URL:
+            raise RuntimeError("CACHE_BACKEND=redis cần cấu hình REDIS_URL")
+        return RedisRevocationBackend(aioredis.from_url(settings.REDIS_URL), "revoked:")
+    return MemoryRevocationBackend(maxsize=settings.REVOKED_TOKENS_MAX_SIZE)
@@ -0,0 +1,73 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Tuple, Union
+
+# Một bản ghi đọc từ stream: (số dòng, dict dữ liệu hoặc lỗi parse của dòng đó)
+Record = Tuple[int, Union[Dict[str, Any], ValueError]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Tách stream bytes (UTF-8) thành từng dòng mà không đọc hết body vào bộ nhớ
+
+    Chỉ giữ phần dòng còn dở giữa hai chunk; ký tự UTF-8 nhiều byte bị cắt ở
+    ranh giới chunk được ghép lại bởi incremental decoder.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """
+    Đọc stream NDJSON (mỗi dòng một JSON object), bỏ qua dòng trống
+
+    Dòng không phải JSON object hợp lệ được trả về dưới dạng ValueError để nơi gọi
+    ghi nhận lỗi của dòng đó và tiếp tục đọc.
+    """
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"JSON không hợp lệ: {e.msg}")
+            continue
+        if not isinstance(value, dict):
+            yield line_number, ValueError("Mỗi dòng phải là một JSON object")
+            continue
+        yield line_number, value
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """
+    Đọc stream CSV có dòng header, bỏ qua dòng trống
+
+    Ô rỗng được đổi thành None (field không bắt buộc). Mỗi bản ghi phải nằm trên
+    một dòng (không hỗ trợ xuống dòng bên trong ô có dấu nháy).
+    """
+    header: List[str] = []
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        row = next(csv.reader([line]))
+        if not header:
+            header = [name.strip() for name in row]
+            continue
+        if len(row) != len(header):
+            yield line_number, ValueError(f"Dòng có {len(row)} cột, header có {len(header)} cột")
+            continue
+        yield line_number, {name: (value if value != "" else None) for name, value in zip(header, row)}
@@ -0,0 +1,26 @@
+import re
+import unicodedata
+from typing import List
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def fold_text(text: str) -> str:
+    """
+    Chuẩn hóa chuỗi để tìm kiếm: chữ thường, bỏ dấu tiếng Việt ("Giày" -> "giay", "Đỏ" -> "do")
+    
+    Args:
+        text: Chuỗi gốc
+        
+    Returns:
+        Chuỗi đã bỏ dấu
+    """
+    text = text.lower().replace("đ", "d")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """Tách chuỗi (đã hoặc chưa bỏ dấu) thành các token chữ/số đã bỏ dấu"""
+    return _TOKEN_PATTERN.findall(fold_text(text))
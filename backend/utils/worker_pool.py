@@ -0,0 +1,77 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class PoolSaturatedError(Exception):
+    """Lỗi khi worker pool đã đầy (số tác vụ đang chờ vượt giới hạn)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Hệ thống đang quá tải, vui lòng thử lại sau")
+        self.retry_after = retry_after
+
+
+class BoundedWorkerPool:
+    """
+    Worker pool (thread hoặc process) có giới hạn độ sâu hàng đợi
+
+    Dùng cho các tác vụ nặng CPU (bcrypt...) để không chặn event loop.
+    Khi số tác vụ đang chạy + đang chờ đạt `max_workers + max_queue`,
+    tác vụ mới bị từ chối ngay bằng PoolSaturatedError thay vì xếp hàng vô hạn.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int, retry_after: int = 1):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Loại worker pool không hợp lệ: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        # Chỉ được thay đổi trên thread của event loop nên không cần lock
+        self._pending = 0
+        if hasattr(os, "register_at_fork"):
+            # Thread/process của executor không tồn tại trong process con sau khi fork
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    @property
+    def pending(self) -> int:
+        """Số tác vụ đang chạy hoặc đang chờ"""
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        """Tạo executor khi cần (process pool chỉ fork khi có tác vụ đầu tiên)"""
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="worker-pool")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Chạy `fn(*args)` trên pool và await kết quả
+
+        Raises:
+            PoolSaturatedError: Nếu hàng đợi đã đầy
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            raise PoolSaturatedError(self.retry_after)
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._pending -= 1
+
+    def _reset_after_fork(self):
+        self._executor = None
+        self._pending = 0
+
+    def shutdown(self):
+        """Dừng executor (gọi khi tắt ứng dụng)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -43,6 +43,7 @@ export default function AdditionalInfoModal({ isOpen, onClose, onSuccess }: Addi
         method: 'PATCH',
         headers: {
           'Content-Type': 'application/json',
+          'Authorization': `Bearer ${localStorage.getItem('access_token') ?? ''}`,
         },
         body: JSON.stringify(payload)
       })
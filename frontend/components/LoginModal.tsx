@@ -26,6 +26,23 @@ export default function LoginModal({ onClose }: LoginModalProps) {
     dateOfBirth: ''
   })
 
+  const requestLogin = () =>
+    fetch(API_ENDPOINTS.AUTH.LOGIN, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        email: formData.email,
+        password: formData.password
+      })
+    })
+
+  const saveSession = (result: any) => {
+    localStorage.setItem('access_token', result.access_token)
+    localStorage.setItem('user_info', JSON.stringify(result.user))
+  }
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
     
@@ -80,6 +97,18 @@ export default function LoginModal({ onClose }: LoginModalProps) {
         const result = await response.json()
         console.log('Đăng ký thành công:', result)
         
+        // Đăng nhập luôn để có access token cho bước bổ sung thông tin (/update-profile yêu cầu Bearer token)
+        const loginResponse = await requestLogin()
+        if (!loginResponse.ok) {
+          setErrorTitle('Đăng ký thành công')
+          setErrorMessage('Vui lòng đăng nhập để tiếp tục')
+          setErrorDetail(null)
+          setShowError(true)
+          setIsLogin(true)
+          return
+        }
+        saveSession(await loginResponse.json())
+        
         onClose()
         setTimeout(() => {
           setShowAdditionalInfo(true)
@@ -94,16 +123,7 @@ export default function LoginModal({ onClose }: LoginModalProps) {
     } else {
       // Đăng nhập
       try {
-        const response = await fetch(API_ENDPOINTS.AUTH.LOGIN, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify({
-            email: formData.email,
-            password: formData.password
-          })
-        })
+        const response = await requestLogin()
 
         if (!response.ok) {
           const errorData = await response.json()
@@ -135,8 +155,7 @@ export default function LoginModal({ onClose }: LoginModalProps) {
         const result = await response.json()
         console.log('Đăng nhập thành công:', result)
         
-        localStorage.setItem('access_token', result.access_token)
-        localStorage.setItem('user_info', JSON.stringify(result.user))
+        saveSession(result)
         
         onClose()
       } catch (err: any) {